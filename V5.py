@@ -11,21 +11,20 @@ openai.api_key = os.getenv("OPENAI_API_KEY")  # Replace with your actual API key
 
 # Load or generate synthetic data
 @st.cache_data
-def generate_synthetic_data():
-    num_households = 100
-    np.random.seed(42)
+def generate_synthetic_data(num_households=100):
+    rng = np.random.default_rng(42)
 
     # Generate household data
     household_ids = range(1, num_households + 1)
-    household_sizes = np.random.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
+    household_sizes = rng.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
     household_sizes = np.clip(household_sizes, 1, None)
 
     # Generate daily water usage
-    daily_usage_per_person = np.random.normal(loc=90, scale=10, size=num_households).round().astype(int)
+    daily_usage_per_person = rng.normal(loc=90, scale=10, size=num_households).round().astype(int)
     total_daily_usage = household_sizes * daily_usage_per_person
 
     # Add Zip Codes
-    zip_codes = np.random.choice(["90001", "90002", "90003", "90004"], size=num_households)
+    zip_codes = rng.choice(["90001", "90002", "90003", "90004"], size=num_households)
     
     # Create DataFrame
     data = {
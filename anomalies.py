@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from insights import GROUP_COLUMNS, fixture_columns, household_id_column
+
+# Modified z-score above which a fixture counts as anomalous (Iglewicz & Hoaglin)
+ROBUST_Z_THRESHOLD = 3.5
+# Share of total usage going to leaks above which a household is flagged
+LEAK_SHARE_THRESHOLD = 0.15
+LEAK_COLUMN = "Leaks (gallons)"
+TOTAL_COLUMNS = ["Total_Daily_Usage_Gallons", "Total Usage (gallons)"]
+
+
+def total_column(data):
+    return next((column for column in TOTAL_COLUMNS if column in data.columns), None)
+
+
+# Integer peer-group id per household (Zip_Code x Household_Size where available)
+def peer_groups(data):
+    group_columns = [column for column in GROUP_COLUMNS if column in data.columns]
+    if not group_columns:
+        return np.zeros(len(data), dtype=np.int64)
+    return data.groupby(group_columns, observed=True, sort=False).ngroup().to_numpy()
+
+
+# Mean of every column of `values` per peer group, as a (groups x columns) table indexed
+# by the ids from peer_groups; one bincount per column, no per-group Python loop
+def peer_group_means(values, groups):
+    group_count = int(groups.max()) + 1 if len(groups) else 0
+    sizes = np.maximum(np.bincount(groups, minlength=group_count), 1)
+    return np.column_stack([np.bincount(groups, weights=values[:, i], minlength=group_count) / sizes
+                            for i in range(values.shape[1])])
+
+
+# Robust z-scores of every column of `values` within its peer group:
+# 0.6745 * (x - median) / MAD, computed for all households at once
+def robust_z_scores(values, groups):
+    frame = pd.DataFrame(values)
+    median = frame.groupby(groups).transform("median").to_numpy()
+    deviation = values - median
+    mad = pd.DataFrame(np.abs(deviation)).groupby(groups).transform("median").to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * deviation / mad
+    # A peer group with zero spread has no outliers unless a value differs from the median
+    return np.where(mad > 0, z, np.where(deviation > 0, np.inf, 0.0))
+
+
+# Score every household in one vectorized pass; returns one row per household,
+# highest score first
+def score_anomalies(data):
+    columns = fixture_columns(data)
+    names = list(columns)
+    values = data[list(columns.values())].to_numpy(dtype=np.float64)
+    groups = peer_groups(data)
+
+    z = robust_z_scores(values, groups)
+    top = np.argmax(z, axis=1)
+    score = z[np.arange(len(z)), top]
+
+    result = pd.DataFrame({"Household": data[household_id_column(data)].to_numpy()})
+    for column in GROUP_COLUMNS:
+        if column in data.columns:
+            result[column] = data[column].to_numpy()
+    result["Score"] = score
+    result["Top_Fixture"] = np.asarray(names, dtype=object)[top]
+    needs_attention = score > ROBUST_Z_THRESHOLD
+
+    total = total_column(data)
+    if LEAK_COLUMN in data.columns and total is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            leak_share = data[LEAK_COLUMN].to_numpy(dtype=np.float64) / data[total].to_numpy(dtype=np.float64)
+        leak_share = np.nan_to_num(leak_share)
+        result["Leak_Share"] = leak_share
+        needs_attention |= leak_share > LEAK_SHARE_THRESHOLD
+
+    result["Needs_Attention"] = needs_attention
+    return result.sort_values("Score", ascending=False, ignore_index=True)
+
+
+# Households flagged for attention, most anomalous first
+def households_needing_attention(scores, limit=None):
+    flagged = scores[scores["Needs_Attention"]]
+    return flagged if limit is None else flagged.head(limit)
@@ -0,0 +1,307 @@
+# JSON API over the same insights, savings, regional data and tips as the Streamlit tabs.
+#
+#   python api_service.py --port 8080 [--processes 4]
+#
+#   GET  /v1/fixtures
+#   GET  /v1/insights?fixture=Shower[&stat=mean][&zip_code=90001][&household_size=3]
+#   GET  /v1/savings?usage=120[&zip_code=90001][&household_size=3]
+#   POST /v1/savings/simulate   {"rates": {...}, "scenario": {"Shower": -0.2}}
+#   GET  /v1/regions[?fixture=Shower]
+#   GET  /v1/tips?activity=Shower&usage=25[&peer_usage=20][&household_size=3]
+#   GET  /v1/households/{household_id}/opportunities[?k=3]
+#   GET  /v1/households?fixture=Garden&min_gallons=60[&zip_code=90003][&household_size=4][&limit=1000]
+#
+# The dataset, aggregate index, percentile index and simulator arrays are loaded once
+# per process at startup (from the shared snapshot when JADE_SHARED_DATASET=1, so
+# several --processes map one copy). Lookups run on the event loop; simulations and
+# LLM calls run on thread pools so they never block the cheap endpoints. Household
+# slices are filtered in DuckDB (query.py) and streamed back as NDJSON batch by batch. The LLM
+# calls go through the shared, rate-limited client in llm_client.py.
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from anomalies import total_column
+from chart_data import zip_rollup
+from insights import STATS, build_aggregate_index, fixture_columns, lookup_insight
+from jade_core import DATA_SOURCE, SHARED_DATASET, average_data, get_local_tip, get_personal_tips, get_tip, load_data, shared_snapshot_version
+from percentiles import PercentileIndex
+from personalize import HouseholdOpportunities
+from query import HouseholdQuery, QueryError
+from savings_sim import DEFAULT_RATES, check_rates, prepare_simulation, simulate
+from telemetry import prometheus_text, span
+from tip_cache import TipCache
+
+API_PORT = int(os.getenv("JADE_API_PORT", 8080))
+# Concurrent LLM requests per process; further tip requests queue for a thread
+API_LLM_CONCURRENCY = int(os.getenv("JADE_API_LLM_CONCURRENCY", 16))
+API_QUERY_CONCURRENCY = int(os.getenv("JADE_API_QUERY_CONCURRENCY", 4))
+API_SIMULATION_CONCURRENCY = int(os.getenv("JADE_API_SIMULATION_CONCURRENCY", 4))
+HOUSEHOLD_BATCH_ROWS = 10_000
+NATIONAL_AVERAGE_GALLONS = 82
+PRICE_PER_GALLON = DEFAULT_RATES["tiers"][0][1]
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _query_filters(request):
+    zip_code = request.query.get("zip_code") or None
+    household_size = request.query.get("household_size") or None
+    if household_size is not None:
+        household_size = _number(household_size, "household_size", int)
+    return zip_code, household_size
+
+
+# `value` as a finite number of type `kind`, no smaller than `minimum` if given
+def _number(value, name, kind=float, minimum=None):
+    try:
+        number = kind(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"{name} must be a number")
+    if not math.isfinite(number):
+        raise BadRequest(f"{name} must be a finite number")
+    if minimum is not None and number < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    return number
+
+
+def _fixture(request, state, name="fixture"):
+    fixture = request.query.get(name)
+    if fixture not in state["fixtures"]:
+        raise BadRequest(f"{name} must be one of {', '.join(state['fixtures'])}")
+    return fixture
+
+
+async def fixtures_handler(request):
+    return web.json_response({"fixtures": request.app["state"]["fixtures"]})
+
+
+async def insights_handler(request):
+    state = request.app["state"]
+    fixture = _fixture(request, state)
+    stat = request.query.get("stat", "mean")
+    if stat not in STATS:
+        raise BadRequest(f"stat must be one of {', '.join(STATS)}")
+    zip_code, household_size = _query_filters(request)
+    value = lookup_insight(state["index"], fixture, stat, zip_code, household_size)
+    return web.json_response({"fixture": fixture, "stat": stat, "zip_code": zip_code,
+                              "household_size": household_size, "value": value})
+
+
+# Same numbers as the Savings Calculator tab
+async def savings_handler(request):
+    state = request.app["state"]
+    usage = _number(request.query.get("usage"), "usage")
+    zip_code, household_size = _query_filters(request)
+    percentile_index = state["percentiles"]
+    result = {
+        "usage": usage,
+        "percentile": percentile_index.percentile(usage),
+        "national_average": NATIONAL_AVERAGE_GALLONS,
+        "gallons_saved_per_day": max(usage - NATIONAL_AVERAGE_GALLONS, 0),
+        "cost_saved_per_day": max(usage - NATIONAL_AVERAGE_GALLONS, 0) * PRICE_PER_GALLON,
+    }
+    if zip_code is not None or household_size is not None:
+        result["peer_percentile"] = percentile_index.percentile(usage, zip_code, household_size)
+        result["peer_households"] = percentile_index.count(zip_code, household_size)
+    return web.json_response(result)
+
+
+async def simulate_handler(request):
+    state = request.app["state"]
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("body must be a JSON object")
+    rates, scenario = body.get("rates", {}), body.get("scenario", {})
+    if not isinstance(rates, dict) or not isinstance(scenario, dict):
+        raise BadRequest("rates and scenario must be JSON objects")
+    rates = {**DEFAULT_RATES, **rates}
+    try:
+        check_rates(rates)
+    except ValueError as e:
+        raise BadRequest(str(e))
+    unknown = set(scenario) - set(state["fixtures"])
+    if unknown:
+        raise BadRequest(f"unknown fixtures: {', '.join(sorted(unknown))}")
+    for fixture, change in scenario.items():
+        if isinstance(change, bool) or not isinstance(change, (int, float)) or not math.isfinite(change):
+            raise BadRequest(f"scenario change for {fixture} must be a number")
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(state["simulation_pool"], simulate, state["simulation"], rates, scenario)
+    return web.json_response({**{key: value for key, value in result.items() if key != "by_zip"},
+                              "by_zip": result["by_zip"].to_dict(orient="records")})
+
+
+# Regional comparison plus the per-zip rollup of one fixture (both prebuilt in load_state)
+async def regions_handler(request):
+    state = request.app["state"]
+    result = {"regions": state["regions"]}
+    if "fixture" in request.query:
+        result["zip_rollup"] = state["zip_rollups"][_fixture(request, state)]
+    return web.json_response(result)
+
+
+# Local tips (JADE_TIP_MODE=local/local_first) are answered on the event loop;
+# everything else goes through the tip cache and LLM on the thread pool
+async def tips_handler(request):
+    state = request.app["state"]
+    activity = _fixture(request, state, "activity")
+    usage = _number(request.query.get("usage"), "usage")
+    peer_usage = request.query.get("peer_usage")
+    peer_usage = None if peer_usage is None else _number(peer_usage, "peer_usage")
+    _, household_size = _query_filters(request)
+    tip = get_local_tip(activity, usage, peer_usage, household_size)
+    if tip is not None:
+        source = "local"
+    else:
+        loop = asyncio.get_running_loop()
+        tip, source = await loop.run_in_executor(state["llm_pool"], get_tip, activity, usage, state["tip_cache"],
+                                                 peer_usage, household_size)
+    return web.json_response({"activity": activity, "usage": usage, "tip": tip, "source": source})
+
+
+# A household's top savings opportunities with a tip for each, largest excess first
+async def opportunities_handler(request):
+    state = request.app["state"]
+    household_id = request.match_info["household_id"]
+    k = _number(request.query.get("k", "3"), "k", int, minimum=1)
+    opportunities = state["opportunities"]
+    if opportunities.position(household_id) is None:
+        return web.json_response({"error": f"unknown household {household_id}"}, status=404)
+    return web.json_response({"household_id": household_id, "peer_group": opportunities.peer_group(household_id),
+                              "opportunities": get_personal_tips(opportunities, household_id, k)})
+
+
+# Households matching the filters, one JSON object per line, read from DuckDB in batches
+async def households_handler(request):
+    state = request.app["state"]
+    fixture = _fixture(request, state)
+    min_gallons = _number(request.query.get("min_gallons", "0"), "min_gallons")
+    limit = request.query.get("limit")
+    limit = None if limit is None else _number(limit, "limit", int)
+    zip_code, household_size = _query_filters(request)
+    filters = [(state["fixture_columns"][fixture], ">", min_gallons)]
+    if zip_code is not None:
+        filters.append(("Zip_Code", "=", zip_code))
+    if household_size is not None:
+        filters.append(("Household_Size", "=", household_size))
+    try:
+        batches = state["query"].batches(filters=filters, limit=limit, batch_rows=HOUSEHOLD_BATCH_ROWS)
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(state["query_pool"], next, batches, None)
+    except QueryError as e:
+        raise BadRequest(str(e))
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    try:
+        while batch is not None:
+            lines = "".join(json.dumps(row) + "\n" for row in batch.to_pylist())
+            await response.write(lines.encode())
+            batch = await loop.run_in_executor(state["query_pool"], next, batches, None)
+    finally:
+        batches.close()
+    await response.write_eof()
+    return response
+
+
+async def metrics_handler(request):
+    return web.Response(text=prometheus_text(), content_type="text/plain")
+
+
+@web.middleware
+async def errors_middleware(request, handler):
+    # Label by route rather than raw path so unknown URLs don't create new series
+    resource = request.match_info.route.resource
+    with span(f"api{resource.canonical if resource else '/unmatched'}"):
+        try:
+            return await handler(request)
+        except BadRequest as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+
+# Everything the handlers share, built once per process
+def load_state():
+    if SHARED_DATASET:
+        from shared_dataset import open_snapshot
+        data = open_snapshot(shared_snapshot_version())
+    else:
+        data = load_data()
+    fixtures = list(fixture_columns(data))
+    index = build_aggregate_index(data)
+    query = HouseholdQuery(data=data) if SHARED_DATASET or DATA_SOURCE == "synthetic" else HouseholdQuery(DATA_SOURCE)
+    return {
+        "data": data,
+        "fixtures": fixtures,
+        "fixture_columns": fixture_columns(data),
+        "index": index,
+        "regions": [{"region": region, "daily_usage": usage}
+                    for region, usage in zip(average_data["Region"], average_data["Daily Usage (Gallons)"])],
+        "zip_rollups": {fixture: zip_rollup(index, fixture).to_dict(orient="records") for fixture in fixtures},
+        "percentiles": PercentileIndex(data, total_column(data)),
+        "simulation": prepare_simulation(data),
+        "opportunities": HouseholdOpportunities(data),
+        "query": query,
+        "tip_cache": TipCache(),
+        "simulation_pool": ThreadPoolExecutor(max_workers=API_SIMULATION_CONCURRENCY),
+        "llm_pool": ThreadPoolExecutor(max_workers=API_LLM_CONCURRENCY),
+        "query_pool": ThreadPoolExecutor(max_workers=API_QUERY_CONCURRENCY),
+    }
+
+
+def create_app(state=None):
+    app = web.Application(middlewares=[errors_middleware])
+    app["state"] = state or load_state()
+    app.router.add_get("/v1/fixtures", fixtures_handler)
+    app.router.add_get("/v1/insights", insights_handler)
+    app.router.add_get("/v1/savings", savings_handler)
+    app.router.add_post("/v1/savings/simulate", simulate_handler)
+    app.router.add_get("/v1/regions", regions_handler)
+    app.router.add_get("/v1/tips", tips_handler)
+    app.router.add_get("/v1/households", households_handler)
+    app.router.add_get("/v1/households/{household_id}/opportunities", opportunities_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    return app
+
+
+def serve(host, port, reuse_port=False):
+    web.run_app(create_app(), host=host, port=port, reuse_port=reuse_port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jade JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--processes", type=int, default=1,
+                        help="server processes sharing the port (use with JADE_SHARED_DATASET=1)")
+    args = parser.parse_args()
+
+    print(f"Jade API listening on http://{args.host}:{args.port}/v1 ({args.processes} process(es))", flush=True)
+    if args.processes <= 1:
+        serve(args.host, args.port)
+    else:
+        workers = [multiprocessing.Process(target=serve, args=(args.host, args.port, True)) for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        # Stopping the parent stops the whole group
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            for worker in workers:
+                worker.join()
+        finally:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,260 @@
+# Incremental ingestion for meter CSVs that grow by appended rows (e.g. an hourly export
+# shaped like household_water_usage.csv).
+#
+# The ingestor remembers how many bytes and rows of the file it has parsed, plus a hash
+# of the first block (as it was at load time, so appends to a small file don't change it). On refresh it stats the file and, when the file only grew, parses
+# just the bytes after the saved offset (up to the last complete line). The new rows are
+# appended to growable column arrays, written as one more Parquet part in the columnar
+# store, and folded into the aggregate index, percentile index and chart histograms, so
+# a refresh costs time proportional to the appended rows. Readings are stored in gallons
+# per day (see data_sources.METER_PERIOD_DAYS). A file that shrank or whose first block
+# changed was rewritten, and is reloaded from scratch.
+#
+#   python append_ingest.py --source household_water_usage.csv --append-rows 10000 --rounds 5
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from anomalies import total_column
+from atomic import atomic_write
+from chart_data import HistogramAccumulator
+from data_sources import METER_PERIOD_DAYS, METER_SCHEMA, readings_per_day
+from insights import build_aggregate_index, merge_aggregate_index
+from percentiles import PercentileIndex
+from telemetry import increment, span
+from tip_cache import CACHE_DIR
+
+APPEND_STORE_DIR = os.path.join(CACHE_DIR, "appends")
+APPEND_POLL_SECONDS = float(os.getenv("JADE_APPEND_POLL_SECONDS", 5))
+HEAD_BYTES = 4096
+MIN_CAPACITY = 1024
+
+
+def _head_hash(path, length):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+# Column arrays with spare capacity, so appending copies only the new rows. frame()
+# returns a DataFrame over the filled prefix; frames handed out earlier stay valid
+# because rows they cover are never written again.
+class GrowableColumns:
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        self.rows = 0
+        self._arrays = {column: np.empty(max(MIN_CAPACITY, 2 * len(frame)), dtype=frame[column].to_numpy().dtype)
+                        for column in self.columns}
+        self.append(frame)
+
+    def append(self, frame):
+        end = self.rows + len(frame)
+        for column in self.columns:
+            array = self._arrays[column]
+            if end > len(array):
+                grown = np.empty(max(end, 2 * len(array)), dtype=array.dtype)
+                grown[:self.rows] = array[:self.rows]
+                array = self._arrays[column] = grown
+            array[self.rows:end] = frame[column].to_numpy()
+        self.rows = end
+
+    def frame(self):
+        return pd.DataFrame({column: self._arrays[column][:self.rows] for column in self.columns}, copy=False)
+
+
+class AppendIngestor:
+    def __init__(self, path, store_dir=None, poll_seconds=APPEND_POLL_SECONDS):
+        self.path = os.path.abspath(path)
+        digest = hashlib.sha1(self.path.encode()).hexdigest()[:16]
+        self.store_dir = store_dir or os.path.join(APPEND_STORE_DIR, digest)
+        self.digest = digest
+        self.poll_seconds = poll_seconds
+        # Reentrant: a refresh that finds the file rewritten reloads under the same lock
+        self._lock = threading.RLock()
+        self._checked_at = 0.0
+        self._histograms = {}
+        self._load()
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.store_dir, "state.json")
+
+    def _part_path(self, part):
+        return os.path.join(self.store_dir, f"part-{part:05d}.parquet")
+
+    def _read_state(self):
+        try:
+            with open(self._state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_state(self):
+        state = {"offset": self.offset, "rows": self.rows, "parts": self.parts, "head_hash": self.head_hash,
+                 "head_bytes": self.head_bytes, "header": self.header, "period_days": METER_PERIOD_DAYS}
+        with atomic_write(self._state_path) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(state, f)
+
+    # Rows parsed from bytes [start, end) of the file, and the offset just past the
+    # last complete line (a partially written last line is left for the next refresh)
+    def _parse(self, start, end):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            chunk = f.read(end - start)
+        complete = chunk.rfind(b"\n") + 1
+        body_start = 0
+        if start == 0:
+            body_start = chunk.find(b"\n") + 1
+            self.header = chunk[:body_start].decode().strip().split(",")
+        body = chunk[body_start:complete]
+        dtype = {column: kind for column, kind in METER_SCHEMA.items() if column in self.header}
+        rows = pd.read_csv(io.BytesIO(body), header=None, names=self.header, dtype=dtype)
+        return readings_per_day(rows), start + complete
+
+    def _write_part(self, rows):
+        os.makedirs(self.store_dir, exist_ok=True)
+        with atomic_write(self._part_path(self.parts)) as tmp_path:
+            rows.to_parquet(tmp_path, index=False)
+        self.parts += 1
+
+    # Everything derived from the full history, built once per (re)load
+    def _rebuild(self, frame):
+        self._columns = GrowableColumns(frame)
+        self.data = self._columns.frame()
+        self.data.attrs["version"] = self.version
+        self.aggregate_index = build_aggregate_index(self.data)
+        self.percentile_index = PercentileIndex(self.data, total_column(self.data))
+        self._histograms = {}
+
+    @property
+    def version(self):
+        return f"append-{self.digest}-{self.rows}"
+
+    # Reuse the columnar store when it matches the file; otherwise parse the whole file
+    def _load(self):
+        state = self._read_state()
+        size = os.path.getsize(self.path)
+        if state and state["offset"] <= size and state["parts"] and state.get("period_days") == METER_PERIOD_DAYS \
+                and "head_bytes" in state and _head_hash(self.path, state["head_bytes"]) == state["head_hash"]:
+            try:
+                frame = pd.concat([pd.read_parquet(self._part_path(part)) for part in range(state["parts"])],
+                                  ignore_index=True)
+            except OSError:
+                frame = None
+            if frame is not None:
+                self.offset, self.rows, self.parts = state["offset"], state["rows"], state["parts"]
+                self.head_hash, self.head_bytes, self.header = state["head_hash"], state["head_bytes"], state["header"]
+                self._rebuild(frame)
+                self.refresh(force=True)
+                return
+        with span("append_ingest/load"):
+            for name in os.listdir(self.store_dir) if os.path.isdir(self.store_dir) else ():
+                os.remove(os.path.join(self.store_dir, name))
+            self.parts = 0
+            self.head_bytes = min(HEAD_BYTES, size)
+            self.head_hash = _head_hash(self.path, self.head_bytes)
+            frame, self.offset = self._parse(0, size)
+            self.rows = len(frame)
+            self._write_part(frame)
+            self._write_state()
+            self._rebuild(frame)
+
+    # Ingest rows appended since the last refresh; returns how many were added. Checks
+    # the file at most once per poll interval unless `force` is set.
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.poll_seconds:
+            return 0
+        with self._lock:
+            self._checked_at = now
+            size = os.path.getsize(self.path)
+            if size == self.offset:
+                return 0
+            if size < self.offset or _head_hash(self.path, self.head_bytes) != self.head_hash:
+                increment("jade_append_reloads_total")
+                self._load()
+                return self.rows
+            with span("append_ingest/refresh"):
+                new_rows, offset = self._parse(self.offset, size)
+                if len(new_rows) == 0:
+                    return 0
+                self._write_part(new_rows)
+                self.offset = offset
+                self.rows += len(new_rows)
+                self._write_state()
+
+                self._columns.append(new_rows)
+                data = self._columns.frame()
+                data.attrs["version"] = self.version
+                self.aggregate_index = merge_aggregate_index(self.aggregate_index, new_rows, self.version)
+                self.percentile_index.add(new_rows)
+                for column, accumulator in self._histograms.items():
+                    accumulator.add(new_rows[column])
+                self.data = data
+            increment("jade_append_rows_total", amount=len(new_rows))
+            return len(new_rows)
+
+    # Histogram of a column in the layout of chart_data.histogram, kept up to date on refresh
+    def histogram(self, column):
+        with self._lock:
+            accumulator = self._histograms.get(column)
+            if accumulator is None:
+                accumulator = self._histograms[column] = HistogramAccumulator(self.data[column])
+            return accumulator.frame()
+
+
+# Copy `rows` existing data rows to the end of the file with new household IDs
+def append_sample_rows(path, rows, seed=0):
+    sample = pd.read_csv(path, nrows=1000)
+    id_column = sample.columns[0]
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        last_id = int(f.read().strip().split(b"\n")[-1].split(b",")[0])
+    new_rows = sample.sample(rows, replace=True, random_state=seed)
+    new_rows[id_column] = np.arange(last_id + 1, last_id + 1 + rows)
+    new_rows.to_csv(path, mode="a", header=False, index=False)
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Time incremental refreshes against full reloads")
+    parser.add_argument("--source", default="household_water_usage.csv")
+    parser.add_argument("--base-rows", type=int, default=1_000_000, help="rows in the working copy before appending")
+    parser.add_argument("--append-rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="jade_append_")
+    try:
+        path = os.path.join(work_dir, "usage.csv")
+        shutil.copy(args.source, path)
+        base_rows = len(pd.read_csv(path, usecols=[0]))
+        if args.base_rows > base_rows:
+            append_sample_rows(path, args.base_rows - base_rows)
+
+        start = time.perf_counter()
+        ingestor = AppendIngestor(path, store_dir=os.path.join(work_dir, "store"), poll_seconds=0)
+        print(f"initial load: {ingestor.rows:,} rows in {time.perf_counter() - start:.2f}s")
+        for round_number in range(args.rounds):
+            append_sample_rows(path, args.append_rows, seed=round_number + 1)
+            start = time.perf_counter()
+            added = ingestor.refresh()
+            refresh_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            full = pd.read_csv(path, dtype={c: t for c, t in METER_SCHEMA.items() if c in ingestor.header})
+            build_aggregate_index(full)
+            PercentileIndex(full, total_column(full))
+            reload_seconds = time.perf_counter() - start
+            print(f"+{added:,} rows -> {ingestor.rows:,}: incremental {1000 * refresh_seconds:.0f} ms, "
+                  f"full reload {1000 * reload_seconds:.0f} ms")
+    finally:
+        shutil.rmtree(work_dir)
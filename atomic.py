@@ -0,0 +1,17 @@
+import contextlib
+import os
+import uuid
+
+
+# Write a file atomically: yields a temporary path next to `path` for the caller to
+# write, then renames it over `path`, so concurrent readers see either the old file or
+# the complete new one. The temporary file is removed if writing fails.
+@contextlib.contextmanager
+def atomic_write(path):
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,203 @@
+# Headless per-household reports: fixture usage against peers, the usage percentile,
+# the biggest saving opportunity and a tip, for every household in a dataset.
+#
+#   python batch_report.py --source synthetic --households 1000000 --workers 8 --out reports/
+#   python batch_report.py --source household_water_usage.csv --out reports/ --resume
+#
+# The households are split into chunks that a process pool turns into Parquet parts
+# (reports/households/part-00000.parquet, ...; read them back with
+# pd.read_parquet("reports/households")). Parts are written atomically, so an interrupted
+# run continues where it stopped with --resume. Households only reference a Tip_Key;
+# the tips themselves go to reports/tips.parquet with one row per distinct prompt,
+# so LLM cost grows with the number of distinct (fixture, usage bucket) pairs rather
+# than with the number of households.
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from anomalies import peer_group_means, peer_groups, total_column
+from atomic import atomic_write
+from insights import GROUP_COLUMNS, dataset_version, fixture_columns, household_id_column
+from parallel import ordered_pool_map
+from savings_sim import DEFAULT_RATES, compute_bills
+from tip_cache import tip_key
+
+DEFAULT_CHUNK_SIZE = 100_000
+MANIFEST = "_manifest.json"
+PARTS_DIR = "households"
+TIPS_FILE = "tips.parquet"
+
+
+def _part_path(out_dir, chunk):
+    return os.path.join(out_dir, PARTS_DIR, f"part-{chunk:05d}.parquet")
+
+
+# Percentage of peers (same Zip_Code x Household_Size) using less than each household,
+# matching PercentileIndex.percentile; `groups` are the ids from peer_groups
+def peer_percentiles(data, groups):
+    total = total_column(data)
+    values = data[total] if total else data[list(fixture_columns(data).values())].sum(axis=1)
+    grouped = pd.Series(values.to_numpy(dtype=np.float64)).groupby(groups)
+    below = grouped.rank(method="min").to_numpy() - 1
+    return 100.0 * below / grouped.transform("size").to_numpy()
+
+
+# Report rows for one chunk of households; `group_means` is the population's
+# (peer groups x fixtures) mean table, indexed by the chunk's Peer_Group column
+def report_chunk(chunk, group_means, model, rates=DEFAULT_RATES):
+    columns = fixture_columns(chunk)
+    names = list(columns)
+    group_columns = [column for column in GROUP_COLUMNS if column in chunk.columns]
+
+    usage = chunk[list(columns.values())].to_numpy(dtype=np.float64)
+    peer_means = group_means[chunk["Peer_Group"].to_numpy()]
+    excess = usage - peer_means
+
+    report = pd.DataFrame({"Household": chunk[household_id_column(chunk)].to_numpy()})
+    for column in group_columns:
+        report[column] = chunk[column].to_numpy()
+    for i, name in enumerate(names):
+        prefix = name.replace(" ", "_")
+        report[f"{prefix}_Gallons"] = usage[:, i]
+        report[f"{prefix}_Peer_Mean"] = peer_means[:, i]
+    report["Peer_Percentile"] = chunk["Peer_Percentile"].to_numpy()
+
+    # Biggest saving opportunity: the fixture furthest above the peer mean
+    top = np.argmax(excess, axis=1)
+    saved = np.maximum(excess[np.arange(len(chunk)), top], 0)
+    total = total_column(chunk)
+    daily = chunk[total].to_numpy(dtype=np.float64) if total else usage.sum(axis=1)
+    billing_days = rates.get("billing_days", 30)
+    report["Top_Fixture"] = np.asarray(names, dtype=object)[top]
+    report["Gallons_Saved_Per_Day"] = saved
+    report["Bill_Savings"] = (compute_bills(daily * billing_days, rates)
+                              - compute_bills(np.maximum(daily - saved, 0) * billing_days, rates))
+
+    top_usage = usage[np.arange(len(chunk)), top]
+    report["Tip_Key"] = [tip_key(model, fixture, value) for fixture, value in zip(report["Top_Fixture"], top_usage)]
+    return report
+
+
+# Worker entry point: build and atomically write one part; returns (chunk, rows, tip prompts)
+def write_report_part(out_dir, chunk_number, chunk, group_means, model):
+    report = report_chunk(chunk, group_means, model)
+    with atomic_write(_part_path(out_dir, chunk_number)) as tmp_path:
+        report.to_parquet(tmp_path, index=False)
+    return chunk_number, len(report), _prompts(report)
+
+
+# Distinct (tip key, fixture, usage bucket) triples; the bucket is the last field of the key
+def _prompts(report):
+    pairs = report[["Tip_Key", "Top_Fixture"]].drop_duplicates()
+    return {(key, fixture, int(key.rsplit("|", 1)[1])) for key, fixture in pairs.itertuples(index=False)}
+
+
+# Resolve every distinct tip prompt once, following JADE_TIP_MODE: from the local tip
+# engine, or through the shared tip cache and the LLM, with a static recommendation
+# when neither has an answer
+def resolve_tips(prompts, model, llm_workers=4):
+    from jade_core import get_tip
+    from tip_cache import TipCache
+
+    prompts = sorted(prompts)
+    tip_cache = TipCache()
+
+    def resolve(prompt):
+        _, fixture, bucket = prompt
+        return get_tip(fixture, bucket, tip_cache, model=model)
+
+    with ThreadPoolExecutor(max_workers=llm_workers) as pool:
+        resolved = list(pool.map(resolve, prompts))
+    return pd.DataFrame({
+        "Tip_Key": [key for key, _, _ in prompts],
+        "Fixture": [fixture for _, fixture, _ in prompts],
+        "Usage_Bucket": [bucket for _, _, bucket in prompts],
+        "Tip": [tip for tip, _ in resolved],
+        "Source": [source for _, source in resolved],
+    })
+
+
+# Write the given chunks, in a process pool when workers > 1
+def _write_parts(data, out_dir, chunk_numbers, chunk_size, group_means, model, workers):
+    arguments = ((out_dir, n, data.iloc[n * chunk_size:(n + 1) * chunk_size], group_means, model)
+                 for n in chunk_numbers)
+    return ordered_pool_map(write_report_part, arguments, workers)
+
+
+def _progress(done, total, rows, start, skipped):
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed else 0.0
+    eta = elapsed / (done - skipped) * (total - done)
+    print(f"[{done}/{total}] {rows:,} households, {rate:,.0f}/s, ETA {eta:.0f}s", file=sys.stderr, flush=True)
+
+
+def run_batch(data, out_dir, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, resume=False, model=None, llm_workers=4):
+    from jade_core import OPENAI_MODEL
+
+    model = model or OPENAI_MODEL
+    os.makedirs(os.path.join(out_dir, PARTS_DIR), exist_ok=True)
+    manifest = {"version": dataset_version(data), "households": len(data), "chunk_size": chunk_size, "model": model}
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous = None
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    if previous != manifest:
+        # Parts from another dataset, chunking or model cannot be reused
+        for path in glob.glob(os.path.join(out_dir, PARTS_DIR, "part-*.parquet")) + glob.glob(os.path.join(out_dir, TIPS_FILE)):
+            os.remove(path)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+
+    groups = peer_groups(data)
+    data = data.assign(Peer_Group=groups, Peer_Percentile=peer_percentiles(data, groups))
+    group_means = peer_group_means(data[list(fixture_columns(data).values())].to_numpy(dtype=np.float64), groups)
+    num_chunks = max(1, -(-len(data) // chunk_size))
+    prompts = set()
+    todo = []
+    for chunk_number in range(num_chunks):
+        path = _part_path(out_dir, chunk_number)
+        if os.path.exists(path):
+            prompts |= _prompts(pd.read_parquet(path, columns=["Tip_Key", "Top_Fixture"]))
+        else:
+            todo.append(chunk_number)
+    skipped = num_chunks - len(todo)
+    if skipped:
+        print(f"Resuming: {skipped} of {num_chunks} chunks already written", file=sys.stderr)
+
+    start, rows, done = time.perf_counter(), 0, skipped
+    for _, count, chunk_prompts in _write_parts(data, out_dir, todo, chunk_size, group_means, model, workers):
+        prompts |= chunk_prompts
+        rows, done = rows + count, done + 1
+        _progress(done, num_chunks, rows, start, skipped)
+
+    tips = resolve_tips(prompts, model, llm_workers)
+    tips.to_parquet(os.path.join(out_dir, TIPS_FILE), index=False)
+    print(f"Wrote {len(data):,} household reports and {len(tips):,} distinct tips to {out_dir} "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return tips
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute per-household insights and tips without the UI")
+    parser.add_argument("--source", default="synthetic", help='"synthetic", a meter CSV or a Parquet file')
+    parser.add_argument("--households", type=int, default=100, help="household count for synthetic data")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--llm-workers", type=int, default=4, help="concurrent LLM requests for tips")
+    parser.add_argument("--model", help="defaults to OPENAI_MODEL")
+    parser.add_argument("--resume", action="store_true", help="keep parts written by an earlier run")
+    args = parser.parse_args()
+
+    from data_sources import load_household_data
+
+    households = load_household_data(args.source, args.households, args.workers)
+    run_batch(households, args.out, args.chunk_size, args.workers, args.resume, args.model, args.llm_workers)
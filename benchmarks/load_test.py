@@ -0,0 +1,139 @@
+# Load test for api_service.py against a local fake LLM.
+#
+#   python benchmarks/load_test.py [--requests 5000] [--concurrency 64] [--llm-latency 0.5] [--processes 1]
+#
+# Starts the fake LLM and the API service in a subprocess, then fires requests at each
+# endpoint with a fixed number of concurrent clients and reports throughput and
+# p50/p99 latency per endpoint. Tip requests use a new usage bucket every few calls,
+# so a share of them misses the cache and goes to the fake LLM.
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def _wait_ready(base_url, timeout=120):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/v1/fixtures") as response:
+                    if response.status == 200:
+                        return (await response.json())["fixtures"]
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("API service did not start")
+
+
+# Send `total` requests built by `make_request(i)` with `concurrency` clients
+async def load(session, make_request, total, concurrency):
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for i in counter:
+            method, url, body = make_request(i)
+            start = time.perf_counter()
+            async with session.request(method, url, json=body) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed,
+        "p50_ms": 1000 * _percentile(latencies, 0.50),
+        "p99_ms": 1000 * _percentile(latencies, 0.99),
+    }
+
+
+async def run_load_test(base_url, requests, concurrency):
+    fixtures = await _wait_ready(base_url)
+    fixture = fixtures[0]
+    cases = {
+        "insights": lambda i: ("GET", f"{base_url}/v1/insights?fixture={fixture}&zip_code=90001&household_size={1 + i % 4}", None),
+        "savings": lambda i: ("GET", f"{base_url}/v1/savings?usage={50 + i % 150}&zip_code=90002", None),
+        "regions": lambda i: ("GET", f"{base_url}/v1/regions?fixture={fixture}", None),
+        "simulate": lambda i: ("POST", f"{base_url}/v1/savings/simulate", {"scenario": {fixture: -0.05 * (i % 8)}}),
+        # A new usage bucket every 10 requests: roughly one in ten tips goes to the LLM
+        "tips": lambda i: ("GET", f"{base_url}/v1/tips?activity={fixture}&usage={5 * (i // 10)}", None),
+    }
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    results = {}
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for name, make_request in cases.items():
+            total = requests if name not in ("simulate", "tips") else max(requests // 10, concurrency)
+            results[name] = await load(session, make_request, total, concurrency)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Jade JSON API")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per cheap endpoint")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM response delay in seconds")
+    parser.add_argument("--processes", type=int, default=1, help="API server processes")
+    parser.add_argument("--households", type=int, default=100_000)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from fake_llm_server import start_fake_llm_server
+
+    llm = start_fake_llm_server(delay=args.llm_latency, token_delay=0)
+    port = _free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_BASE": f"http://127.0.0.1:{llm.server_port}/v1",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "load-test"),
+        "JADE_CACHE_DIR": tempfile.mkdtemp(prefix="jade-load-"),
+        "JADE_SYNTHETIC_HOUSEHOLDS": str(args.households),
+        "JADE_SHARED_DATASET": "1" if args.processes > 1 else os.environ.get("JADE_SHARED_DATASET", "0"),
+    }
+    if args.processes > 1:
+        # Publish the snapshot once up front so the server processes don't race to create it
+        subprocess.run([sys.executable, "-c", "import jade_core; jade_core.shared_snapshot_version()"],
+                       cwd=ROOT, env=env, check=True)
+    server = subprocess.Popen([sys.executable, "api_service.py", "--port", str(port), "--processes", str(args.processes)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+    try:
+        results = asyncio.run(run_load_test(f"http://127.0.0.1:{port}", args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+        llm.shutdown()
+
+    print(f"{'endpoint':<12} {'requests':>9} {'errors':>7} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, result in results.items():
+        print(f"{name:<12} {result['requests']:>9} {result['errors']:>7} {result['rps']:>10,.0f} "
+              f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
@@ -0,0 +1,257 @@
+# Offline benchmark suite.
+#
+#   python benchmarks/run.py run --out results.json [--sizes 100 10000 1000000 10000000] [--llm-latency 0.5]
+#   python benchmarks/run.py compare baseline.json results.json [--threshold 0.2]
+#
+# Covers core module import time, synthetic data generation, aggregate index builds and
+# insight lookups, the tip path against a local stub LLM with configurable latency, full
+# script reruns and per-tab fragment reruns through Streamlit's AppTest, plus the cost of
+# the always-on telemetry spans. `run` exits non-zero when telemetry takes more than
+# TELEMETRY_BUDGET of a rerun (the results are still written); `compare` exits non-zero
+# when any case got slower than the baseline by more than the threshold.
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "finalAI.py")
+DEFAULT_SIZES = [100, 10_000, 1_000_000]
+TELEMETRY_BUDGET = 0.01
+
+
+# Time `fn` `repeat` times; returns summary statistics in milliseconds
+def measure(fn, repeat=5, warmup=0):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "min_ms": timings[0],
+        "median_ms": timings[len(timings) // 2],
+        "mean_ms": sum(timings) / len(timings),
+        "repeat": repeat,
+    }
+
+
+def bench_generation(sizes):
+    from synthetic import generate_households
+
+    results = {}
+    for size in sizes:
+        repeat = 5 if size <= 100_000 else 1
+        results[f"generate/{size}"] = measure(lambda: generate_households(size), repeat)
+    return results
+
+
+def bench_insights(sizes):
+    from insights import build_aggregate_index, lookup_insight
+    from synthetic import generate_households
+
+    results = {}
+    for size in sizes:
+        data = generate_households(size)
+        repeat = 5 if size <= 100_000 else 1
+        results[f"insights/build/{size}"] = measure(lambda: build_aggregate_index(data), repeat)
+        index = build_aggregate_index(data)
+        lookups = 10_000
+        lookup = measure(lambda: [lookup_insight(index, "Shower", "mean", "90001", 3) for _ in range(lookups)], 5)
+        results[f"insights/lookup/{size}"] = {key: value / lookups if key.endswith("_ms") else value for key, value in lookup.items()}
+    return results
+
+
+def bench_tips():
+    from jade_core import get_local_tip, get_openai_tip
+    from tip_cache import TipCache
+
+    tip_cache = TipCache(tempfile.mkdtemp())
+    usage = iter(range(1_000_000))
+    return {
+        # Every call lands in a new usage bucket, so each one goes to the stub LLM
+        "tips/miss": measure(lambda: get_openai_tip("Shower", next(usage) * 10, tip_cache), 5),
+        "tips/hit": measure(lambda: get_openai_tip("Shower", 25, tip_cache), 50, warmup=1),
+        # Offline tip engine (JADE_TIP_MODE=local); per-call time over 10,000 lookups
+        "tips/local": {key: value / 10_000 if key.endswith("_ms") else value
+                       for key, value in measure(lambda: [get_local_tip("Shower", 40, 25, 4, mode="local")
+                                                          for _ in range(10_000)], 5, warmup=1).items()},
+    }
+
+
+def _widget(elements, label):
+    return next(element for element in elements if element.label.startswith(label))
+
+
+# Time spent in span `span_name` during each of `repeat` calls to `interact`
+def measure_span(interact, span_name, repeat):
+    import telemetry
+
+    timings = []
+    for _ in range(repeat):
+        telemetry.reset()
+        interact()
+        row = next(row for row in telemetry.span_summary() if row["Span"] == span_name)
+        timings.append(row["Mean_ms"] * row["Count"])
+    timings.sort()
+    return {"min_ms": timings[0], "median_ms": timings[len(timings) // 2],
+            "mean_ms": sum(timings) / len(timings), "repeat": repeat}
+
+
+# Reruns after interacting with each tab. app/<tab> is a full script rerun (what every
+# interaction cost before the tabs became fragments); app/fragment/<tab> is the time in
+# that tab's body, which is what a fragment rerun re-executes. AppTest always reruns the
+# whole script, so the fragment time is read from the tab's telemetry span and leaves
+# out Streamlit's fixed per-run overhead.
+def bench_app(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP, default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    results = {"app/first_render": {"min_ms": (time.perf_counter() - start) * 1000, "repeat": 1}}
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    def next_chart_fixture():
+        selectbox = _widget(app.selectbox, "Select a fixture to chart")
+        return selectbox.select_index((selectbox.index + 1) % len(selectbox.options)).run()
+
+    interactions = {
+        "app/rerun": lambda: app.run(),
+        "app/real_time_feedback": lambda: _widget(app.button, "Get Data").click().run(),
+        "app/recommendations": lambda: _widget(app.button, "Show Recommendations").click().run(),
+        "app/savings_calculator": lambda: _widget(app.number_input, "Enter your average daily").increment().run(),
+        "app/regional_insights": next_chart_fixture,
+    }
+    for name, interact in interactions.items():
+        results[name] = measure(interact, repeat)
+        if name != "app/rerun":
+            tab = name.split("/", 1)[1]
+            results[f"app/fragment/{tab}"] = measure_span(interact, f"tab/{tab}", repeat)
+    return results
+
+
+# Telemetry cost per rerun: span overhead times the spans one rerun records, relative
+# to the rerun time measured by bench_app. Must stay below TELEMETRY_BUDGET; the result
+# records whether it did.
+def bench_telemetry(rerun_ms):
+    import telemetry
+
+    spans = 100_000
+    def record_spans():
+        for _ in range(spans):
+            with telemetry.span("bench"):
+                pass
+    per_span_ms = measure(record_spans, 5)["min_ms"] / spans
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP, default_timeout=300)
+    app.run()
+    telemetry.reset()
+    app.run()
+    spans_per_rerun = sum(row["Count"] for row in telemetry.span_summary())
+    overhead = per_span_ms * spans_per_rerun / rerun_ms
+    return {
+        "telemetry/span": {"min_ms": per_span_ms, "repeat": spans},
+        "telemetry/rerun_overhead": {"min_ms": per_span_ms * spans_per_rerun, "repeat": 1,
+                                     "spans_per_rerun": spans_per_rerun, "overhead_pct": 100 * overhead,
+                                     "over_budget": overhead > TELEMETRY_BUDGET},
+    }
+
+
+def bench_imports():
+    from startup import import_report
+
+    return {"import/jade_core": {"min_ms": import_report("import jade_core")["total_ms"], "repeat": 1}}
+
+
+def run(sizes, llm_latency, app_repeat):
+    from fake_llm_server import start_fake_llm_server
+
+    # Every LLM call in the run (direct and from the app) goes to a local stub
+    server = start_fake_llm_server(delay=llm_latency, token_delay=0)
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_port}/v1"
+    results = {}
+    try:
+        results.update(bench_imports())
+        results.update(bench_generation(sizes))
+        results.update(bench_insights([size for size in sizes if size <= 1_000_000]))
+        results.update(bench_tips())
+        results.update(bench_app(app_repeat))
+        results.update(bench_telemetry(results["app/rerun"]["min_ms"]))
+    finally:
+        server.shutdown()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "llm_latency_s": llm_latency,
+        },
+        "results": results,
+    }
+
+
+# Cases whose time grew by more than `threshold` (0.2 = 20%) relative to the baseline
+def compare(baseline, current, threshold=0.2, metric="min_ms"):
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or metric not in base or metric not in result:
+            continue
+        change = (result[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+        rows.append({"case": name, "baseline": base[metric], "current": result[metric],
+                     "change": change, "regression": change > threshold})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jade benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                            help="household counts for generation (up to 10000000)")
+    run_parser.add_argument("--llm-latency", type=float, default=0.2, help="stub LLM response delay in seconds")
+    run_parser.add_argument("--app-repeat", type=int, default=5)
+    run_parser.add_argument("--out", default="bench_results.json")
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.add_argument("--metric", default="min_ms")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        # Keep the tip cache and snapshots of benchmark runs away from the app's own cache
+        os.environ.setdefault("JADE_CACHE_DIR", tempfile.mkdtemp(prefix="jade-bench-"))
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        sys.path.insert(0, ROOT)
+        os.chdir(ROOT)
+        results = run(args.sizes, args.llm_latency, args.app_repeat)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        for name, result in results["results"].items():
+            print(f"{name:<40} {result['min_ms']:>12.3f} ms")
+        telemetry = results["results"].get("telemetry/rerun_overhead")
+        if telemetry and telemetry["over_budget"]:
+            print(f"FAIL: telemetry overhead {telemetry['overhead_pct']:.3f}% exceeds "
+                  f"{TELEMETRY_BUDGET:.0%} of a rerun", file=sys.stderr)
+            sys.exit(1)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold, args.metric)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<40} {row['baseline']:>12.3f} {row['current']:>12.3f} {row['change']:>+8.1%} {flag}")
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
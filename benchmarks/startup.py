@@ -0,0 +1,86 @@
+# Cold-start and per-rerun cost of the Streamlit app.
+#
+#   python benchmarks/startup.py [--reruns 20] [--out startup.json]
+#
+# Reports `python -X importtime` totals for the core module and the app's imports,
+# the heaviest modules, the time to the first full render in a fresh process, and
+# the mean time of later reruns (which should only pay for the script body).
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "finalAI.py")
+
+
+# Parse `python -X importtime` output into (module, cumulative microseconds, is top level)
+def import_times(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        if cumulative.strip().isdigit():
+            # Nested imports are indented below the module that triggered them
+            times.append((name.strip(), int(cumulative), not name[1:].startswith(" ")))
+    return times
+
+
+def import_report(statement, top=10):
+    times = import_times(statement)
+    total = sum(us for _, us, top_level in times if top_level)
+    heaviest = sorted(times, key=lambda item: item[1], reverse=True)[:top]
+    return {"total_ms": total / 1000, "heaviest_ms": {name: us / 1000 for name, us, _ in heaviest}}
+
+
+# First render in this (fresh) process, then the mean of later reruns
+def render_times(reruns):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP, default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    first_render = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    return {
+        "first_render_ms": first_render * 1000,
+        "rerun_mean_ms": 1000 * sum(timings) / len(timings),
+        "rerun_min_ms": 1000 * min(timings),
+    }
+
+
+def run(reruns=20):
+    return {
+        "import_core": import_report("import jade_core"),
+        "import_app_modules": import_report("import streamlit, jade_core, chart_data, meter_stream, savings_sim"),
+        "render": render_times(reruns),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure app cold start and rerun overhead")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    results = run(args.reruns)
+    print(json.dumps(results, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,161 @@
+# Server-side chart data: bin, aggregate and downsample before anything is embedded in
+# a Vega-Lite spec, so the payload sent to the browser stays small however many
+# households the dataset has. Specs are cached per dataset version and chart parameters.
+import collections
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from insights import lookup_insight
+
+MAX_CHART_POINTS = int(os.getenv("JADE_MAX_CHART_POINTS", 2000))
+MAX_CACHED_SPECS = 64
+
+
+# Histogram of a value column as one row per bin
+def histogram(values, bins=40):
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=min(bins, MAX_CHART_POINTS))
+    return pd.DataFrame({"Bin_Start": edges[:-1], "Bin_End": edges[1:], "Households": counts})
+
+
+# Fixed-width histogram that grows with appended values, so an update costs O(new values).
+# Values outside the current range add bins of the same width, and adjacent bins are
+# merged in pairs whenever there are more than twice `bins` of them. When new values
+# would need more bins than that (e.g. one corrupt 1e10-gallon reading), the width is
+# doubled as often as needed and the existing counts merged first, so at most about
+# 2 * bins bins are ever allocated.
+class HistogramAccumulator:
+    def __init__(self, values, bins=40):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.bins = min(bins, MAX_CHART_POINTS)
+        low, high = (float(values.min()), float(values.max())) if len(values) else (0.0, 1.0)
+        self.start = low
+        self.width = (high - low) / self.bins if high > low else 1.0
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.add(values)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self._widen(float(values.min()), float(values.max()))
+        positions = np.floor((values - self.start) / self.width).astype(np.int64)
+        # The right edge of the last bin is inclusive, as in np.histogram
+        positions[(positions == len(self.counts)) & (values <= self.start + self.width * len(self.counts))] -= 1
+        below = -min(int(positions.min()), 0)
+        if below:
+            self.counts = np.concatenate([np.zeros(below, dtype=np.int64), self.counts])
+            self.start -= below * self.width
+            positions += below
+        self.counts = np.concatenate([self.counts, np.zeros(max(0, int(positions.max()) + 1 - len(self.counts)), dtype=np.int64)])
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        while len(self.counts) > 2 * self.bins:
+            if len(self.counts) % 2:
+                self.counts = np.append(self.counts, 0)
+            self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+            self.width *= 2
+
+    # Double the width until [low, high] and the current bins fit in 2 * bins bins, padding
+    # below by a multiple of the doubling factor so old bins merge whole into new ones
+    def _widen(self, low, high):
+        first = math.floor((low - self.start) / self.width)
+        last = max(math.floor((high - self.start) / self.width), len(self.counts) - 1)
+        factor, pad = 1, max(0, -first)
+        while (last + pad) // factor >= 2 * self.bins:
+            factor *= 2
+            pad = -(-max(0, -first) // factor) * factor
+        if factor == 1:
+            return
+        counts = np.zeros((len(self.counts) - 1 + pad) // factor + 1, dtype=np.int64)
+        # Python ints: for extreme outliers the factor doesn't fit in an int64
+        np.add.at(counts, [(i + pad) // factor for i in range(len(self.counts))], self.counts)
+        self.counts = counts
+        self.start -= pad * self.width
+        self.width *= factor
+
+    # Same layout as histogram()
+    def frame(self):
+        edges = self.start + self.width * np.arange(len(self.counts) + 1)
+        return pd.DataFrame({"Bin_Start": edges[:-1], "Bin_End": edges[1:], "Households": self.counts})
+
+
+# Per-zip summary of one fixture, read straight from the aggregate index
+def zip_rollup(index, fixture):
+    rows = []
+    for (zip_code,) in sorted(index["groups"].get(("Zip_Code",), {})):
+        rows.append({
+            "Zip_Code": str(zip_code),
+            "Mean": lookup_insight(index, fixture, "mean", zip_code=zip_code),
+            "P25": lookup_insight(index, fixture, "p25", zip_code=zip_code),
+            "P75": lookup_insight(index, fixture, "p75", zip_code=zip_code),
+            "Households": lookup_insight(index, fixture, "count", zip_code=zip_code),
+        })
+    return pd.DataFrame(rows[:MAX_CHART_POINTS])
+
+
+# Largest-Triangle-Three-Buckets downsampling of a time series to `threshold` points
+def lttb(x, y, threshold=MAX_CHART_POINTS):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean() if next_end > end else x[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+# Cap a time series DataFrame at MAX_CHART_POINTS rows using LTTB
+def downsample_series(frame, x_column, y_column, max_points=MAX_CHART_POINTS):
+    if len(frame) <= max_points:
+        return frame
+    x = frame[x_column]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype("int64")
+    return frame.iloc[lttb(x, frame[y_column], max_points)]
+
+
+# Chart specs cached per (dataset version, chart name, parameters)
+# Shared across sessions, so the LRU is only touched under a lock; charts build outside it
+class ChartSpecCache:
+    def __init__(self, max_entries=MAX_CACHED_SPECS):
+        self.max_entries = max_entries
+        self._specs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    # Returns (spec, payload_bytes); `build` returns an Altair chart and only runs on a miss
+    def get(self, version, name, params, build):
+        key = (version, name, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            if key in self._specs:
+                self._specs.move_to_end(key)
+                return self._specs[key]
+        spec = build().to_dict()
+        entry = (spec, len(json.dumps(spec)))
+        with self._lock:
+            self._specs[key] = entry
+            if len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return entry
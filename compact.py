@@ -0,0 +1,157 @@
+# Compact in-memory representation of household data, and a memory budget report.
+#
+# compact_dtypes() stores zip codes as a categorical, household sizes as uint8, IDs as
+# the smallest unsigned integer that fits, whole-gallon usage as the smallest signed
+# integer that fits (int16 for the synthetic data) and fractional usage as float32.
+# derive_redundant() goes further for storage: fixture columns that are a fixed share
+# of the total (as in household_water_usage.csv) and a total that is the sum of the
+# fixtures are dropped and recorded in data.attrs["derived"], and materialize()
+# recomputes them on demand.
+#
+#   python compact.py report --households 10000000 --source household_water_usage.csv
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from anomalies import total_column
+from insights import fixture_columns
+
+CATEGORICAL_COLUMNS = ["Zip_Code"]
+SMALL_COUNT_COLUMNS = ["Household_Size"]
+ID_COLUMNS = ["Household_ID", "Household"]
+GALLON_INT_KINDS = [np.int16, np.int32, np.int64]
+# Relative error allowed when checking that a column is a fixed ratio or a sum
+DERIVED_TOLERANCE = 1e-5
+
+
+# Smallest of `kinds` holding every value; the first kind is also the floor, so small
+# datasets don't get dtypes that overflow as soon as rows are added
+def _smallest_int(values, kinds):
+    if len(values) == 0:
+        return kinds[0]
+    low, high = values.min(), values.max()
+    return next((kind for kind in kinds if np.iinfo(kind).min <= low and high <= np.iinfo(kind).max), np.int64)
+
+
+def _compact_column(name, series, categories):
+    if name in CATEGORICAL_COLUMNS:
+        return series.astype(pd.CategoricalDtype(categories or sorted(series.dropna().unique())))
+    if not pd.api.types.is_numeric_dtype(series.dtype) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    values = series.to_numpy()
+    if pd.api.types.is_float_dtype(series.dtype):
+        finite = values[np.isfinite(values)]
+        # Whole-gallon floats (e.g. from a CSV) become integers; others float32
+        if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+            return series.astype(_smallest_int(finite, GALLON_INT_KINDS))
+        return series.astype(np.float32)
+    if len(values) == 0 or values.min() >= 0:
+        if name in ID_COLUMNS:
+            return series.astype(_smallest_int(values, [np.uint32, np.uint64]))
+        if name in SMALL_COUNT_COLUMNS:
+            return series.astype(_smallest_int(values, [np.uint8, np.uint16, np.uint32]))
+    return series.astype(_smallest_int(values, GALLON_INT_KINDS))
+
+
+# Same data in compact dtypes. `categories` optionally fixes the categories per column,
+# so separately compacted chunks concatenate without falling back to object.
+def compact_dtypes(data, categories=None):
+    categories = categories or {}
+    compact = pd.DataFrame({name: _compact_column(name, data[name], categories.get(name))
+                            for name in data.columns}, copy=False)
+    compact.attrs = dict(data.attrs)
+    return compact
+
+
+# Drop columns that can be recomputed: fixtures that are a fixed share of the total, or
+# else a total that is the sum of the fixtures. The recipe goes in attrs["derived"].
+def derive_redundant(data, tolerance=DERIVED_TOLERANCE):
+    total = total_column(data)
+    if total is None or len(data) == 0:
+        return data
+    totals = data[total].to_numpy(dtype=np.float64)
+    derived = {}
+    for column in fixture_columns(data).values():
+        values = data[column].to_numpy(dtype=np.float64)
+        ratios = values[totals != 0] / totals[totals != 0]
+        if len(ratios) and np.ptp(ratios) <= tolerance * max(abs(ratios.mean()), 1e-12):
+            derived[column] = {"ratio_of": total, "ratio": float(ratios.mean()), "dtype": str(data[column].dtype)}
+    if not derived:
+        columns = list(fixture_columns(data).values())
+        summed = data[columns].to_numpy(dtype=np.float64).sum(axis=1)
+        if np.allclose(summed, totals, rtol=tolerance, atol=0):
+            derived[total] = {"sum_of": columns, "dtype": str(data[total].dtype)}
+    stored = data.drop(columns=list(derived))
+    stored.attrs = dict(data.attrs, derived=derived, column_order=list(data.columns))
+    return stored
+
+
+# Recompute the columns dropped by derive_redundant (in their original order)
+def materialize(data):
+    derived = data.attrs.get("derived")
+    if not derived:
+        return data
+    columns = {name: data[name] for name in data.columns}
+    for name, recipe in derived.items():
+        if "ratio_of" in recipe:
+            values = data[recipe["ratio_of"]].to_numpy(dtype=np.float64) * recipe["ratio"]
+        else:
+            values = data[recipe["sum_of"]].to_numpy(dtype=np.float64).sum(axis=1)
+        if np.issubdtype(np.dtype(recipe["dtype"]), np.integer):
+            values = np.round(values)
+        columns[name] = pd.Series(values.astype(recipe["dtype"]), index=data.index)
+    full = pd.DataFrame({name: columns[name] for name in data.attrs["column_order"]}, copy=False)
+    full.attrs = {key: value for key, value in data.attrs.items() if key not in ("derived", "column_order")}
+    return full
+
+
+# Bytes per column, counting Python string objects (the index is excluded)
+def column_bytes(data):
+    return data.memory_usage(deep=True, index=False)
+
+
+# Bytes per household and column: as loaded, compacted, and compacted without the
+# derivable columns. Frames are measured one chunk at a time and summed.
+def memory_report(chunks, categories=None):
+    before = compact = derived = None
+    households = 0
+    for chunk in chunks:
+        households += len(chunk)
+        small = compact_dtypes(chunk, categories)
+        stored = column_bytes(derive_redundant(small))
+        sizes = (column_bytes(chunk), column_bytes(small), stored.reindex(chunk.columns, fill_value=0))
+        before, compact, derived = sizes if before is None else (before + sizes[0], compact + sizes[1], derived + sizes[2])
+    report = pd.DataFrame({"Loaded": before, "Compact": compact, "Compact_Derived": derived}) / max(households, 1)
+    report.loc["Total"] = report.sum()
+    report["Reduction"] = report["Loaded"] / report["Compact_Derived"].replace(0, np.nan)
+    report.attrs["households"] = households
+    return report
+
+
+def _print_report(title, report):
+    total = report.loc["Total"]
+    print(f"{title}: {report.attrs['households']:,} households")
+    print(report.round(2).to_string())
+    print(f"{total['Loaded']:.1f} -> {total['Compact']:.1f} B/household compact "
+          f"({total['Loaded'] / total['Compact']:.1f}x), {total['Compact_Derived']:.1f} B/household "
+          f"with derived columns ({total['Loaded'] / total['Compact_Derived']:.1f}x); "
+          f"{report.attrs['households'] * total['Loaded'] / 1e9:.2f} GB -> "
+          f"{report.attrs['households'] * total['Compact_Derived'] / 1e9:.2f} GB\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Household memory budget report")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="bytes per household before and after compaction")
+    report_parser.add_argument("--households", type=int, default=10_000_000, help="synthetic households")
+    report_parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    report_parser.add_argument("--source", help="also report a meter CSV, parsed as pandas does by default")
+    args = parser.parse_args()
+
+    from synthetic import ZIP_CODES, iter_household_chunks
+
+    _print_report("Synthetic", memory_report(iter_household_chunks(args.households, args.chunk_size),
+                                             {"Zip_Code": ZIP_CODES}))
+    if args.source:
+        _print_report(args.source, memory_report(pd.read_csv(args.source, chunksize=args.chunk_size)))
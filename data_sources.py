@@ -0,0 +1,107 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from atomic import atomic_write
+from tip_cache import CACHE_DIR
+
+# Explicit schema for meter exports shaped like household_water_usage.csv
+METER_SCHEMA = {
+    "Household": "int64",
+    "Total Usage (gallons)": "float32",
+    "Toilet (gallons)": "float32",
+    "Shower (gallons)": "float32",
+    "Faucets (gallons)": "float32",
+    "Clothes Washer (gallons)": "float32",
+    "Leaks (gallons)": "float32",
+    "Other (gallons)": "float32",
+}
+GALLON_COLUMNS = [column for column in METER_SCHEMA if column.endswith("(gallons)")]
+# Days covered by one meter CSV reading. Readings are divided by it when the CSV is
+# parsed, so every source is in gallons per day like the synthetic data; the bundled
+# export (10-13k gallons per household) holds quarterly readings.
+METER_PERIOD_DAYS = float(os.getenv("JADE_METER_PERIOD_DAYS", 90))
+CSV_CHUNK_ROWS = int(os.getenv("JADE_CSV_CHUNK_ROWS", 1_000_000))
+# Load households in compact dtypes (see compact.py); JADE_COMPACT_DTYPES=0 keeps pandas' defaults
+COMPACT_DTYPES = os.getenv("JADE_COMPACT_DTYPES", "1") != "0"
+COLUMNAR_CACHE_DIR = os.path.join(CACHE_DIR, "columnar")
+
+
+# Identifies one version of a file: path, size and modification time
+def file_signature(path):
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+# Cheap per-rerun check for whether a data source changed ("synthetic" never does)
+def source_signature(source):
+    return source if source == "synthetic" else file_signature(source)
+
+
+# Convert parsed meter readings from gallons per reading period to gallons per day, in place
+def readings_per_day(frame, period_days=METER_PERIOD_DAYS):
+    for column in GALLON_COLUMNS:
+        if column in frame.columns:
+            frame[column] = (frame[column] / period_days).astype(frame[column].dtype)
+    return frame
+
+
+def _columnar_cache_path(signature):
+    digest = hashlib.sha1(signature.encode()).hexdigest()[:16]
+    return os.path.join(COLUMNAR_CACHE_DIR, f"{digest}.parquet"), digest
+
+
+# Parse a meter CSV in chunks and write it to a Parquet cache file in gallons per day,
+# one row group per chunk
+def convert_meter_csv(path, cache_path, chunk_rows=CSV_CHUNK_ROWS, period_days=METER_PERIOD_DAYS):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Concurrent readers never see a half-written cache file
+    with atomic_write(cache_path) as tmp_path:
+        writer = None
+        try:
+            for chunk in pd.read_csv(path, dtype=METER_SCHEMA, usecols=list(METER_SCHEMA), chunksize=chunk_rows):
+                table = pa.Table.from_pandas(readings_per_day(chunk, period_days), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            if writer is None:
+                pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in METER_SCHEMA.items()}).to_parquet(tmp_path)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+# Parquet copy of a meter CSV, converting it to the columnar cache on first use
+def meter_csv_parquet(path, chunk_rows=CSV_CHUNK_ROWS, period_days=METER_PERIOD_DAYS):
+    cache_path, digest = _columnar_cache_path(f"{file_signature(path)}|{period_days:g}")
+    if not os.path.exists(cache_path):
+        convert_meter_csv(path, cache_path, chunk_rows, period_days)
+    return cache_path, digest
+
+
+# Load a meter CSV, converting it to the columnar cache on first use
+def load_meter_csv(path, chunk_rows=CSV_CHUNK_ROWS):
+    cache_path, digest = meter_csv_parquet(path, chunk_rows)
+    data = pd.read_parquet(cache_path)
+    data.attrs["version"] = f"meter-{digest}"
+    return data
+
+
+# Load households from "synthetic", a meter CSV or a Parquet file
+def load_household_data(source="synthetic", num_households=100, workers=1, compact=COMPACT_DTYPES):
+    if source == "synthetic":
+        from synthetic import generate_households
+        return generate_households(num_households, workers=workers, compact=compact)
+    if source.endswith(".csv"):
+        data = load_meter_csv(source)
+    else:
+        data = pd.read_parquet(source)
+        data.attrs["version"] = f"parquet-{_columnar_cache_path(file_signature(source))[1]}"
+    if compact:
+        from compact import compact_dtypes
+        data = compact_dtypes(data)
+    return data
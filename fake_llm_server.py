@@ -0,0 +1,115 @@
+# Local stand-in for the OpenAI chat completions API, for testing the app offline.
+#
+#   python fake_llm_server.py --port 8765 --delay 10          # slow upstream
+#   python fake_llm_server.py --port 8765 --fail-rate 1.0     # failing upstream
+#   python fake_llm_server.py --port 8765 --fail-rate 0.3 --fail-status 429 --retry-after 1   # rate limited
+#   OPENAI_API_BASE=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test streamlit run finalAI.py
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_TIP = "Fix dripping taps and fit aerators to cut water use without changing your routine."
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    options = argparse.Namespace(delay=0.0, token_delay=0.02, fail_rate=0.0, fail_status=500, retry_after=None,
+                                 reply=FAKE_TIP)
+    requests_served = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        type(self).requests_served += 1
+        options = self.options
+
+        time.sleep(options.delay)
+        if random.random() < options.fail_rate:
+            rate_limited = options.fail_status == 429
+            error_type = "rate_limit_exceeded" if rate_limited else "server_error"
+            headers = {"Retry-After": str(options.retry_after)} if rate_limited and options.retry_after is not None else None
+            self._send_json(options.fail_status, {"error": {"message": "fake upstream failure", "type": error_type}}, headers)
+            return
+
+        reply = options.reply
+        prompt = (request.get("messages") or [{}])[-1].get("content", "")
+        if "JSON object" in prompt and "{" in prompt:
+            # Batched warm-up request: answer every activity/usage pair it lists
+            wanted = json.loads(prompt[prompt.index("{"):])
+            reply = json.dumps({activity: {band: f"{activity} ({band} gal): {options.reply}" for band in bands}
+                                for activity, bands in wanted.items()})
+        model = request.get("model", "fake")
+        if not request.get("stream"):
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 30, "completion_tokens": len(reply.split()), "total_tokens": 30 + len(reply.split())},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in reply.split(" "):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(options.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+# Start the server on a background thread; returns the server (call .shutdown() to stop)
+def start_fake_llm_server(port=0, **options):
+    handler = type("ConfiguredFakeLLMHandler", (FakeLLMHandler,), {
+        "options": argparse.Namespace(**{**vars(FakeLLMHandler.options), **options}),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before responding")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--fail-status", type=int, default=500, help="HTTP status used for failures (429 = rate limit)")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--reply", default=FAKE_TIP)
+    args = parser.parse_args()
+
+    server = start_fake_llm_server(args.port, delay=args.delay, token_delay=args.token_delay,
+                                   fail_rate=args.fail_rate, fail_status=args.fail_status,
+                                   retry_after=args.retry_after, reply=args.reply)
+    print(f"Fake LLM listening on http://127.0.0.1:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,51 +1,21 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import random
 import openai
 import os
 import altair as alt
+from synthetic import generate_households
 
 # Set up OpenAI API key
 openai.api_key = os.getenv("OPENAI_API_KEY")  # Replace with your actual API key
 
 # Load or generate synthetic data
+SYNTHETIC_HOUSEHOLDS = int(os.getenv("JADE_SYNTHETIC_HOUSEHOLDS", 100))
+SYNTHETIC_WORKERS = int(os.getenv("JADE_SYNTHETIC_WORKERS", 1))
+
 @st.cache_data
-def generate_synthetic_data():
-    num_households = 100
-    np.random.seed(42)
-
-    # Generate household data
-    household_ids = range(1, num_households + 1)
-    household_sizes = np.random.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
-    household_sizes = np.clip(household_sizes, 1, None)
-
-    # Generate fixture-specific water usage data
-    shower_usage = np.random.normal(loc=25, scale=5, size=num_households).round().astype(int)  # Gallons per day
-    laundry_usage = np.random.normal(loc=30, scale=8, size=num_households).round().astype(int)
-    dishwashing_usage = np.random.normal(loc=12, scale=3, size=num_households).round().astype(int)
-    garden_usage = np.random.normal(loc=40, scale=15, size=num_households).round().astype(int)
-    car_wash_usage = np.random.normal(loc=15, scale=5, size=num_households).round().astype(int)
-
-    # Calculate total daily usage as a sum of all fixtures
-    total_daily_usage = shower_usage + laundry_usage + dishwashing_usage + garden_usage + car_wash_usage
-
-    # Add Zip Codes
-    zip_codes = np.random.choice(["90001", "90002", "90003", "90004"], size=num_households)
-    
-    # Create DataFrame
-    data = {
-        'Household_ID': household_ids,
-        'Zip_Code': zip_codes,
-        'Household_Size': household_sizes,
-        'Shower_Usage_Gallons': shower_usage,
-        'Laundry_Usage_Gallons': laundry_usage,
-        'Dishwashing_Usage_Gallons': dishwashing_usage,
-        'Garden_Usage_Gallons': garden_usage,
-        'Car_Wash_Usage_Gallons': car_wash_usage,
-        'Total_Daily_Usage_Gallons': total_daily_usage,
-    }
-    return pd.DataFrame(data)
+def generate_synthetic_data(num_households=SYNTHETIC_HOUSEHOLDS):
+    return generate_households(num_households, workers=SYNTHETIC_WORKERS)
 
 data = generate_synthetic_data()
 
@@ -1,208 +1,436 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import random
-import openai
 import os
-import altair as alt
-
-# Set up OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")  # Replace with your actual API key
-
-# Load or generate synthetic data
-@st.cache_data
-def generate_synthetic_data():
-    num_households = 100
-    np.random.seed(42)
-
-    # Generate household data
-    household_ids = range(1, num_households + 1)
-    household_sizes = np.random.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
-    household_sizes = np.clip(household_sizes, 1, None)
-
-    # Generate fixture-specific water usage data
-    shower_usage = np.random.normal(loc=25, scale=5, size=num_households).round().astype(int)  # Gallons per day
-    laundry_usage = np.random.normal(loc=30, scale=8, size=num_households).round().astype(int)
-    dishwashing_usage = np.random.normal(loc=12, scale=3, size=num_households).round().astype(int)
-    garden_usage = np.random.normal(loc=40, scale=15, size=num_households).round().astype(int)
-    car_wash_usage = np.random.normal(loc=15, scale=5, size=num_households).round().astype(int)
-
-    # Calculate total daily usage as a sum of all fixtures
-    total_daily_usage = shower_usage + laundry_usage + dishwashing_usage + garden_usage + car_wash_usage
-
-    # Add Zip Codes
-    zip_codes = np.random.choice(["90001", "90002", "90003", "90004"], size=num_households)
-    
-    # Create DataFrame
-    data = {
-        'Household_ID': household_ids,
-        'Zip_Code': zip_codes,
-        'Household_Size': household_sizes,
-        'Shower_Usage_Gallons': shower_usage,
-        'Laundry_Usage_Gallons': laundry_usage,
-        'Dishwashing_Usage_Gallons': dishwashing_usage,
-        'Garden_Usage_Gallons': garden_usage,
-        'Car_Wash_Usage_Gallons': car_wash_usage,
-        'Total_Daily_Usage_Gallons': total_daily_usage,
-    }
-    return pd.DataFrame(data)
-
-data = generate_synthetic_data()
-
-# Recommendations (Static)
-recommendations = {
-    "Shower": [
-        "Install WaterSense-certified showerheads to reduce water usage without compromising performance.",
-        "Keep showers under 5 minutes to save water.",
-        "Turn off the water while lathering or shampooing.",
-    ],
-    "Laundry": [
-        "Wash only full loads of laundry to maximize water efficiency.",
-        "Upgrade to a high-efficiency washing machine to reduce water and energy usage.",
-        "Use the shortest cycle possible for lightly soiled clothes.",
-    ],
-    "Dishwashing": [
-        "Run the dishwasher only when it’s fully loaded.",
-        "Use a dishwasher instead of handwashing for better water efficiency.",
-        "Scrape food off plates instead of rinsing them under running water before loading into the dishwasher.",
-    ],
-    "Garden": [
-        "Water plants early in the morning or late in the evening to minimize evaporation.",
-        "Install a drip irrigation system for targeted watering.",
-        "Use mulch around plants to retain soil moisture.",
-    ],
-    "Car Wash": [
-        "Wash your car using a bucket instead of a hose to save water—this can reduce water usage by up to 50%.",
-        "Consider using a commercial car wash that recycles water—many use less than 50 gallons per wash.",
-        "Limit car washes to once or twice per month to conserve water."
-    ]
-}
-
-# Real average water usage
-average_data = {
-    "Region": ["Silicon Valley", "California", "National Average"],
-    "Daily Usage (Gallons)": [75, 146, 82]
-}
-average_usage_df = pd.DataFrame(average_data)
-
-# Define function for CSV insights
-def get_csv_insights(fixture):
-    fixture_mapping = {
-        "Shower": "Shower_Usage_Gallons",
-        "Garden": "Garden_Usage_Gallons",
-        "Car Wash": "Car_Wash_Usage_Gallons",
-        "Laundry": "Laundry_Usage_Gallons",
-        "Dishwashing": "Dishwashing_Usage_Gallons",
-    }
-    column = fixture_mapping.get(fixture)
-    avg_usage = data[column].mean()
-    return avg_usage
-
-# Define OpenAI Tip Generator
-def get_openai_tip(activity, avg_usage):
-    # Define the prompt for OpenAI
-    prompt = f"Provide a water-saving tip for {activity} based on an average daily water usage of {avg_usage:.2f} gallons."
-    
-    try:
-        # Use the correct API method
-        response = openai.ChatCompletion.create(
-            model="gpt-4",  # You can also use "gpt-3.5-turbo" if preferred
-            messages=[
-                {"role": "system", "content": "You are an assistant that provides water conservation advice."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=100,
-            temperature=0.7
-        )
-        # Extract and return the generated response
-        return response['choices'][0]['message']['content'].strip()
-    
-    except Exception as e:
-        # Handle exceptions gracefully
-        return f"Error fetching OpenAI tip: {e}"
+import random
+import time
+from data_sources import source_signature
+from shared_dataset import open_snapshot
+from append_ingest import AppendIngestor
+from insights import build_aggregate_index, dataset_version, fixture_columns, household_id_column
+from tip_cache import TipCache, tip_key
+from tip_stream import TIP_DEADLINE_SECONDS, shared_tip_stream
+from tip_warmup import start_tip_warmup
+from meter_stream import start_simulated_pipeline, start_udp_pipeline
+from anomalies import households_needing_attention, score_anomalies, total_column
+from percentiles import PercentileIndex
+from personalize import HouseholdOpportunities
+from query import HouseholdQuery
+from savings_sim import DEFAULT_RATES, prepare_simulation, simulate
+from chart_data import ChartSpecCache, histogram, zip_rollup
+from llm_client import get_llm_client
+from telemetry import prometheus_text, span, span_summary, start_metrics_server
+from jade_core import (DATA_SOURCE, LIVE_METER_HOUSEHOLDS, LIVE_METERS, LIVE_METERS_PORT, OPENAI_MODEL, SHARED_DATASET,
+                       TIP_FLIGHTS, TIP_MODE, WATCH_APPENDS, get_average_usage_df, get_csv_insights, get_local_tip, get_personal_tips,
+                       get_tip_messages, llm_available, llm_configured, load_data, recommendations, shared_snapshot_version)
+
+# Persistent tip cache shared by all sessions and worker processes
+@st.cache_resource
+def get_tip_cache():
+    return TipCache()
+
+# The signature argument (path, size, mtime) makes the cache reload when the file changes.
+# Caches keyed on the data signature or dataset version keep only the latest entry, so
+# superseded copies (one per refresh in append mode) are released.
+@st.cache_data(max_entries=1)
+def load_cached_data(source, signature):
+    return load_data(source)
+
+# Aggregate index over the dataset, rebuilt only when the dataset version changes
+@st.cache_resource(max_entries=1)
+def get_aggregate_index(version, _data):
+    return build_aggregate_index(_data)
+
+# Shared mode maps the current snapshot once per process; new snapshots published
+# with `python shared_dataset.py publish` are picked up on the next rerun
+@st.cache_resource(max_entries=1)
+def get_shared_dataset(version):
+    return open_snapshot(version)
+
+# Append mode tails the CSV and keeps the data, aggregate index, percentile index and
+# histograms up to date with appended rows (checked at most every JADE_APPEND_POLL_SECONDS)
+@st.cache_resource
+def get_append_ingestor(source):
+    return AppendIngestor(source)
+
+ingestor = None
+if SHARED_DATASET:
+    data = get_shared_dataset(shared_snapshot_version())
+elif WATCH_APPENDS:
+    ingestor = get_append_ingestor(DATA_SOURCE)
+    ingestor.refresh()
+    data = ingestor.data
+else:
+    data = load_cached_data(DATA_SOURCE, source_signature(DATA_SOURCE))
+fixtures = list(fixture_columns(data))
+if ingestor is not None:
+    aggregate_index = ingestor.aggregate_index
+else:
+    aggregate_index = get_aggregate_index(dataset_version(data), data)
+# In append mode the version changes on every refresh, so long-lived resources (the query
+# layer, which scans the ingestor's Parquet parts on each query, and the meter simulator)
+# are keyed on the append store instead
+resource_key = ingestor.store_dir if ingestor is not None else aggregate_index["version"]
+
+# Pre-generate AI tips for every fixture in one batched request when the app starts or the
+# dataset changes; JADE_TIP_MODE=local never calls the LLM
+@st.cache_resource(max_entries=1)
+def warm_up_tips(version, _index):
+    return start_tip_warmup(_index, get_tip_cache(), OPENAI_MODEL, fixtures)
+
+if llm_configured() and TIP_MODE != "local":
+    warm_up_tips(aggregate_index["version"], aggregate_index)
+
+# Anomaly scores for every household, computed once per dataset version
+@st.cache_resource(max_entries=1)
+def get_anomaly_scores(version, _data):
+    return score_anomalies(_data)
+
+# Sorted usage index for percentile lookups in the Savings Calculator
+@st.cache_resource(max_entries=1)
+def get_percentile_index(version, _data):
+    return PercentileIndex(_data, total_column(_data))
+
+# Every household's fixtures ranked by excess over zip code / household-size peers
+@st.cache_resource(max_entries=1)
+def get_household_opportunities(version, _data):
+    return HouseholdOpportunities(_data)
+
+# DuckDB query layer over the source file, or over the loaded frame for synthetic data
+# and shared snapshots. The connection of a replaced query layer is closed.
+@st.cache_resource(max_entries=1, on_release=lambda query: query.close())
+def get_household_query(key, _data):
+    if DATA_SOURCE == "synthetic" or SHARED_DATASET:
+        return HouseholdQuery(data=_data)
+    # In append mode the ingestor's Parquet parts are the columnar copy of the CSV
+    return HouseholdQuery(ingestor.store_dir if ingestor is not None else DATA_SOURCE)
+
+# Arrays for the what-if simulator; scenario results are cached inside per scenario hash
+@st.cache_resource(max_entries=1)
+def get_simulation(version, _data):
+    return prepare_simulation(_data)
+
+# Vega-Lite specs built from pre-aggregated data, shared across sessions
+@st.cache_resource
+def get_chart_cache():
+    return ChartSpecCache()
+
+# Apply the app's axis colors to a chart
+def style_chart(chart):
+    return chart.configure_axis(
+        labelColor='#000000',  # Change tick label color (e.g., black)
+        titleColor='#000000',   # Change axis title color (e.g., black)
+        gridColor='#000000'
+    ).configure_view(
+        strokeWidth=0  # Optional: Remove the border around the chart
+    )
+
+# Live meter readings, simulated or received over UDP; a replaced pipeline's threads are
+# stopped and its socket closed. The UDP listener doesn't depend on the dataset, so it is
+# keyed on "udp" and keeps its port across dataset changes.
+@st.cache_resource(max_entries=1, on_release=lambda pipeline: pipeline.stop())
+def get_meter_pipeline(key):
+    if LIVE_METERS == "udp":
+        return start_udp_pipeline(fixtures, LIVE_METERS_PORT, max_households=LIVE_METER_HOUSEHOLDS)
+    return start_simulated_pipeline(data[household_id_column(data)].head(LIVE_METER_HOUSEHOLDS).tolist(), fixtures)
+
+# Show a local tip (JADE_TIP_MODE=local/local_first), or stream the AI tip into a
+# placeholder, falling back to a static tip once the deadline passes. Returns the tip shown.
+def show_streamed_tip(activity, avg_usage, fallback_tip, shown_tips=()):
+    placeholder = st.empty()
+    local_tip = get_local_tip(activity, avg_usage, exclude=shown_tips)
+    if local_tip is not None:
+        placeholder.write(f"- {local_tip}")
+        return local_tip
+
+    tip_cache = get_tip_cache()
+    key = tip_key(OPENAI_MODEL, activity, avg_usage)
+    cached_tip = tip_cache.get(key)
+    if cached_tip is not None:
+        placeholder.write(f"- {cached_tip}")
+        return cached_tip
+
+    if TIP_MODE == "local" or not llm_available():
+        placeholder.write(f"- {fallback_tip}")
+        return fallback_tip
+
+    deadline = time.monotonic() + TIP_DEADLINE_SECONDS
+    stream = shared_tip_stream(key, OPENAI_MODEL, get_tip_messages(activity, avg_usage),
+                               on_complete=lambda tip: tip_cache.put(key, tip))
+    placeholder.write("- _Generating an AI tip..._")
+    for _ in stream.iter_tokens(deadline):
+        placeholder.write(f"- {stream.text}▌")
+
+    tip = stream.text.strip() if stream.succeeded else fallback_tip
+    placeholder.write(f"- {tip}")
+    return tip
 
 # App Layout
+# Prometheus metrics on a local endpoint when JADE_METRICS_PORT is set
+start_metrics_server()
+
 st.title("JadeAI Water Conservation")
 st.write("Get personalized insights, tips, and analytics to conserve water in your household.")
 
-# Tabs for navigation
+# Tabs for navigation. Each tab body is a fragment: a widget inside a tab reruns only
+# that tab's function, not the data load and the other tabs.
 tabs = st.tabs(["Real-Time Feedback", "Recommendations", "Savings Calculator", "Regional Insights"])
 
 # Tab 1: Real-Time Feedback
-with tabs[0]:
-    st.header("Real-Time Water Usage Feedback")
-    st.write("This data shows **daily water usage** for key areas in your home.")
+@st.fragment
+def real_time_feedback_tab():
+    with span("tab/real_time_feedback"):
+        st.header("Real-Time Water Usage Feedback")
+        st.write("This data shows **daily water usage** for key areas in your home.")
 
-    fixture = st.selectbox("Select a fixture to find the average water usage:", 
-                           ["Shower", "Garden", "Car Wash", "Laundry", "Dishwashing"])
+        fixture = st.selectbox("Select a fixture to find the average water usage:", fixtures)
     
-    if st.button("Get Data"):
-        avg_usage = get_csv_insights(fixture)
-        st.metric(label=f"Average Daily {fixture} Usage", value=f"{avg_usage:.2f} gallons")
+        if st.button("Get Data"):
+            avg_usage = get_csv_insights(aggregate_index, fixture)
+            st.metric(label=f"Average Daily {fixture} Usage", value=f"{avg_usage:.2f} gallons")
+
+        with st.expander("Households needing attention"):
+            anomaly_scores = get_anomaly_scores(aggregate_index["version"], data)
+            flagged = households_needing_attention(anomaly_scores)
+            st.write(f"**{len(flagged):,}** of {len(anomaly_scores):,} households use far more water than similar "
+                     "households in their zip code and household size, or lose an unusual share to leaks.")
+            st.dataframe(flagged.head(100), hide_index=True)
+
+        if LIVE_METERS in ("simulate", "udp"):
+            st.subheader("Live Meter Readings")
+            meter_aggregates = get_meter_pipeline("udp" if LIVE_METERS == "udp" else resource_key).aggregates
+            household_id = st.number_input("Household ID:", min_value=1, value=1, step=1)
+            window = st.radio("Window:", ["hour", "day", "week"], horizontal=True)
+            meter_aggregates.tick()
+            live_totals = meter_aggregates.household_totals(int(household_id), window)
+            columns = st.columns(len(live_totals))
+            for column, (live_fixture, gallons) in zip(columns, live_totals.items()):
+                column.metric(label=live_fixture, value=f"{gallons:.1f} gal")
+            st.caption(f"{meter_aggregates.events:,} readings ingested")
+
+with tabs[0]:
+    real_time_feedback_tab()
 
 # Tab 2: Recommendations
-with tabs[1]:
-    st.header("Recommendations")
-    st.write("Here are some specific tips to help you save water:")
+@st.fragment
+def recommendations_tab():
+    with span("tab/recommendations"):
+        st.header("Recommendations")
+
+        # Lead with the fixtures where this household uses the most above similar households
+        opportunities = get_household_opportunities(aggregate_index["version"], data)
+        your_household = st.number_input("Your household ID (0 to skip):", min_value=0, value=0, step=1)
+        personal_tips = get_personal_tips(opportunities, int(your_household)) if your_household else []
+        if personal_tips:
+            st.subheader("Your biggest savings opportunities")
+            for item in personal_tips:
+                st.write(f"- **{item['fixture']}**: {item['excess_gallons']:.1f} gallons/day above similar households "
+                         f"({item['usage']:.1f} vs {item['peer_mean']:.1f}). {item['tip']}")
+        elif your_household:
+            st.write("No savings opportunities found for that household ID.")
 
-    activity = st.selectbox("Select an activity to get tips:", 
-                            ["Shower", "Garden", "Car Wash", "Laundry", "Dishwashing"])
+        st.write("Here are some specific tips to help you save water:")
+
+        default_activity = fixtures.index(personal_tips[0]["fixture"]) if personal_tips else 0
+        activity = st.selectbox("Select an activity to get tips:", fixtures, index=default_activity)
     
-    if st.button("Show Recommendations"):
-        avg_usage = get_csv_insights(activity)
-        tips = random.sample(recommendations[activity], k=min(2, len(recommendations[activity])))
-        openai_tip = get_openai_tip(activity, avg_usage)
-        
-        for tip in tips:
-            st.write(f"- {tip}")
-        st.write(f"- {openai_tip}")
+        # The tips shown for an activity are kept in session state, so other widgets in
+        # this tab redraw them instead of requesting a new AI tip
+        shown = st.session_state.get("recommendation_tips")
+        if st.button("Show Recommendations"):
+            avg_usage = get_csv_insights(aggregate_index, activity)
+            shuffled_tips = random.sample(recommendations[activity], k=len(recommendations[activity]))
+            tips, fallback_tip = shuffled_tips[:2], shuffled_tips[-1]
+
+            # Static tips render right away; the AI tip streams in underneath
+            for tip in tips:
+                st.write(f"- {tip}")
+            ai_tip = show_streamed_tip(activity, avg_usage, fallback_tip, tips)
+            st.session_state["recommendation_tips"] = {"activity": activity, "tips": tips + [ai_tip]}
+        elif shown is not None and shown["activity"] == activity:
+            for tip in shown["tips"]:
+                st.write(f"- {tip}")
+
+        tip_stats = get_tip_cache().stats()
+        st.caption(f"AI tip cache: {tip_stats['hits']} hits, {tip_stats['misses']} misses "
+                   f"({tip_stats['hit_rate']:.0%} hit rate)")
+
+with tabs[1]:
+    recommendations_tab()
 
 # Tab 3: Savings Calculator
+@st.fragment
+def savings_calculator_tab():
+    with span("tab/savings_calculator"):
+        st.header("Savings Calculator")
+        user_usage = st.number_input("Enter your average daily water usage (gallons):", min_value=0, value=100)
+
+        # Where the user's usage ranks among all households in the dataset
+        if ingestor is not None:
+            percentile_index = ingestor.percentile_index
+        else:
+            percentile_index = get_percentile_index(aggregate_index["version"], data)
+        st.write(f"You use more water than **{percentile_index.percentile(user_usage):.0f}%** of households.")
+        if percentile_index.group_columns:
+            zip_options = sorted(key[0] for key in aggregate_index["groups"].get(("Zip_Code",), {}))
+            size_options = sorted(key[0] for key in aggregate_index["groups"].get(("Household_Size",), {}))
+            zip_column, size_column = st.columns(2)
+            user_zip = zip_column.selectbox("Your zip code:", ["Any"] + zip_options)
+            user_size = size_column.selectbox("People in your household:", ["Any"] + size_options)
+            peer_zip = None if user_zip == "Any" else user_zip
+            peer_size = None if user_size == "Any" else user_size
+            if peer_zip is not None or peer_size is not None:
+                peer_percentile = percentile_index.percentile(user_usage, peer_zip, peer_size)
+                if peer_percentile is None:
+                    st.write("No households in the dataset match that zip code and household size.")
+                else:
+                    st.write(f"Among {percentile_index.count(peer_zip, peer_size):,} similar households, "
+                             f"you use more water than **{peer_percentile:.0f}%**.")
+
+        target_usage = 82  # National average
+        if user_usage > target_usage:
+            savings = user_usage - target_usage
+            cost_savings = savings * 0.01065
+            st.write(f"If you reduce your usage to the national average ({target_usage} gallons/day), you could save **{savings} gallons per day**.")
+            st.write(f"Potential cost savings: **${cost_savings:.2f} per day**.")
+        elif user_usage == target_usage:
+            st.write("Great job! You're already using water at the national average level. Keep it up!")
+        else:
+            savings_below_avg = target_usage - user_usage
+            st.write("Excellent! You're already using less water than the national average. Keep conserving!")
+            st.write(f"You’re saving approximately **{savings_below_avg} gallons per day** compared to the average household.")
+            st.write("Consider sharing your conservation tips with others or finding new ways to optimize even further!")
+
+        # What-if simulator across every household in the dataset
+        with st.expander("What-if savings simulator"):
+            st.write("Apply a rate structure and per-fixture changes to every household at once.")
+            rate_columns = st.columns(4)
+            tier_limit = rate_columns[0].number_input("Tier 1 limit (gallons/month):", min_value=0, value=3000, step=500)
+            tier1_price = rate_columns[1].number_input("Tier 1 $/gallon:", min_value=0.0, value=DEFAULT_RATES["tiers"][0][1], format="%.5f")
+            tier2_price = rate_columns[2].number_input("Tier 2 $/gallon:", min_value=0.0, value=0.015, format="%.5f")
+            fixed_charge = rate_columns[3].number_input("Fixed charge ($/month):", min_value=0.0, value=0.0)
+            surcharge = st.slider("Drought surcharge (%):", 0, 50, 0)
+            rates = {
+                "tiers": [[tier_limit, tier1_price], [None, tier2_price]],
+                "fixed_charge": fixed_charge,
+                "surcharge": surcharge / 100,
+                "billing_days": 30,
+            }
+
+            simulation = get_simulation(aggregate_index["version"], data)
+            scenario = {}
+            fixture_sliders = st.columns(len(simulation["fixtures"]))
+            for slider_column, sim_fixture in zip(fixture_sliders, simulation["fixtures"]):
+                change = slider_column.slider(f"{sim_fixture} (%)", -50, 20, 0, step=5)
+                if change:
+                    scenario[sim_fixture] = change / 100
+
+            result = simulate(simulation, rates, scenario)
+            st.write(f"Across **{result['households']:,}** households: **{result['gallons_saved_per_day']:,.0f} gallons saved per day**, "
+                     f"monthly bills **${result['bill_before']:,.2f} → ${result['bill_after']:,.2f}** "
+                     f"(saving ${result['bill_savings']:,.2f}).")
+            st.dataframe(result["by_zip"], hide_index=True)
+
 with tabs[2]:
-    st.header("Savings Calculator")
-    user_usage = st.number_input("Enter your average daily water usage (gallons):", min_value=0, value=100)
-
-    target_usage = 82  # National average
-    if user_usage > target_usage:
-        savings = user_usage - target_usage
-        cost_savings = savings * 0.01065
-        st.write(f"If you reduce your usage to the national average ({target_usage} gallons/day), you could save **{savings} gallons per day**.")
-        st.write(f"Potential cost savings: **${cost_savings:.2f} per day**.")
-    elif user_usage == target_usage:
-        st.write("Great job! You're already using water at the national average level. Keep it up!")
-    else:
-        savings_below_avg = target_usage - user_usage
-        st.write("Excellent! You're already using less water than the national average. Keep conserving!")
-        st.write(f"You’re saving approximately **{savings_below_avg} gallons per day** compared to the average household.")
-        st.write("Consider sharing your conservation tips with others or finding new ways to optimize even further!")
+    savings_calculator_tab()
 
 # Tab 4: Regional Insights
-with tabs[3]:
-    st.header("Regional Insights")
-
-    # Create an Altair bar chart and customize label colors
-    chart = alt.Chart(average_usage_df).mark_bar(color='#008000').encode(
-        x=alt.X('Region', sort=None),
-        y='Daily Usage (Gallons)'
-    ).properties(
-        width=600,
-        height=400
-    ).configure_axis(
-        labelColor='#000000',  # Change tick label color (e.g., black)
-        titleColor='#000000',   # Change axis title color (e.g., black)
-        gridColor='#000000'
-    ).configure_view(
-        strokeWidth=0  # Optional: Remove the border around the chart
-    )
+@st.fragment
+def regional_insights_tab():
+    with span("tab/regional_insights"):
+        st.header("Regional Insights")
+
+        chart_cache = get_chart_cache()
+
+        # Create an Altair bar chart and customize label colors
+        def build_region_chart():
+            import altair as alt
+            return style_chart(alt.Chart(get_average_usage_df()).mark_bar(color='#008000').encode(
+                x=alt.X('Region', sort=None),
+                y='Daily Usage (Gallons)'
+            ).properties(
+                width=600,
+                height=400
+            ))
+
+        # Display the chart
+        spec, payload_bytes = chart_cache.get("static", "regions", {}, build_region_chart)
+        st.vega_lite_chart(spec, use_container_width=True)
+
+        st.write("""
+        Californians use significantly more water daily than the national average. 
+        Let's work together to lower this number!
+        """)
 
-    # Display the chart
-    st.altair_chart(chart, use_container_width=True)
+        california_population = 39538223
+        potential_savings_statewide = (146 - 82) * california_population
+        st.write(f"If all Californians reduced their water usage to the national average, they could save approximately **{potential_savings_statewide:,} gallons of water per day**!")
 
-    st.write("""
-    Californians use significantly more water daily than the national average. 
-    Let's work together to lower this number!
-    """)
+        # Distribution charts over the whole dataset, binned and aggregated on the server
+        st.subheader("Household Usage Distribution")
+        chart_fixture = st.selectbox("Select a fixture to chart:", fixtures)
+        chart_column = fixture_columns(data)[chart_fixture]
+        version = aggregate_index["version"]
+
+        def build_histogram_chart():
+            import altair as alt
+            bins = ingestor.histogram(chart_column) if ingestor is not None else histogram(data[chart_column])
+            return style_chart(alt.Chart(bins).mark_bar(color='#008000').encode(
+                x=alt.X('Bin_Start', bin='binned', title=f'{chart_fixture} usage (gallons/day)'),
+                x2='Bin_End',
+                y='Households'
+            ).properties(height=300))
+
+        spec, histogram_bytes = chart_cache.get(version, "histogram", {"fixture": chart_fixture}, build_histogram_chart)
+        st.vega_lite_chart(spec, use_container_width=True)
+        payload_bytes += histogram_bytes
+
+        if ("Zip_Code",) in aggregate_index["groups"]:
+            def build_zip_chart():
+                import altair as alt
+                rollup = zip_rollup(aggregate_index, chart_fixture)
+                bars = alt.Chart(rollup).mark_bar(color='#008000').encode(x='Zip_Code', y=alt.Y('Mean', title=f'Average {chart_fixture} usage (gallons/day)'))
+                spread = alt.Chart(rollup).mark_rule(color='#000000').encode(x='Zip_Code', y='P25', y2='P75')
+                return style_chart((bars + spread).properties(height=300))
+
+            spec, zip_bytes = chart_cache.get(version, "zip_rollup", {"fixture": chart_fixture}, build_zip_chart)
+            st.vega_lite_chart(spec, use_container_width=True)
+            payload_bytes += zip_bytes
+
+        st.caption(f"Chart data sent to the browser: {payload_bytes / 1024:.1f} KB")
+
+        # Filtered in DuckDB, so only the matching rows are ever loaded
+        with st.expander("Find households"):
+            household_query = get_household_query(resource_key, data)
+            query_filters = []
+            if "Zip_Code" in household_query.columns:
+                zip_options = sorted(key[0] for key in aggregate_index["groups"].get(("Zip_Code",), {}))
+                query_zip = st.selectbox("Zip code:", ["Any"] + zip_options)
+                if query_zip != "Any":
+                    query_filters.append(("Zip_Code", "=", query_zip))
+            if "Household_Size" in household_query.columns:
+                size_options = sorted(key[0] for key in aggregate_index["groups"].get(("Household_Size",), {}))
+                query_size = st.selectbox("Household size:", ["Any"] + size_options)
+                if query_size != "Any":
+                    query_filters.append(("Household_Size", "=", query_size))
+            query_fixture = st.selectbox("Fixture:", fixtures)
+            query_column = fixture_columns(data)[query_fixture]
+            min_gallons = st.number_input("Using more than (gallons/day):", min_value=0, value=0)
+            query_filters.append((query_column, ">", min_gallons))
+            st.write(f"**{household_query.count(query_filters):,}** matching households")
+            st.dataframe(household_query.frame(filters=query_filters, order_by=["-" + query_column], limit=1000),
+                         hide_index=True)
+
+with tabs[3]:
+    regional_insights_tab()
 
-    california_population = 39538223
-    potential_savings_statewide = (146 - 82) * california_population
-    st.write(f"If all Californians reduced their water usage to the national average, they could save approximately **{potential_savings_statewide:,} gallons of water per day**!")
+# Optional admin panel with timing spans and LLM metrics (JADE_ADMIN=1)
+if os.getenv("JADE_ADMIN") == "1":
+    with st.sidebar.expander("Admin: performance"):
+        st.dataframe(span_summary(), hide_index=True)
+        tip_stats = get_tip_cache().stats()
+        st.write(f"Tip cache: {tip_stats['hits']} hits, {tip_stats['misses']} misses, {tip_stats['entries']} entries")
+        flights = TIP_FLIGHTS.stats()
+        st.write(f"Tip requests: {flights['leader']} sent upstream, {flights['coalesced']} coalesced in this process, "
+                 f"{flights['cross_process']} answered by another process")
+        llm_stats = get_llm_client().stats()
+        st.write(f"LLM circuit breaker: {llm_stats['breaker']} ({llm_stats['consecutive_failures']} consecutive failures)")
+        st.code(prometheus_text(), language="text")
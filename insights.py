@@ -0,0 +1,164 @@
+import hashlib
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from telemetry import traced
+
+# Fixture name shown in the app -> column in the household DataFrame
+FIXTURE_COLUMNS = {
+    "Shower": "Shower_Usage_Gallons",
+    "Garden": "Garden_Usage_Gallons",
+    "Car Wash": "Car_Wash_Usage_Gallons",
+    "Laundry": "Laundry_Usage_Gallons",
+    "Dishwashing": "Dishwashing_Usage_Gallons",
+}
+
+# Columns the aggregate index is grouped by (every combination, plus the whole population)
+GROUP_COLUMNS = ["Zip_Code", "Household_Size"]
+
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+STATS = ["mean", "sum", "count", "min", "max"] + [f"p{int(q * 100)}" for q in QUANTILES]
+
+
+# Same mapping for meter exports shaped like household_water_usage.csv
+METER_FIXTURE_COLUMNS = {
+    "Toilet": "Toilet (gallons)",
+    "Shower": "Shower (gallons)",
+    "Faucets": "Faucets (gallons)",
+    "Laundry": "Clothes Washer (gallons)",
+    "Leaks": "Leaks (gallons)",
+    "Other": "Other (gallons)",
+}
+
+
+# Columns used for insights, limited to the ones present in this dataset
+def fixture_columns(data):
+    for mapping in (FIXTURE_COLUMNS, METER_FIXTURE_COLUMNS):
+        columns = {name: column for name, column in mapping.items() if column in data.columns}
+        if columns:
+            return columns
+    return {}
+
+
+# Household identifier column for either schema
+def household_id_column(data):
+    return "Household_ID" if "Household_ID" in data.columns else "Household"
+
+
+# Version string for a dataset, stored on the DataFrame so it is only hashed once
+def dataset_version(data):
+    version = data.attrs.get("version")
+    if version is None:
+        digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        version = digest.hexdigest()[:16]
+        data.attrs["version"] = version
+    return version
+
+
+# Groupings to precompute: (), ("Zip_Code",), ("Household_Size",), ("Zip_Code", "Household_Size")
+def groupings(data):
+    present = [column for column in GROUP_COLUMNS if column in data.columns]
+    return [combo for size in range(len(present) + 1) for combo in itertools.combinations(present, size)]
+
+
+def _column_stats(values):
+    values = np.asarray(values, dtype="float64")
+    if values.size == 0:
+        return dict.fromkeys(STATS, float("nan")) | {"count": 0, "sum": 0.0}
+    stats = {
+        "mean": float(values.mean()),
+        "sum": float(values.sum()),
+        "count": int(values.size),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+    for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+        stats[f"p{int(q * 100)}"] = float(value)
+    return stats
+
+
+# Build the aggregate index once per dataset version.
+# Layout: index[grouping][group_key][fixture][stat], where grouping is a tuple of
+# column names and group_key is a tuple of values (both empty for the whole population).
+@traced("build_aggregate_index")
+def build_aggregate_index(data):
+    columns = fixture_columns(data)
+    stat_names = ["mean", "sum", "count", "min", "max"]
+    index = {"version": dataset_version(data), "groups": {}}
+
+    for grouping in groupings(data):
+        if not grouping:
+            index["groups"][()] = {
+                (): {name: _column_stats(data[column]) for name, column in columns.items()}
+            }
+            continue
+
+        grouped = data.groupby(list(grouping), observed=True, sort=True)[list(columns.values())]
+        basic = grouped.agg(stat_names)
+        quantiles = grouped.quantile(QUANTILES)
+
+        table = {}
+        for key, row in basic.iterrows():
+            key = key if isinstance(key, tuple) else (key,)
+            table[key] = {
+                name: {stat: (int(row[(column, stat)]) if stat == "count" else float(row[(column, stat)]))
+                       for stat in stat_names}
+                for name, column in columns.items()
+            }
+        for (*key, q), row in quantiles.iterrows():
+            for name, column in columns.items():
+                table[tuple(key)][name][f"p{int(round(q * 100))}"] = float(row[column])
+        index["groups"][grouping] = table
+
+    return index
+
+
+def _merge_stats(old, new):
+    if new["count"] == 0:
+        return old
+    if old["count"] == 0:
+        return new
+    count = old["count"] + new["count"]
+    merged = {
+        "mean": (old["sum"] + new["sum"]) / count,
+        "sum": old["sum"] + new["sum"],
+        "count": count,
+        "min": min(old["min"], new["min"]),
+        "max": max(old["max"], new["max"]),
+    }
+    for q in QUANTILES:
+        stat = f"p{int(q * 100)}"
+        merged[stat] = (old["count"] * old[stat] + new["count"] * new[stat]) / count
+    return merged
+
+
+# Fold appended households into an aggregate index without rescanning the existing ones.
+# Counts, sums, means, minimums and maximums stay exact. Quantiles of groups that already
+# had households become count-weighted blends of the old and new quantiles, an
+# approximation that is rebuilt exactly the next time the whole index is.
+def merge_aggregate_index(index, new_rows, version):
+    delta = build_aggregate_index(new_rows)
+    groups = {}
+    for grouping, table in index["groups"].items():
+        merged = dict(table)
+        for key, fixtures in delta["groups"].get(grouping, {}).items():
+            old = table.get(key)
+            merged[key] = fixtures if old is None else {
+                name: _merge_stats(old[name], stats) for name, stats in fixtures.items()}
+        groups[grouping] = merged
+    return {"version": version, "groups": groups}
+
+
+# O(1) lookup of a precomputed statistic.
+# Returns None when the dataset has no households in the requested group.
+def lookup_insight(index, fixture, stat="mean", zip_code=None, household_size=None):
+    filters = {"Zip_Code": zip_code, "Household_Size": household_size}
+    grouping = tuple(column for column in GROUP_COLUMNS if filters[column] is not None)
+    key = tuple(filters[column] for column in grouping)
+    group = index["groups"].get(grouping, {}).get(key)
+    if group is None or fixture not in group:
+        return None
+    return group[fixture][stat]
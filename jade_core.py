@@ -0,0 +1,210 @@
+# Data, insight and tip logic shared by the Streamlit app and the command-line tools.
+# Nothing here imports Streamlit, and the heavy optional dependencies (openai, altair)
+# are only imported by the functions that need them. Importing this module builds the
+# static tables once per process instead of once per script rerun.
+import functools
+import os
+import random
+
+from data_sources import load_household_data
+from insights import lookup_insight
+from llm_client import LLMUnavailable, get_llm_client
+from shared_dataset import current_version, publish_snapshot
+from single_flight import SingleFlight
+from telemetry import traced
+from tip_cache import CACHE_DIR, tip_key, usage_bucket
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")  # You can also use "gpt-3.5-turbo" if preferred
+
+# Load or generate synthetic data
+# JADE_DATA_SOURCE is "synthetic", a CSV shaped like household_water_usage.csv, or a Parquet file
+DATA_SOURCE = os.getenv("JADE_DATA_SOURCE", "synthetic")
+SYNTHETIC_HOUSEHOLDS = int(os.getenv("JADE_SYNTHETIC_HOUSEHOLDS", 100))
+SYNTHETIC_WORKERS = int(os.getenv("JADE_SYNTHETIC_WORKERS", 1))
+
+# Shared mode: every session and worker process maps the current read-only snapshot
+# (see shared_dataset.py) instead of holding its own copy
+SHARED_DATASET = os.getenv("JADE_SHARED_DATASET") == "1"
+
+# Append mode: a CSV DATA_SOURCE is tailed and appended rows are merged in
+# incrementally (see append_ingest.py) instead of reloading the whole file
+WATCH_APPENDS = os.getenv("JADE_WATCH_APPENDS") == "1" and DATA_SOURCE.endswith(".csv")
+
+# Where tips come from: "local" (tip_engine only, no network), "local_first" (local
+# unless the engine has no confident match, then the LLM) or "llm". A tip written for the
+# request's usage level clears LOCAL_TIP_MIN_SCORE (see tip_engine.py for the scale)
+TIP_MODE = os.getenv("JADE_TIP_MODE", "llm")
+LOCAL_TIP_MIN_SCORE = float(os.getenv("JADE_LOCAL_TIP_MIN_SCORE", 0.3))
+
+# Identical concurrent tip requests share one upstream call; JADE_TIP_PROCESS_LOCKS=0
+# limits this to threads of one process instead of every process sharing CACHE_DIR
+TIP_FLIGHTS = SingleFlight(os.path.join(CACHE_DIR, "locks") if os.getenv("JADE_TIP_PROCESS_LOCKS", "1") != "0" else None)
+
+# Live meter readings for the Real-Time Feedback tab: JADE_LIVE_METERS=simulate runs the
+# bundled simulator, JADE_LIVE_METERS=udp listens for JSON-lines readings on
+# JADE_LIVE_METERS_PORT (e.g. from `python meter_stream.py simulate`); anything else is off.
+# Rolling windows take about 3.5 KB per household, so at most JADE_LIVE_METER_HOUSEHOLDS
+# households are tracked (the simulator uses the first ones in the dataset).
+LIVE_METERS = os.getenv("JADE_LIVE_METERS", "off")
+LIVE_METERS_PORT = int(os.getenv("JADE_LIVE_METERS_PORT", 9999))
+LIVE_METER_HOUSEHOLDS = int(os.getenv("JADE_LIVE_METER_HOUSEHOLDS", 10_000))
+
+# Recommendations (Static)
+recommendations = {
+    "Shower": [
+        "Install WaterSense-certified showerheads to reduce water usage without compromising performance.",
+        "Keep showers under 5 minutes to save water.",
+        "Turn off the water while lathering or shampooing.",
+    ],
+    "Laundry": [
+        "Wash only full loads of laundry to maximize water efficiency.",
+        "Upgrade to a high-efficiency washing machine to reduce water and energy usage.",
+        "Use the shortest cycle possible for lightly soiled clothes.",
+    ],
+    "Dishwashing": [
+        "Run the dishwasher only when it’s fully loaded.",
+        "Use a dishwasher instead of handwashing for better water efficiency.",
+        "Scrape food off plates instead of rinsing them under running water before loading into the dishwasher.",
+    ],
+    "Garden": [
+        "Water plants early in the morning or late in the evening to minimize evaporation.",
+        "Install a drip irrigation system for targeted watering.",
+        "Use mulch around plants to retain soil moisture.",
+    ],
+    "Car Wash": [
+        "Wash your car using a bucket instead of a hose to save water—this can reduce water usage by up to 50%.",
+        "Consider using a commercial car wash that recycles water—many use less than 50 gallons per wash.",
+        "Limit car washes to once or twice per month to conserve water."
+    ],
+    "Toilet": [
+        "Replace older toilets with WaterSense-labeled models that use 1.28 gallons per flush or less.",
+        "Check for a leaking flapper by adding food coloring to the tank and watching the bowl.",
+        "Don't use the toilet as a wastebasket for tissues or wipes.",
+    ],
+    "Faucets": [
+        "Install aerators on bathroom and kitchen faucets to cut flow without losing pressure.",
+        "Turn off the tap while brushing your teeth or shaving.",
+        "Keep a pitcher of drinking water in the fridge instead of running the tap until it's cold.",
+    ],
+    "Leaks": [
+        "Read your water meter before and after two hours without water use to detect hidden leaks.",
+        "Fix dripping faucets and showerheads promptly—a drip a second wastes over 3,000 gallons a year.",
+        "Inspect irrigation lines and hose connections for leaks each spring.",
+    ],
+    "Other": [
+        "Collect the water used to rinse fruit and vegetables and reuse it for houseplants.",
+        "Sweep driveways and sidewalks instead of hosing them down.",
+        "Cover pools and spas to reduce evaporation.",
+    ]
+}
+
+# Real average water usage
+average_data = {
+    "Region": ["Silicon Valley", "California", "National Average"],
+    "Daily Usage (Gallons)": [75, 146, 82]
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_average_usage_df():
+    import pandas as pd
+    return pd.DataFrame(average_data)
+
+
+# Whether an LLM backend is configured at all; without one the app sticks to static tips
+def llm_configured():
+    return bool(os.getenv("OPENAI_API_KEY"))
+
+
+# Configured and not cut off by the client's circuit breaker
+def llm_available():
+    return llm_configured() and get_llm_client().available
+
+
+@traced("load_data")
+def load_data(source=DATA_SOURCE):
+    return load_household_data(source, SYNTHETIC_HOUSEHOLDS, SYNTHETIC_WORKERS)
+
+
+# Version of the current shared snapshot, publishing one from DATA_SOURCE if none exists yet
+def shared_snapshot_version():
+    version = current_version()
+    if version is None:
+        version = publish_snapshot(load_data())
+    return version
+
+
+# Define function for CSV insights
+@traced("get_csv_insights")
+def get_csv_insights(index, fixture, zip_code=None, household_size=None):
+    return lookup_insight(index, fixture, "mean", zip_code, household_size)
+
+
+# Offline tip engine over the curated corpus plus the static recommendations
+@functools.lru_cache(maxsize=None)
+def get_tip_engine():
+    from tip_engine import TipEngine
+    return TipEngine(extra_tips=recommendations)
+
+
+# A household's top savings opportunities (personalize.py), each with the engine's best
+# tip for that fixture at that usage level
+def get_personal_tips(opportunities, household_id, k=3):
+    household_size = (opportunities.peer_group(household_id) or {}).get("Household_Size")
+    items = opportunities.top(household_id, k)
+    for item in items:
+        tip, _ = get_tip_engine().best(item["fixture"], item["usage"], item["peer_mean"], household_size)
+        item["tip"] = tip or random.choice(recommendations.get(item["fixture"], [None]))
+    return items
+
+
+# Tip from the local engine when TIP_MODE allows it (skipping tips in `exclude`), or None to ask the LLM
+def get_local_tip(activity, avg_usage=None, peer_usage=None, household_size=None, mode=TIP_MODE, exclude=()):
+    if mode == "llm":
+        return None
+    ranked = get_tip_engine().rank(activity, avg_usage, peer_usage, household_size, k=len(exclude) + 1)
+    for tip, score in ranked:
+        if tip not in exclude and (mode == "local" or score >= LOCAL_TIP_MIN_SCORE):
+            return tip
+    return None
+
+
+# A tip and where it came from ("local", "llm" or "static"), following TIP_MODE
+def get_tip(activity, avg_usage, tip_cache, peer_usage=None, household_size=None, model=OPENAI_MODEL, mode=TIP_MODE):
+    tip = get_local_tip(activity, avg_usage, peer_usage, household_size, mode)
+    if tip is not None:
+        return tip, "local"
+    if mode == "local" or not llm_available():
+        return random.choice(recommendations[activity]), "static"
+    tip = get_openai_tip(activity, avg_usage, tip_cache, model)
+    return tip, "llm" if tip_cache.peek(tip_key(model, activity, avg_usage)) == tip else "static"
+
+
+# Chat messages for an AI tip (bucketed usage, so the prompt matches the cache key)
+def get_tip_messages(activity, avg_usage):
+    prompt = f"Provide a water-saving tip for {activity} based on an average daily water usage of about {usage_bucket(avg_usage)} gallons."
+    return [
+        {"role": "system", "content": "You are an assistant that provides water conservation advice."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+# Define OpenAI Tip Generator
+@traced("get_openai_tip")
+def get_openai_tip(activity, avg_usage, tip_cache, model=OPENAI_MODEL):
+    key = tip_key(model, activity, avg_usage)
+    cached_tip = tip_cache.get(key)
+    if cached_tip is not None:
+        return cached_tip
+    return TIP_FLIGHTS.do(key, lambda: _fetch_openai_tip(activity, avg_usage, tip_cache, model, key),
+                          lookup=lambda: tip_cache.peek(key))
+
+
+def _fetch_openai_tip(activity, avg_usage, tip_cache, model, key):
+    try:
+        tip = get_llm_client().chat(model, get_tip_messages(activity, avg_usage), max_tokens=100, temperature=0.7)
+    except LLMUnavailable:
+        # Upstream unhealthy or over quota: fall back to a static tip (not cached)
+        return random.choice(recommendations[activity])
+    tip_cache.put(key, tip)
+    return tip
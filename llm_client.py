@@ -0,0 +1,257 @@
+# Shared client for every LLM call (app tips, streamed tips, warm-up, batch reports, API).
+#
+# - one pooled keep-alive HTTP session for the openai package
+# - token buckets sized to the requests-per-minute and tokens-per-minute quotas
+# - a cap on concurrent in-flight calls
+# - retries with full-jitter exponential backoff on 429s, 5xx and timeouts,
+#   honoring Retry-After
+# - a circuit breaker: after repeated failures calls fail fast with LLMUnavailable
+#   for a cool-down period, and callers fall back to static tips
+#
+#   python fake_llm_server.py --port 8765 --fail-rate 0.3 --fail-status 429 --delay 0.5
+#   OPENAI_API_BASE=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test python llm_client.py --requests 200 --concurrency 20
+import argparse
+import functools
+import os
+import random
+import threading
+import time
+
+from telemetry import increment, record_llm_call
+
+LLM_POOL_SIZE = int(os.getenv("JADE_LLM_POOL_SIZE", 16))
+LLM_RPM = float(os.getenv("JADE_LLM_RPM", 500))
+LLM_TPM = float(os.getenv("JADE_LLM_TPM", 40_000))
+LLM_MAX_CONCURRENCY = int(os.getenv("JADE_LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS = float(os.getenv("JADE_LLM_TIMEOUT_SECONDS", 30))
+LLM_MAX_RETRIES = int(os.getenv("JADE_LLM_MAX_RETRIES", 3))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+BREAKER_FAILURES = int(os.getenv("JADE_LLM_BREAKER_FAILURES", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("JADE_LLM_BREAKER_RESET_SECONDS", 30))
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+# The openai package, imported and configured on first use
+@functools.lru_cache(maxsize=None)
+def get_openai():
+    import openai
+    import requests
+    if openai.api_key is None:
+        openai.api_key = os.getenv("OPENAI_API_KEY")  # Replace with your actual API key
+    if openai.requestssession is None:
+        # One pooled session instead of a new connection per thread
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=LLM_POOL_SIZE, max_retries=2)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        openai.requestssession = session
+    return openai
+
+
+# Refills continuously at `per_minute`; holds at most one minute's worth
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Take `amount` tokens, waiting for them until `deadline` (time.monotonic()); False on timeout
+    def acquire(self, amount, deadline):
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                wait = (amount - self.tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_seconds else "half_open"
+
+    # Closed: every call goes through. Open: none do. Half-open: one trial call goes
+    # through, and its outcome closes or re-opens the breaker.
+    def allow(self):
+        with self._lock:
+            if self.state != "half_open":
+                return self.state == "closed"
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failures or self.opened_at is not None:
+                if self.opened_at is None:
+                    increment("jade_llm_circuit_opened_total")
+                self.opened_at = time.monotonic()
+
+
+def _retryable(error):
+    import openai
+    return isinstance(error, (openai.error.RateLimitError, openai.error.ServiceUnavailableError,
+                              openai.error.APIConnectionError, openai.error.Timeout, openai.error.TryAgain)) or (
+        isinstance(error, openai.error.APIError) and (error.http_status or 500) >= 500)
+
+
+def _retry_after(error):
+    try:
+        return float(getattr(error, "headers", {}).get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Rough token count for the TPM budget: ~4 characters per token plus the reply budget
+def estimate_tokens(messages, max_tokens):
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+
+class LLMClient:
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY,
+                 timeout=LLM_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES, breaker=None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+
+    @property
+    def available(self):
+        return self.breaker.state != "open"
+
+    def _create(self, deadline, **request):
+        if not self.breaker.allow():
+            increment("jade_llm_calls_total", (("outcome", "circuit_open"),))
+            raise LLMUnavailable("LLM circuit breaker is open")
+        estimate = estimate_tokens(request["messages"], request.get("max_tokens", 0))
+        for attempt in range(self.max_retries + 1):
+            if not (self.requests.acquire(1, deadline) and self.tokens.acquire(estimate, deadline)):
+                increment("jade_llm_calls_total", (("outcome", "rate_limited"),))
+                raise LLMUnavailable("LLM request budget exhausted")
+            start = time.perf_counter()
+            try:
+                response = get_openai().ChatCompletion.create(
+                    request_timeout=max(1.0, deadline - time.monotonic()), **request)
+                return response, start
+            except Exception as e:
+                record_llm_call(time.perf_counter() - start, outcome="error")
+                if not _retryable(e) or attempt == self.max_retries:
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(str(e)) from e
+                increment("jade_llm_retries_total")
+                backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                backoff = max(backoff, _retry_after(e) or 0)
+                if time.monotonic() + backoff > deadline:
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(str(e)) from e
+                time.sleep(backoff)
+
+    # Chat completion with retries; raises LLMUnavailable when it cannot get an answer
+    def chat(self, model, messages, max_tokens=100, temperature=0.7, timeout=None):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        if not self.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise LLMUnavailable("too many LLM calls in flight")
+        try:
+            response, start = self._create(deadline, model=model, messages=messages,
+                                           max_tokens=max_tokens, temperature=temperature)
+        finally:
+            self.slots.release()
+        self.breaker.record_success()
+        record_llm_call(time.perf_counter() - start, response.get('usage', {}).get('completion_tokens'))
+        return response['choices'][0]['message']['content'].strip()
+
+    # Streamed chat completion yielding content tokens. Retries only happen before the first token.
+    def stream(self, model, messages, max_tokens=100, temperature=0.7, timeout=None):
+        deadline = time.monotonic() + (timeout or self.timeout)
+        if not self.slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise LLMUnavailable("too many LLM calls in flight")
+        try:
+            response, start = self._create(deadline, model=model, messages=messages, max_tokens=max_tokens,
+                                           temperature=temperature, stream=True)
+            chunks = 0
+            try:
+                for chunk in response:
+                    token = chunk['choices'][0].get('delta', {}).get('content')
+                    if token:
+                        chunks += 1
+                        yield token
+            except Exception as e:
+                record_llm_call(time.perf_counter() - start, outcome="error")
+                self.breaker.record_failure()
+                raise LLMUnavailable(str(e)) from e
+            self.breaker.record_success()
+            # Streamed responses carry no usage block; each content chunk is one token
+            record_llm_call(time.perf_counter() - start, chunks)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        return {"breaker": self.breaker.state, "consecutive_failures": self.breaker.consecutive_failures,
+                "request_budget": self.requests.tokens, "token_budget": self.tokens.tokens}
+
+
+# Process-wide client shared by every caller
+@functools.lru_cache(maxsize=None)
+def get_llm_client():
+    return LLMClient()
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    parser = argparse.ArgumentParser(description="Fire a burst of tip requests through the LLM client")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-4"))
+    args = parser.parse_args()
+
+    client = get_llm_client()
+    messages = [{"role": "user", "content": "Provide a water-saving tip for Shower."}]
+
+    def call(_):
+        start = time.perf_counter()
+        try:
+            client.chat(args.model, messages)
+            outcome = "ok"
+        except LLMUnavailable:
+            outcome = "unavailable"
+        return outcome, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(seconds for _, seconds in results)
+    ok = sum(outcome == "ok" for outcome, _ in results)
+    print(f"{ok}/{args.requests} succeeded in {elapsed:.2f}s, "
+          f"p50 {1000 * latencies[len(latencies) // 2]:.0f} ms, p99 {1000 * latencies[int(0.99 * (len(latencies) - 1))]:.0f} ms")
+    print(client.stats())
@@ -0,0 +1,309 @@
+# Live meter ingestion with fixed-memory rolling aggregates.
+#
+# Readings arrive as (household_id, fixture, timestamp, gallons) events, either put on
+# an in-process queue or sent as JSON lines over UDP. Each rolling window is a ring of
+# time buckets per household and fixture (60 x 1 minute, 24 x 1 hour, 7 x 1 day), with a
+# running total kept next to it. Adding a reading touches one bucket and one total, and
+# rolling the clock forward clears only the buckets that fell out of the window, so
+# reading the current hour/day/week never rescans history.
+#
+# The arrays grow with the households actually seen, up to max_households (readings for
+# further households are dropped). Each tracked household takes fixtures x 91 float32
+# buckets plus 3 float64 totals, about 3.5 KB with 9 fixtures, so 100,000 households
+# need about 350 MB.
+#
+#   python meter_stream.py bench --events 5000000
+#   python meter_stream.py simulate --port 9999 --households 1000   (feeds JADE_LIVE_METERS=udp)
+import argparse
+import json
+import logging
+import math
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+# name -> (bucket width in seconds, number of buckets)
+WINDOWS = {
+    "hour": (60, 60),
+    "day": (3600, 24),
+    "week": (86400, 7),
+}
+MIN_CAPACITY = 1024
+
+logger = logging.getLogger(__name__)
+
+
+class RollingAggregates:
+    def __init__(self, fixtures, max_households=100_000):
+        self.fixtures = list(fixtures)
+        self.fixture_index = {fixture: i for i, fixture in enumerate(self.fixtures)}
+        self.max_households = max_households
+        self.household_index = {}
+        self.events = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._capacity = 0
+        shape = (0, len(self.fixtures))
+        self._buckets = {name: np.zeros(shape + (count,), dtype=np.float32) for name, (_, count) in WINDOWS.items()}
+        self._totals = {name: np.zeros(shape, dtype=np.float64) for name in WINDOWS}
+        self._heads = dict.fromkeys(WINDOWS)
+
+    # Make room for `households` rows, doubling the arrays up to max_households
+    def _grow(self, households):
+        if households <= self._capacity:
+            return
+        capacity = min(self.max_households, max(households, 2 * self._capacity, MIN_CAPACITY))
+        for name in WINDOWS:
+            for arrays in (self._buckets, self._totals):
+                grown = np.zeros((capacity,) + arrays[name].shape[1:], dtype=arrays[name].dtype)
+                grown[:self._capacity] = arrays[name]
+                arrays[name] = grown
+        self._capacity = capacity
+
+    def _rows(self, household_ids):
+        rows = np.empty(len(household_ids), dtype=np.int64)
+        for i, household_id in enumerate(household_ids):
+            row = self.household_index.get(household_id)
+            if row is None:
+                if len(self.household_index) >= self.max_households:
+                    row = -1
+                else:
+                    row = self.household_index[household_id] = len(self.household_index)
+            rows[i] = row
+        return rows
+
+    # Move a window's clock to bucket `head`, clearing the buckets that fall out of it
+    def _advance(self, name, head):
+        current = self._heads[name]
+        count = WINDOWS[name][1]
+        if current is None:
+            self._heads[name] = head
+            return
+        if head <= current:
+            return
+        buckets, totals = self._buckets[name], self._totals[name]
+        for bucket in range(max(current + 1, head - count + 1), head + 1):
+            slot = bucket % count
+            totals -= buckets[:, :, slot]
+            buckets[:, :, slot] = 0
+        # Buckets are float32, so keep rounding from pushing an emptied total below zero
+        np.maximum(totals, 0, out=totals)
+        self._heads[name] = head
+
+    # Add a batch of readings; arrays (or lists) of equal length
+    def add_batch(self, household_ids, fixtures, timestamps, gallons):
+        if len(household_ids) == 0:
+            return
+        fixture_columns = np.fromiter((self.fixture_index.get(f, -1) for f in fixtures), dtype=np.int64, count=len(fixtures))
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        gallons = np.asarray(gallons, dtype=np.float64)
+        with self._lock:
+            rows = self._rows(household_ids)
+            self._grow(len(self.household_index))
+            valid = (rows >= 0) & (fixture_columns >= 0)
+            for name, (width, count) in WINDOWS.items():
+                bucket_ids = (timestamps // width).astype(np.int64)
+                self._advance(name, int(bucket_ids.max()))
+                # Readings older than the window are dropped for that window only
+                keep = valid & (bucket_ids > self._heads[name] - count)
+                slots = bucket_ids[keep] % count
+                np.add.at(self._buckets[name], (rows[keep], fixture_columns[keep], slots), gallons[keep])
+                np.add.at(self._totals[name], (rows[keep], fixture_columns[keep]), gallons[keep])
+            self.events += int(valid.sum())
+            self.dropped += int((~valid).sum())
+
+    def add(self, household_id, fixture, timestamp, gallons):
+        self.add_batch([household_id], [fixture], [timestamp], [gallons])
+
+    # Roll every window forward to `now` so idle households age out of the totals
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for name, (width, _) in WINDOWS.items():
+                self._advance(name, int(now // width))
+
+    # Current window totals per fixture for one household
+    def household_totals(self, household_id, window="hour"):
+        row = self.household_index.get(household_id)
+        if row is None:
+            return dict.fromkeys(self.fixtures, 0.0)
+        totals = self._totals[window][row]
+        return {fixture: float(totals[i]) for i, fixture in enumerate(self.fixtures)}
+
+    # Current window totals per fixture summed over all households
+    def fleet_totals(self, window="hour"):
+        totals = self._totals[window].sum(axis=0)
+        return {fixture: float(totals[i]) for i, fixture in enumerate(self.fixtures)}
+
+
+# Consumes event batches from a queue on a background thread
+class MeterIngestor:
+    def __init__(self, aggregates, events=None):
+        self.aggregates = aggregates
+        self.events = events if events is not None else queue.Queue(maxsize=10_000)
+        self._listeners = []
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self.events.get()
+            if batch is None:
+                return
+            # A bad batch is dropped; it must not stop ingestion for the rest of the process
+            try:
+                self.aggregates.add_batch(*zip(*batch))
+            except (ValueError, TypeError) as e:
+                logger.warning("Dropped a batch of %d meter readings: %s", len(batch), e)
+
+    # Stop the UDP listeners (releasing their ports) and the consumer thread
+    def stop(self):
+        self._closed.set()
+        for sock, thread in self._listeners:
+            thread.join()
+            sock.close()
+        self.events.put(None)
+        self._thread.join()
+
+    # Receive JSON-lines readings over UDP, one or more events per datagram:
+    # {"household": 1, "fixture": "Shower", "ts": 1700000000.0, "gallons": 2.5}
+    # Malformed lines, and readings with a non-integer household, a non-string fixture or
+    # a non-finite timestamp or volume, are skipped.
+    def listen_udp(self, port, host="127.0.0.1"):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        # A blocked recvfrom isn't woken by close(), so poll for stop() instead
+        sock.settimeout(0.5)
+
+        def receive():
+            while not self._closed.is_set():
+                try:
+                    payload, _ = sock.recvfrom(65535)
+                except socket.timeout:
+                    continue
+                batch = []
+                for line in payload.decode(errors="replace").splitlines():
+                    try:
+                        reading = _parse_reading(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    batch.append(reading)
+                if batch:
+                    self.events.put(batch)
+
+        thread = threading.Thread(target=receive, daemon=True)
+        thread.start()
+        self._listeners.append((sock, thread))
+        return sock
+
+
+# (household, fixture, timestamp, gallons) from a decoded UDP event; raises ValueError,
+# KeyError or TypeError for a malformed one
+def _parse_reading(event):
+    household, fixture = event["household"], event["fixture"]
+    if isinstance(household, bool) or not isinstance(household, int) or not isinstance(fixture, str):
+        raise TypeError("household must be an integer and fixture a string")
+    timestamp, gallons = float(event["ts"]), float(event["gallons"])
+    if not (math.isfinite(timestamp) and math.isfinite(gallons)):
+        raise ValueError("ts and gallons must be finite")
+    return household, fixture, timestamp, gallons
+
+
+# Stand-in for real meters: batches of readings for random households and fixtures
+def simulate_readings(household_ids, fixtures, batch_size=1000, start=None, events_per_second=None, seed=0):
+    rng = np.random.default_rng(seed)
+    household_ids = np.asarray(household_ids)
+    fixtures = list(fixtures)
+    now = time.time() if start is None else start
+    while True:
+        households = household_ids[rng.integers(0, len(household_ids), batch_size)].tolist()
+        fixture_names = [fixtures[i] for i in rng.integers(0, len(fixtures), batch_size)]
+        if events_per_second:
+            time.sleep(batch_size / events_per_second)
+            now = time.time()
+            timestamps = np.full(batch_size, now)
+        else:
+            timestamps = now + np.sort(rng.uniform(0, 1, batch_size))
+            now += 1
+        gallons = rng.gamma(2.0, 0.5, batch_size).round(2)
+        yield list(zip(households, fixture_names, timestamps.tolist(), gallons.tolist()))
+
+
+# Rolling aggregates fed by an ingestor on background threads; stop() ends them all
+class MeterPipeline:
+    def __init__(self, aggregates):
+        self.aggregates = aggregates
+        self.ingestor = MeterIngestor(aggregates)
+        self._stopped = threading.Event()
+        self._feeder = None
+
+    # Feed simulated readings for `household_ids` from a background thread
+    def simulate(self, household_ids, fixtures, events_per_second=200):
+        def feed():
+            for batch in simulate_readings(household_ids, fixtures, batch_size=50, events_per_second=events_per_second):
+                if self._stopped.is_set():
+                    return
+                self.ingestor.events.put(batch)
+
+        self._feeder = threading.Thread(target=feed, daemon=True)
+        self._feeder.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._feeder is not None:
+            self._feeder.join()
+        self.ingestor.stop()
+
+
+def start_simulated_pipeline(household_ids, fixtures, events_per_second=200, max_households=None):
+    pipeline = MeterPipeline(RollingAggregates(fixtures, max_households or len(household_ids)))
+    pipeline.simulate(household_ids, fixtures, events_per_second)
+    return pipeline
+
+
+# Aggregates of readings sent to a UDP port, e.g. by `python meter_stream.py simulate`
+def start_udp_pipeline(fixtures, port, host="127.0.0.1", max_households=100_000):
+    pipeline = MeterPipeline(RollingAggregates(fixtures, max_households))
+    pipeline.ingestor.listen_udp(port, host)
+    return pipeline
+
+
+def benchmark(num_events, households=10_000, batch_size=10_000):
+    fixtures = ["Shower", "Garden", "Car Wash", "Laundry", "Dishwashing"]
+    aggregates = RollingAggregates(fixtures, households)
+    readings = simulate_readings(range(1, households + 1), fixtures, batch_size=batch_size)
+    batches = [next(readings) for _ in range(max(1, num_events // batch_size))]
+    columns = [tuple(zip(*batch)) for batch in batches]
+
+    start = time.perf_counter()
+    for batch in columns:
+        aggregates.add_batch(*batch)
+    elapsed = time.perf_counter() - start
+    return {"events": aggregates.events, "seconds": elapsed, "events_per_second": aggregates.events / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Meter ingestion benchmark and simulator")
+    parser.add_argument("command", choices=["bench", "simulate"])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--households", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--rate", type=float, default=1000, help="simulated events per second")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        result = benchmark(args.events, args.households, args.batch_size)
+        print(f"Ingested {result['events']:,} events in {result['seconds']:.2f}s "
+              f"({result['events_per_second']:,.0f} events/s)")
+    else:
+        # Send simulated readings to a listening ingestor over UDP
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        fixtures = ["Shower", "Garden", "Car Wash", "Laundry", "Dishwashing"]
+        for batch in simulate_readings(range(1, args.households + 1), fixtures, batch_size=50, events_per_second=args.rate):
+            lines = [json.dumps({"household": h, "fixture": f, "ts": ts, "gallons": g}) for h, f, ts, g in batch]
+            sock.sendto("\n".join(lines).encode(), ("127.0.0.1", args.port))
@@ -0,0 +1,23 @@
+# Ordered process-pool map with bounded memory, for chunked jobs (synthetic data,
+# batch reports) whose results are large.
+import collections
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Yield fn(*args) for each tuple in `arguments`, in order. With workers > 1 the calls run
+# in a process pool, keeping at most 2 * workers results in flight so memory stays
+# bounded; otherwise they run inline.
+def ordered_pool_map(fn, arguments, workers=1):
+    if workers <= 1:
+        for args in arguments:
+            yield fn(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque()
+        for args in arguments:
+            pending.append(pool.submit(fn, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,90 @@
+import threading
+
+import numpy as np
+
+from insights import GROUP_COLUMNS, groupings
+
+# Pending values are merged into the sorted arrays once a buffer reaches this
+# size (or 1% of the group, whichever is larger)
+MIN_MERGE_SIZE = 1024
+
+
+# Sorted usage arrays for the whole population and for every Zip_Code / Household_Size
+# group, so a percentile lookup is a dictionary read plus a binary search.
+# New households go into small sorted buffers that are merged in once they grow,
+# keeping ingestion incremental. A lock keeps readers from seeing a merged array while
+# its pending buffer is still in place (or gone before the merge is published).
+class PercentileIndex:
+    def __init__(self, data, value_column):
+        self.value_column = value_column
+        self.group_columns = [column for column in GROUP_COLUMNS if column in data.columns]
+        self._sorted = {}
+        self._pending = {}
+        self._groupings = groupings(data)
+        self._lock = threading.Lock()
+
+        values = data[value_column].to_numpy(dtype=np.float64)
+        for grouping in self._groupings:
+            if not grouping:
+                self._sorted[((), ())] = np.sort(values)
+                continue
+            for key, positions in data.groupby(list(grouping), observed=True).indices.items():
+                key = key if isinstance(key, tuple) else (key,)
+                self._sorted[(grouping, self._normalize(key))] = np.sort(values[positions])
+
+    @staticmethod
+    def _normalize(key):
+        return tuple(value.item() if isinstance(value, np.generic) else value for value in key)
+
+    def _key(self, zip_code, household_size):
+        filters = {"Zip_Code": zip_code, "Household_Size": household_size}
+        grouping = tuple(column for column in self.group_columns if filters[column] is not None)
+        return grouping, tuple(filters[column] for column in grouping)
+
+    # Number of households in a group
+    def count(self, zip_code=None, household_size=None):
+        key = self._key(zip_code, household_size)
+        with self._lock:
+            return len(self._sorted.get(key, ())) + len(self._pending.get(key, ()))
+
+    # Percentage of households (overall or within a group) using less than `value`;
+    # None when the group is empty
+    def percentile(self, value, zip_code=None, household_size=None):
+        key = self._key(zip_code, household_size)
+        with self._lock:
+            main, pending = self._sorted.get(key), self._pending.get(key)
+        total = (0 if main is None else len(main)) + (0 if pending is None else len(pending))
+        if total == 0:
+            return None
+        below = 0
+        if main is not None:
+            below += int(np.searchsorted(main, value, side="left"))
+        if pending is not None:
+            below += int(np.searchsorted(pending, value, side="left"))
+        return 100.0 * below / total
+
+    # Add newly ingested households (a DataFrame with the value and group columns)
+    def add(self, new_rows):
+        values = new_rows[self.value_column].to_numpy(dtype=np.float64)
+        for grouping in self._groupings:
+            if not grouping:
+                self._add_values(((), ()), values)
+                continue
+            for key, positions in new_rows.groupby(list(grouping), observed=True).indices.items():
+                key = key if isinstance(key, tuple) else (key,)
+                self._add_values((grouping, self._normalize(key)), values[positions])
+
+    def _add_values(self, key, values):
+        pending = self._pending.get(key)
+        pending = np.sort(values) if pending is None else np.sort(np.concatenate([pending, values]))
+        main = self._sorted.get(key)
+        main_size = 0 if main is None else len(main)
+        if len(pending) >= max(MIN_MERGE_SIZE, main_size // 100):
+            # Both inputs are sorted runs, which the stable sort merges in linear time
+            merged = pending if main is None else np.sort(np.concatenate([main, pending]), kind="stable")
+            with self._lock:
+                self._pending.pop(key, None)
+                self._sorted[key] = merged
+        else:
+            with self._lock:
+                self._pending[key] = pending
@@ -0,0 +1,96 @@
+# Per-household savings opportunities, precomputed for every household in one pass.
+#
+# For each household and fixture the excess over the mean of its peers (same Zip_Code
+# and Household_Size where the dataset has them) is stored in an (households x
+# fixtures) float32 array, with the fixtures ranked by that excess in a uint8 array.
+# Peer means live in a small (groups x fixtures) table indexed by each household's
+# group id. A Household_ID -> row lookup is a direct array index when IDs are dense
+# integers (a dict otherwise), so a household's top opportunities are an O(1) read.
+import numpy as np
+
+from anomalies import peer_group_means, peer_groups
+from insights import GROUP_COLUMNS, fixture_columns, household_id_column
+
+# Integer IDs are indexed through a dense array while max ID <= this factor x households
+DENSE_ID_FACTOR = 4
+
+
+class HouseholdOpportunities:
+    def __init__(self, data):
+        columns = fixture_columns(data)
+        self.fixtures = list(columns)
+        self.group_columns = [column for column in GROUP_COLUMNS if column in data.columns]
+        usage = data[list(columns.values())].to_numpy(dtype=np.float64)
+
+        groups = peer_groups(data)
+        self.group_means = peer_group_means(usage, groups).astype(np.float32)
+        _, first_rows = np.unique(groups, return_index=True)
+        key_columns = [data[column].to_numpy()[first_rows].tolist() for column in self.group_columns]
+        self.group_keys = list(zip(*key_columns)) if key_columns else [()] * len(first_rows)
+
+        self.groups = groups.astype(np.int32)
+        self.excess = (usage - self.group_means[groups]).astype(np.float32)
+        self.ranking = np.argsort(-self.excess, axis=1, kind="stable").astype(np.uint8)
+        self._index_ids(data[household_id_column(data)].to_numpy())
+
+    def _index_ids(self, ids):
+        self._positions = None
+        self._position_map = None
+        if np.issubdtype(ids.dtype, np.integer) and len(ids) and ids.min() >= 0 \
+                and ids.max() < DENSE_ID_FACTOR * len(ids) + 1024:
+            self._positions = np.full(int(ids.max()) + 1, -1, dtype=np.int64)
+            self._positions[ids] = np.arange(len(ids))
+        else:
+            self._position_map = {household_id: row for row, household_id in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.groups)
+
+    # Row of a household, or None when the ID is not in the dataset. Numeric strings
+    # (e.g. from a URL) match integer IDs.
+    def position(self, household_id):
+        if self._positions is not None:
+            try:
+                household_id = int(household_id)
+            except (ValueError, TypeError):
+                return None
+            if not 0 <= household_id < len(self._positions):
+                return None
+            row = int(self._positions[household_id])
+            return row if row >= 0 else None
+        row = self._position_map.get(household_id)
+        if row is None and isinstance(household_id, str) and household_id.isdigit():
+            row = self._position_map.get(int(household_id))
+        return row
+
+    # Peer-group values for a household, e.g. {"Zip_Code": "90001", "Household_Size": 3}
+    def peer_group(self, household_id):
+        row = self.position(household_id)
+        if row is None:
+            return None
+        return dict(zip(self.group_columns, self.group_keys[self.groups[row]]))
+
+    # Up to k fixtures where the household uses the most above its peers, largest first
+    def top(self, household_id, k=3):
+        row = self.position(household_id)
+        if row is None:
+            return []
+        group = self.groups[row]
+        result = []
+        for fixture_index in self.ranking[row, :k]:
+            excess = float(self.excess[row, fixture_index])
+            if excess <= 0:
+                break
+            peer_mean = float(self.group_means[group, fixture_index])
+            result.append({
+                "fixture": self.fixtures[fixture_index],
+                "usage": peer_mean + excess,
+                "peer_mean": peer_mean,
+                "excess_gallons": excess,
+            })
+        return result
+
+    @property
+    def nbytes(self):
+        lookup = self._positions.nbytes if self._positions is not None else 0
+        return self.excess.nbytes + self.ranking.nbytes + self.groups.nbytes + self.group_means.nbytes + lookup
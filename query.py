@@ -0,0 +1,255 @@
+# Ad-hoc SQL slices of the household data with DuckDB, without loading it into pandas.
+#
+# Filters and column lists are compiled into the SQL, so DuckDB reads only the columns a
+# query needs and skips Parquet row groups whose min/max statistics rule them out.
+# `cluster_households` rewrites a dataset sorted by Zip_Code, Household_Size and
+# Household_ID in small row groups, which turns those statistics into an index on the
+# three keys. Results come back as Arrow record batches, so memory is bounded by the
+# batch size rather than the result size; sorts and aggregations larger than
+# JADE_QUERY_MEMORY_LIMIT spill to disk.
+#
+#   python query.py cluster --source households.parquet --out households_by_zip.parquet
+#   python query.py select --source households_by_zip.parquet --where Household_Size=4 \
+#       --where Zip_Code=90003 --where "Garden_Usage_Gallons>60" --columns Household_ID Garden_Usage_Gallons
+import argparse
+import os
+import re
+import sys
+
+from atomic import atomic_write
+from data_sources import meter_csv_parquet
+from insights import GROUP_COLUMNS
+from telemetry import span
+from tip_cache import CACHE_DIR
+
+QUERY_MEMORY_LIMIT = os.getenv("JADE_QUERY_MEMORY_LIMIT", "1GB")
+QUERY_SPILL_DIR = os.path.join(CACHE_DIR, "duckdb_spill")
+BATCH_ROWS = 65_536
+# Small row groups give the sorted keys fine-grained min/max statistics to prune on
+CLUSTER_ROW_GROUP_ROWS = 16_384
+CLUSTER_KEYS = GROUP_COLUMNS + ["Household_ID"]
+OPERATORS = {"=": "=", "==": "=", "!=": "<>", "<": "<", "<=": "<=", ">": ">", ">=": ">=", "in": "IN", "between": "BETWEEN"}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+# SQL that scans a Parquet file, a directory of Parquet parts (e.g. batch_report
+# output) or a glob; meter CSVs are scanned through their columnar cache file
+def scan_sql(source):
+    if source.endswith(".csv"):
+        source, _ = meter_csv_parquet(source)
+    elif os.path.isdir(source):
+        source = os.path.join(source, "**", "*.parquet")
+    return f"read_parquet({_literal(source)})"
+
+
+class HouseholdQuery:
+    # Either a file `source` (see scan_sql) or an in-memory DataFrame `data`
+    def __init__(self, source=None, data=None, memory_limit=QUERY_MEMORY_LIMIT, threads=None):
+        import duckdb
+
+        if (source is None) == (data is None):
+            raise ValueError("pass exactly one of source or data")
+        self._connection = duckdb.connect()
+        self._connection.execute(f"SET memory_limit = {_literal(memory_limit)}")
+        self._connection.execute(f"SET temp_directory = {_literal(QUERY_SPILL_DIR)}")
+        if threads:
+            self._connection.execute(f"SET threads = {int(threads)}")
+        self._data = data
+        if source is not None:
+            self._connection.execute(f"CREATE VIEW households AS SELECT * FROM {scan_sql(source)}")
+        cursor = self._cursor()
+        try:
+            self.columns = {name: column_type for name, column_type, *_ in
+                            cursor.execute("DESCRIBE SELECT * FROM households").fetchall()}
+        finally:
+            cursor.close()
+
+    # Cursors are per-thread connections; an in-memory DataFrame is registered on each
+    def _cursor(self):
+        cursor = self._connection.cursor()
+        if self._data is not None:
+            cursor.register("households", self._data)
+        return cursor
+
+    def _column(self, name):
+        if name not in self.columns:
+            raise QueryError(f"unknown column {name!r}; expected one of {', '.join(self.columns)}")
+        return _quote(name)
+
+    # WHERE clause and parameters for filters given as (column, operator, value) tuples
+    # or a {column: value} dict of equality filters. Columns and operators are checked
+    # against whitelists and values are always bound as parameters.
+    def where(self, filters):
+        if isinstance(filters, dict):
+            filters = [(column, "=", value) for column, value in filters.items()]
+        clauses, params = [], []
+        for column, operator, value in filters or ():
+            sql_operator = OPERATORS.get(str(operator).lower())
+            if sql_operator is None:
+                raise QueryError(f"unsupported operator {operator!r}")
+            if sql_operator == "IN":
+                values = list(value)
+                if not values:
+                    raise QueryError(f"empty IN list for {column}")
+                clauses.append(f"{self._column(column)} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            elif sql_operator == "BETWEEN":
+                low, high = value
+                clauses.append(f"{self._column(column)} BETWEEN ? AND ?")
+                params.extend([low, high])
+            else:
+                clauses.append(f"{self._column(column)} {sql_operator} ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _select_sql(self, columns, filters, order_by, limit):
+        projection = ", ".join(self._column(column) for column in columns) if columns else "*"
+        where, params = self.where(filters)
+        sql = f"SELECT {projection} FROM households{where}"
+        if order_by:
+            # "-Column" sorts descending
+            sql += " ORDER BY " + ", ".join(
+                f"{self._column(column.lstrip('-'))} {'DESC' if column.startswith('-') else 'ASC'}"
+                for column in order_by)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, params
+
+    # Matching rows as a stream of pyarrow RecordBatches of at most `batch_rows` rows
+    def batches(self, columns=None, filters=(), order_by=None, limit=None, batch_rows=BATCH_ROWS):
+        sql, params = self._select_sql(columns, filters, order_by, limit)
+        cursor = self._cursor()
+        try:
+            with span("query/select"):
+                result = cursor.execute(sql, params)
+                # to_arrow_reader replaced fetch_record_batch in DuckDB 1.4
+                reader = (result.to_arrow_reader if hasattr(result, "to_arrow_reader")
+                          else result.fetch_record_batch)(batch_rows)
+            for batch in reader:
+                yield batch
+        finally:
+            cursor.close()
+
+    # Matching rows as one DataFrame; use `limit` or batches() for large results
+    def frame(self, columns=None, filters=(), order_by=None, limit=None):
+        sql, params = self._select_sql(columns, filters, order_by, limit)
+        cursor = self._cursor()
+        try:
+            with span("query/frame"):
+                return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+
+    def count(self, filters=()):
+        where, params = self.where(filters)
+        cursor = self._cursor()
+        try:
+            with span("query/count"):
+                return cursor.execute(f"SELECT count(*) FROM households{where}", params).fetchone()[0]
+        finally:
+            cursor.close()
+
+    # Household count and mean of `value_columns` per `group_by` group, computed in DuckDB
+    def aggregate(self, value_columns, group_by=(), filters=()):
+        where, params = self.where(filters)
+        keys = [self._column(column) for column in group_by]
+        measures = ["count(*) AS Households"] + [f"avg({self._column(column)}) AS {_quote(column)}"
+                                                 for column in value_columns]
+        sql = f"SELECT {', '.join(keys + measures)} FROM households{where}"
+        if keys:
+            sql += f" GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}"
+        cursor = self._cursor()
+        try:
+            with span("query/aggregate"):
+                return cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+
+    def close(self):
+        self._connection.close()
+
+    # DuckDB's physical plan, to check that filters reach the Parquet scan
+    def explain(self, columns=None, filters=()):
+        sql, params = self._select_sql(columns, filters, None, None)
+        cursor = self._cursor()
+        try:
+            return "\n".join(row[1] for row in cursor.execute(f"EXPLAIN {sql}", params).fetchall())
+        finally:
+            cursor.close()
+
+
+# Rewrite `source` as one Parquet file sorted by zip code, household size and ID
+def cluster_households(source, out_path, row_group_rows=CLUSTER_ROW_GROUP_ROWS, memory_limit=QUERY_MEMORY_LIMIT):
+    query = HouseholdQuery(source, memory_limit=memory_limit)
+    keys = [_quote(column) for column in CLUSTER_KEYS if column in query.columns]
+    order = f" ORDER BY {', '.join(keys)}" if keys else ""
+    cursor = query._cursor()
+    try:
+        with atomic_write(out_path) as tmp_path:
+            cursor.execute(f"COPY (SELECT * FROM households{order}) TO {_literal(tmp_path)} "
+                           f"(FORMAT parquet, ROW_GROUP_SIZE {int(row_group_rows)})")
+    finally:
+        cursor.close()
+
+
+# "Zip_Code=90003", "Garden_Usage_Gallons>60" -> (column, operator, value)
+def parse_filter(text, columns):
+    match = re.match(r"^\s*(.+?)\s*(>=|<=|!=|==|=|>|<)\s*(.+?)\s*$", text)
+    if match is None:
+        raise QueryError(f"cannot parse filter {text!r}; expected e.g. Household_Size=4")
+    column, operator, value = match.groups()
+    column_type = columns.get(column, "")
+    if column_type in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT"):
+        value = int(value)
+    elif column_type in ("FLOAT", "DOUBLE") or column_type.startswith("DECIMAL"):
+        value = float(value)
+    return column, operator, value
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query household data with DuckDB")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cluster_parser = commands.add_parser("cluster", help="write a copy sorted by zip code, household size and ID")
+    cluster_parser.add_argument("--source", required=True)
+    cluster_parser.add_argument("--out", required=True)
+    cluster_parser.add_argument("--row-group-rows", type=int, default=CLUSTER_ROW_GROUP_ROWS)
+    select_parser = commands.add_parser("select", help="stream matching rows as CSV")
+    select_parser.add_argument("--source", required=True)
+    select_parser.add_argument("--where", action="append", default=[], help="e.g. Household_Size=4 (repeatable)")
+    select_parser.add_argument("--columns", nargs="+")
+    select_parser.add_argument("--order-by", nargs="+", help="columns; prefix with - for descending")
+    select_parser.add_argument("--limit", type=int)
+    select_parser.add_argument("--explain", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "cluster":
+        cluster_households(args.source, args.out, args.row_group_rows)
+    else:
+        import pyarrow.csv as pa_csv
+
+        query = HouseholdQuery(args.source)
+        try:
+            filters = [parse_filter(text, query.columns) for text in args.where]
+            if args.explain:
+                print(query.explain(args.columns, filters))
+            else:
+                writer = None
+                for batch in query.batches(args.columns, filters, args.order_by, args.limit):
+                    if writer is None:
+                        writer = pa_csv.CSVWriter(sys.stdout.buffer, batch.schema)
+                    writer.write_batch(batch)
+                if writer is not None:
+                    writer.close()
+        except QueryError as e:
+            parser.error(str(e))
@@ -0,0 +1,161 @@
+# Population-wide what-if savings simulator.
+#
+# A rate structure is a plain dict:
+#   {"tiers": [[upper_gallons_per_bill or None, price_per_gallon], ...],
+#    "fixed_charge": dollars per bill, "surcharge": fraction (0.2 = +20% drought surcharge),
+#    "billing_days": 30}
+# A scenario maps fixture names to fractional usage changes, e.g. {"Shower": -0.2}.
+# Every household is billed at once with NumPy broadcasting; results are cached per
+# (rates, scenario) hash so the UI can flip between scenarios without recomputing.
+# The prepared arrays are shared across sessions and request threads, so the caches are
+# guarded by a lock; simulations themselves run concurrently.
+import collections
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from anomalies import total_column
+from insights import fixture_columns
+
+DEFAULT_RATES = {"tiers": [[None, 0.01065]], "fixed_charge": 0.0, "surcharge": 0.0, "billing_days": 30}
+MAX_CACHED_RESULTS = 32
+# Baseline bills are one float per household, so only a few rate structures are kept
+MAX_CACHED_BASELINES = 2
+
+
+def scenario_hash(rates, scenario):
+    payload = json.dumps({"rates": rates, "scenario": scenario}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+# Arrays the simulator needs, extracted once per dataset version
+def prepare_simulation(data):
+    columns = fixture_columns(data)
+    total = total_column(data)
+    usage = data[list(columns.values())].to_numpy(dtype=np.float64)
+    totals = data[total].to_numpy(dtype=np.float64) if total else usage.sum(axis=1)
+    if "Zip_Code" in data.columns:
+        zip_codes, zip_labels = pd.factorize(data["Zip_Code"], sort=True)
+    else:
+        zip_codes, zip_labels = np.zeros(len(data), dtype=np.int64), np.array(["All"])
+    return {
+        "fixtures": list(columns),
+        "usage": usage,
+        "totals": totals,
+        "zip_codes": zip_codes,
+        "zip_labels": [str(label) for label in zip_labels],
+        "results": collections.OrderedDict(),
+        "baseline_bills": collections.OrderedDict(),
+        "lock": threading.Lock(),
+    }
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+
+# Raise ValueError unless `rates` is a complete rate structure as described above: tiers
+# with increasing upper limits (only the last may be None) and non-negative prices
+def check_rates(rates):
+    unknown = set(rates) - set(DEFAULT_RATES)
+    if unknown:
+        raise ValueError(f"unknown rate fields: {', '.join(sorted(unknown))}")
+    tiers = rates.get("tiers")
+    if not isinstance(tiers, list) or not tiers:
+        raise ValueError("tiers must be a non-empty list of [upper_gallons or null, price_per_gallon]")
+    lower = 0.0
+    for i, tier in enumerate(tiers):
+        if not isinstance(tier, (list, tuple)) or len(tier) != 2:
+            raise ValueError("each tier must be [upper_gallons or null, price_per_gallon]")
+        upper, price = tier
+        if not _is_number(price) or price < 0:
+            raise ValueError("tier prices must be non-negative numbers")
+        if upper is None:
+            if i != len(tiers) - 1:
+                raise ValueError("only the last tier may have no upper limit")
+        elif not _is_number(upper) or upper <= lower:
+            raise ValueError("tier upper limits must be increasing positive numbers")
+        else:
+            lower = upper
+    for name in ("fixed_charge", "surcharge", "billing_days"):
+        if not _is_number(rates.get(name, DEFAULT_RATES[name])):
+            raise ValueError(f"{name} must be a number")
+    if rates.get("billing_days", DEFAULT_RATES["billing_days"]) <= 0:
+        raise ValueError("billing_days must be positive")
+
+
+# Bill per household for an array of gallons per billing period
+# (in-place arithmetic on one scratch buffer keeps 10M-row passes cheap)
+def compute_bills(gallons, rates):
+    cost = np.zeros_like(gallons)
+    scratch = np.empty_like(gallons)
+    lower = 0.0
+    for upper, price in rates["tiers"]:
+        np.subtract(gallons, lower, out=scratch)
+        np.clip(scratch, 0, np.inf if upper is None else upper - lower, out=scratch)
+        scratch *= price
+        cost += scratch
+        if upper is None:
+            break
+        lower = upper
+    cost *= 1 + rates.get("surcharge", 0.0)
+    cost += rates.get("fixed_charge", 0.0)
+    return cost
+
+
+def simulate(prepared, rates=DEFAULT_RATES, scenario=None):
+    scenario = scenario or {}
+    key = scenario_hash(rates, scenario)
+    results, lock = prepared["results"], prepared["lock"]
+    with lock:
+        if key in results:
+            results.move_to_end(key)
+            return results[key]
+
+    changes = np.array([scenario.get(fixture, 0.0) for fixture in prepared["fixtures"]])
+    daily_before = prepared["totals"]
+    daily_after = np.maximum(daily_before + prepared["usage"] @ changes, 0)
+
+    billing_days = rates.get("billing_days", 30)
+    # The baseline bill only depends on the rates, so scenarios under the same rates share it
+    baselines = prepared["baseline_bills"]
+    rates_key = scenario_hash(rates, None)
+    with lock:
+        bill_before = baselines.get(rates_key)
+        if bill_before is not None:
+            baselines.move_to_end(rates_key)
+    if bill_before is None:
+        bill_before = compute_bills(daily_before * billing_days, rates)
+        with lock:
+            baselines[rates_key] = bill_before
+            if len(baselines) > MAX_CACHED_BASELINES:
+                baselines.popitem(last=False)
+    bill_after = compute_bills(daily_after * billing_days, rates)
+
+    zip_codes, zip_count = prepared["zip_codes"], len(prepared["zip_labels"])
+    by_zip = pd.DataFrame({
+        "Zip_Code": prepared["zip_labels"],
+        "Households": np.bincount(zip_codes, minlength=zip_count),
+        "Gallons_Saved_Per_Day": np.bincount(zip_codes, daily_before - daily_after, zip_count),
+        "Bill_Before": np.bincount(zip_codes, bill_before, zip_count),
+        "Bill_After": np.bincount(zip_codes, bill_after, zip_count),
+    })
+    by_zip["Bill_Savings"] = by_zip["Bill_Before"] - by_zip["Bill_After"]
+
+    result = {
+        "hash": key,
+        "households": len(daily_before),
+        "gallons_saved_per_day": float((daily_before - daily_after).sum()),
+        "bill_before": float(bill_before.sum()),
+        "bill_after": float(bill_after.sum()),
+        "bill_savings": float((bill_before - bill_after).sum()),
+        "by_zip": by_zip,
+    }
+    with lock:
+        results[key] = result
+        if len(results) > MAX_CACHED_RESULTS:
+            results.popitem(last=False)
+    return result
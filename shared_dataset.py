@@ -0,0 +1,215 @@
+# Read-only household snapshots stored as memory-mapped NumPy files.
+#
+# Every session and every server process that opens the current snapshot maps the
+# same file pages, so the dataset is held in memory once per machine instead of
+# once per session. Publishing writes a new snapshot directory and then swaps the
+# CURRENT pointer with an atomic rename; readers pick the new version up on their
+# next rerun while existing mappings stay valid.
+#
+#   python shared_dataset.py publish --source household_water_usage.csv
+#   python shared_dataset.py report --sessions 1 10 50
+import argparse
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from atomic import atomic_write
+from insights import dataset_version
+from tip_cache import CACHE_DIR
+
+SNAPSHOT_ROOT = os.path.join(CACHE_DIR, "snapshots")
+KEEP_SNAPSHOTS = 3
+
+
+def _pointer_path(root):
+    return os.path.join(root, "CURRENT")
+
+
+# Version of the current snapshot, or None if nothing has been published yet
+def current_version(root=SNAPSHOT_ROOT):
+    try:
+        with open(_pointer_path(root)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish_snapshot(data, root=SNAPSHOT_ROOT):
+    version = dataset_version(data)
+    target = os.path.join(root, version)
+    if not os.path.isdir(target):
+        tmp = os.path.join(root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        meta = {"version": version, "rows": len(data), "columns": []}
+        for i, (name, column) in enumerate(data.items()):
+            entry = {"name": name, "file": f"{i}.npy"}
+            if not pd.api.types.is_numeric_dtype(column.dtype):
+                categorical = pd.Categorical(column)
+                entry["categories"] = [str(c) for c in categorical.categories]
+                values = categorical.codes
+            else:
+                values = column.to_numpy()
+            np.save(os.path.join(tmp, entry["file"]), values)
+            meta["columns"].append(entry)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    with atomic_write(_pointer_path(root)) as pointer_tmp, open(pointer_tmp, "w") as f:
+        f.write(version)
+    prune_snapshots(root)
+    return version
+
+
+# Drop old snapshots, keeping the current one and the most recent few (still mapped by in-flight sessions)
+def prune_snapshots(root=SNAPSHOT_ROOT, keep=KEEP_SNAPSHOTS):
+    current = current_version(root)
+    snapshots = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir() and not entry.name.startswith(".")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in snapshots[keep:]:
+        if entry.name != current:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# Map a snapshot into a DataFrame without copying the column data
+def open_snapshot(version=None, root=SNAPSHOT_ROOT):
+    version = version or current_version(root)
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+
+    columns = {}
+    for entry in meta["columns"]:
+        values = np.load(os.path.join(path, entry["file"]), mmap_mode="r")
+        if "categories" in entry:
+            dtype = pd.CategoricalDtype(entry["categories"])
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        columns[entry["name"]] = values
+    data = pd.DataFrame(columns, copy=False)
+    data.attrs["version"] = version
+    return data
+
+
+def _process_memory():
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except FileNotFoundError:
+        import resource
+        fields["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return fields
+
+
+# Process memory: RSS, PSS (shared pages split between processes), USS (pages private
+# to this process), anonymous heap (per-process copies) and pages shared with others
+def memory_report():
+    fields = _process_memory()
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "anonymous": fields.get("Anonymous", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+# Read every column so its pages are resident
+def _touch(data):
+    for column in data.columns:
+        values = data[column].array
+        np.asarray(getattr(values, "codes", values)).sum()
+
+
+# One simulated session in its own process: load a private copy (unpickled, as
+# st.cache_data hands out) or map the snapshot, and report the memory that added once
+# every session holds the data, so PSS splits the shared pages between all of them
+def _session_worker(mode, payload_path, version, root, barrier, results):
+    # Warm up on one row first, so lazily imported libraries aren't counted as data
+    _touch(open_snapshot(version, root).head(1))
+    barrier.wait()
+    before = memory_report()
+    if mode == "copies":
+        import pickle
+        with open(payload_path, "rb") as f:
+            held = pickle.load(f)
+    else:
+        held = open_snapshot(version, root)
+    _touch(held)
+    barrier.wait()
+    after = memory_report()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+# Memory of N session processes each holding the dataset: per-session copies versus one
+# shared memory-mapped snapshot. Summed over the processes, the PSS growth is what the
+# sessions cost the machine and the USS growth is what they hold privately.
+def session_memory_report(data, session_counts, root=SNAPSHOT_ROOT):
+    import multiprocessing
+    import pickle
+    import tempfile
+
+    version = publish_snapshot(data, root)
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        payload_path = os.path.join(tmp, "data.pickle")
+        with open(payload_path, "wb") as f:
+            pickle.dump(data, f)
+        for mode in ("copies", "shared"):
+            for sessions in session_counts:
+                barrier = context.Barrier(sessions + 1)
+                results = context.Queue()
+                workers = [context.Process(target=_session_worker,
+                                           args=(mode, payload_path, version, root, barrier, results))
+                           for _ in range(sessions)]
+                for worker in workers:
+                    worker.start()
+                barrier.wait()  # every session started
+                barrier.wait()  # every session holds the data
+                deltas = [results.get() for _ in workers]
+                barrier.wait()  # every session measured
+                for worker in workers:
+                    worker.join()
+                rows.append({
+                    "mode": mode,
+                    "sessions": sessions,
+                    "pss_mb": sum(delta["pss"] for delta in deltas) / 1e6,
+                    "uss_mb": sum(delta["uss"] for delta in deltas) / 1e6,
+                })
+    return rows
+
+
+if __name__ == "__main__":
+    from data_sources import load_household_data
+
+    parser = argparse.ArgumentParser(description="Publish or inspect shared household snapshots")
+    parser.add_argument("command", choices=["publish", "report"])
+    parser.add_argument("--source", default="synthetic")
+    parser.add_argument("--households", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    data = load_household_data(args.source, args.households, args.workers)
+    if args.command == "publish":
+        print(f"Published snapshot {publish_snapshot(data)}")
+    else:
+        print(f"{'mode':<8} {'sessions':>8} {'PSS MB':>9} {'USS MB':>9}")
+        for row in session_memory_report(data, args.sessions):
+            print(f"{row['mode']:<8} {row['sessions']:>8} {row['pss_mb']:>9.1f} {row['uss_mb']:>9.1f}")
@@ -0,0 +1,96 @@
+# Single-flight deduplication: concurrent calls for the same key wait for one in-flight
+# call and share its result instead of each doing the same work.
+#
+# Within a process, followers wait on the leader's Event. With a lock directory, the
+# leader also takes an exclusive flock on <lock_dir>/<key hash>.lock, and re-checks
+# `lookup` once it holds the lock, so a burst spread over several worker processes
+# still makes one upstream call per key (the others read the result from the shared
+# cache). flock is Unix-only; elsewhere only threads are coalesced.
+import contextlib
+import hashlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from telemetry import increment
+
+COUNTER = "jade_single_flight_calls_total"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, lock_dir=None, name="tips"):
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {"leader": 0, "coalesced": 0, "cross_process": 0}
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+        increment(COUNTER, (("flight", self.name), ("outcome", outcome)))
+
+    @contextlib.contextmanager
+    def _process_lock(self, key):
+        if not self.lock_dir:
+            yield
+            return
+        os.makedirs(self.lock_dir, exist_ok=True)
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        with open(os.path.join(self.lock_dir, f"{digest}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # Return fn() for `key`, sharing one call among concurrent callers. `lookup()`, if
+    # given, is checked after taking the cross-process lock and returns a result another
+    # process stored while this one waited (or None).
+    def do(self, key, fn, lookup=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            self._count("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._process_lock(key):
+                result = lookup() if lookup is not None and self.lock_dir else None
+                if result is not None:
+                    self._count("cross_process")
+                else:
+                    self._count("leader")
+                    result = fn()
+            call.result = result
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    # Calls made ("leader"), joined in this process ("coalesced") and answered by
+    # another process's call ("cross_process")
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
@@ -0,0 +1,115 @@
+# Synthetic household generator for the app and for dashboard load tests.
+#
+#   python synthetic.py --households 10000000 --chunk-size 1000000 --workers 8 --out households.parquet
+#
+# Every chunk draws from its own np.random.Generator spawned from one SeedSequence,
+# so the output only depends on (seed, num_households, chunk_size) and is identical
+# whether the chunks are generated on one core or many.
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from parallel import ordered_pool_map
+from telemetry import traced
+
+ZIP_CODES = ["90001", "90002", "90003", "90004"]
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_SEED = 42
+
+
+# Generate households [start_id, start_id + size) from one chunk's seed
+def generate_chunk(start_id, size, seed_sequence):
+    rng = np.random.default_rng(seed_sequence)
+
+    # Generate household data
+    household_ids = np.arange(start_id, start_id + size)
+    household_sizes = rng.normal(loc=2.6, scale=0.5, size=size).round().astype(int)
+    household_sizes = np.clip(household_sizes, 1, None)
+
+    # Generate fixture-specific water usage data
+    shower_usage = rng.normal(loc=25, scale=5, size=size).round().astype(int)  # Gallons per day
+    laundry_usage = rng.normal(loc=30, scale=8, size=size).round().astype(int)
+    dishwashing_usage = rng.normal(loc=12, scale=3, size=size).round().astype(int)
+    garden_usage = rng.normal(loc=40, scale=15, size=size).round().astype(int)
+    car_wash_usage = rng.normal(loc=15, scale=5, size=size).round().astype(int)
+
+    # Calculate total daily usage as a sum of all fixtures
+    total_daily_usage = shower_usage + laundry_usage + dishwashing_usage + garden_usage + car_wash_usage
+
+    # Add Zip Codes
+    zip_codes = np.asarray(ZIP_CODES)[rng.integers(0, len(ZIP_CODES), size=size)]
+
+    return pd.DataFrame({
+        'Household_ID': household_ids,
+        'Zip_Code': zip_codes,
+        'Household_Size': household_sizes,
+        'Shower_Usage_Gallons': shower_usage,
+        'Laundry_Usage_Gallons': laundry_usage,
+        'Dishwashing_Usage_Gallons': dishwashing_usage,
+        'Garden_Usage_Gallons': garden_usage,
+        'Car_Wash_Usage_Gallons': car_wash_usage,
+        'Total_Daily_Usage_Gallons': total_daily_usage,
+    })
+
+
+def _chunk_specs(num_households, chunk_size, seed):
+    num_chunks = max(1, -(-num_households // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    for i, seed_sequence in enumerate(seeds):
+        start = i * chunk_size
+        yield start + 1, min(chunk_size, num_households - start), seed_sequence
+
+
+# Yield household chunks in order. With workers > 1 the chunks are built in a process
+# pool, keeping at most 2 * workers chunks in flight so memory stays bounded.
+def iter_household_chunks(num_households, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, seed=DEFAULT_SEED):
+    return ordered_pool_map(generate_chunk, _chunk_specs(num_households, chunk_size, seed), workers)
+
+
+# With `compact`, each chunk is converted to compact dtypes (compact.py) as it arrives,
+# so the full-width frame never exists at once
+@traced("generate_synthetic_data")
+def generate_households(num_households=100, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, seed=DEFAULT_SEED, compact=False):
+    chunks = iter_household_chunks(num_households, chunk_size, workers, seed)
+    if compact:
+        from compact import compact_dtypes
+        chunks = (compact_dtypes(chunk, {"Zip_Code": ZIP_CODES}) for chunk in chunks)
+    chunks = list(chunks)
+    data = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    data.attrs["version"] = f"synthetic-{num_households}-{chunk_size}-{seed}"
+    return data
+
+
+# Stream households to a Parquet file one chunk (row group) at a time
+def write_households_parquet(path, num_households, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, seed=DEFAULT_SEED):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in iter_household_chunks(num_households, chunk_size, workers, seed):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic household water usage data")
+    parser.add_argument("--households", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--out", default="households.parquet")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_households_parquet(args.out, args.households, args.chunk_size, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.households:,} households to {args.out} in {elapsed:.2f}s "
+          f"({args.households / elapsed:,.0f} households/s)")
@@ -0,0 +1,199 @@
+# Lightweight in-process timing spans and histograms.
+#
+# A span costs two perf_counter() calls, a dict lookup and a bisect, so it can stay on
+# in production (set JADE_TELEMETRY=0 to turn it off). Metrics are exported in the
+# Prometheus text format on http://127.0.0.1:$JADE_METRICS_PORT/metrics when that
+# variable is set, and summarized in the app's admin sidebar panel (JADE_ADMIN=1).
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("JADE_TELEMETRY", "1") != "0"
+METRICS_PORT = os.getenv("JADE_METRICS_PORT")
+
+SECONDS_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+TOKEN_BUCKETS = [10, 25, 50, 100, 200, 400, 800, 1600, 3200]
+
+
+# Observed from session and worker threads; each histogram has its own lock, and readers
+# take a consistent snapshot so exported buckets never exceed the count
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    # (per-bucket counts, count, sum) as of one moment
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    # Upper bucket bound below which fraction q of the observations fall, optionally
+    # computed from an earlier snapshot()
+    def quantile(self, q, snapshot=None):
+        counts, total, _ = snapshot or self.snapshot()
+        if not total:
+            return 0.0
+        target, seen = q * total, 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+def _histogram(name, labels, buckets):
+    key = (name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(key, Histogram(buckets))
+    return histogram
+
+
+def observe(name, value, labels=(), buckets=SECONDS_BUCKETS):
+    if ENABLED:
+        _histogram(name, labels, buckets).observe(value)
+
+
+def increment(name, labels=(), amount=1):
+    if ENABLED:
+        with _lock:
+            _counters[(name, labels)] = _counters.get((name, labels), 0) + amount
+
+
+@contextlib.contextmanager
+def span(name):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _histogram("jade_span_seconds", (("span", name),), SECONDS_BUCKETS).observe(time.perf_counter() - start)
+
+
+# Decorator form of span()
+def traced(name):
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Record one LLM call: latency in seconds, completion tokens, and its outcome
+def record_llm_call(seconds, tokens=None, outcome="ok"):
+    observe("jade_llm_latency_seconds", seconds, (("outcome", outcome),))
+    if tokens is not None:
+        observe("jade_llm_completion_tokens", tokens, buckets=TOKEN_BUCKETS)
+    increment("jade_llm_calls_total", (("outcome", outcome),))
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def prometheus_text():
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+    for name in sorted({name for (name, _), _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (histogram_name, labels), histogram in histograms:
+            if histogram_name != name:
+                continue
+            counts, total, value_sum = histogram.snapshot()
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels_text(labels, [('le', '+Inf')])} {total}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {value_sum}")
+            lines.append(f"{name}_count{_labels_text(labels)} {total}")
+    for name in sorted({name for (name, _), _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in counters:
+            if counter_name == name:
+                lines.append(f"{name}{_labels_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Per-span summary rows for the admin panel
+def span_summary():
+    with _lock:
+        items = [(dict(labels).get("span"), histogram) for (name, labels), histogram in _histograms.items()
+                 if name == "jade_span_seconds"]
+    rows = []
+    for span_name, histogram in sorted(items, key=lambda item: item[0]):
+        snapshot = histogram.snapshot()
+        _, total, value_sum = snapshot
+        rows.append({
+            "Span": span_name,
+            "Count": total,
+            "Mean_ms": 1000 * value_sum / total if total else 0.0,
+            "P95_ms": 1000 * histogram.quantile(0.95, snapshot),
+        })
+    return rows
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+
+
+# Serve /metrics on a background thread; safe to call on every rerun
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    global _server
+    if _server is not None or not port:
+        return _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
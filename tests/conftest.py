@@ -0,0 +1,24 @@
+import pytest
+
+from fake_llm_server import start_fake_llm_server
+from llm_client import get_openai
+
+
+# Start fake LLM servers with the given options (see fake_llm_server.py) and point the
+# openai package at the latest one; every server is shut down after the test
+@pytest.fixture
+def fake_llm(monkeypatch):
+    servers = []
+
+    def start(**options):
+        server = start_fake_llm_server(**options)
+        servers.append(server)
+        openai = get_openai()
+        monkeypatch.setattr(openai, "api_base", f"http://127.0.0.1:{server.server_port}/v1")
+        monkeypatch.setattr(openai, "api_key", "test")
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
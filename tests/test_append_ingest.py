@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from append_ingest import AppendIngestor, GrowableColumns
+from data_sources import METER_PERIOD_DAYS, METER_SCHEMA
+from insights import build_aggregate_index
+
+HEADER = ",".join(METER_SCHEMA) + "\n"
+
+
+def _row(household, total):
+    shares = [0.24, 0.2, 0.19, 0.17, 0.12, 0.08]
+    return ",".join([str(household), str(total)] + [str(total * share) for share in shares]) + "\n"
+
+
+@pytest.fixture
+def meter_csv(tmp_path):
+    path = tmp_path / "usage.csv"
+    path.write_text(HEADER + "".join(_row(household, 9000 + 10 * household) for household in range(1, 6)))
+    return path
+
+
+def _ingestor(path, tmp_path):
+    return AppendIngestor(str(path), store_dir=str(tmp_path / "store"), poll_seconds=0)
+
+
+def test_partial_last_line_waits_for_the_rest(meter_csv, tmp_path):
+    ingestor = _ingestor(meter_csv, tmp_path)
+    assert ingestor.rows == 5
+
+    full_row, partial = _row(6, 9060), _row(7, 9070)
+    with open(meter_csv, "a") as f:
+        f.write(full_row + partial[:10])
+    assert ingestor.refresh() == 1
+    assert ingestor.rows == 6
+    assert ingestor.offset == len(HEADER) + sum(len(_row(h, 9000 + 10 * h)) for h in range(1, 7))
+
+    with open(meter_csv, "a") as f:
+        f.write(partial[10:])
+    assert ingestor.refresh() == 1
+    assert ingestor.data["Household"].tolist() == list(range(1, 8))
+    assert ingestor.data["Total Usage (gallons)"].iloc[-1] == pytest.approx(9070 / METER_PERIOD_DAYS)
+
+
+def test_refresh_without_a_complete_new_line_adds_nothing(meter_csv, tmp_path):
+    ingestor = _ingestor(meter_csv, tmp_path)
+    with open(meter_csv, "a") as f:
+        f.write("6,90")
+    assert ingestor.refresh() == 0
+    assert ingestor.rows == 5
+
+
+def test_incremental_aggregates_match_a_rebuild(meter_csv, tmp_path):
+    ingestor = _ingestor(meter_csv, tmp_path)
+    with open(meter_csv, "a") as f:
+        f.write("".join(_row(household, 8000 + 37 * household) for household in range(6, 40)))
+    ingestor.refresh()
+
+    rebuilt = build_aggregate_index(ingestor.data)["groups"][()][()]
+    for fixture, stats in rebuilt.items():
+        merged = ingestor.aggregate_index["groups"][()][()][fixture]
+        for stat in ("count", "mean", "min", "max"):
+            assert merged[stat] == pytest.approx(stats[stat], rel=1e-5)
+    total = ingestor.data["Total Usage (gallons)"].to_numpy()
+    assert ingestor.percentile_index.percentile(float(np.median(total))) == pytest.approx(50, abs=3)
+
+
+def test_reopening_resumes_from_the_store(meter_csv, tmp_path):
+    _ingestor(meter_csv, tmp_path)
+    with open(meter_csv, "a") as f:
+        f.write(_row(6, 9060))
+    reopened = _ingestor(meter_csv, tmp_path)
+    assert reopened.rows == 6
+    assert reopened.parts == 2
+
+
+def test_rewritten_file_is_reloaded(meter_csv, tmp_path):
+    ingestor = _ingestor(meter_csv, tmp_path)
+    meter_csv.write_text(HEADER + _row(1, 5000))
+    assert ingestor.refresh() == 1
+    assert ingestor.rows == 1
+    assert ingestor.parts == 1
+
+
+def test_growable_columns_keep_earlier_frames_valid():
+    columns = GrowableColumns(pd.DataFrame({"a": np.arange(3)}))
+    before = columns.frame()
+    for start in range(3, 3000, 100):
+        columns.append(pd.DataFrame({"a": np.arange(start, start + 100)}))
+    assert before["a"].tolist() == [0, 1, 2]
+    assert columns.frame()["a"].tolist() == list(range(3003))
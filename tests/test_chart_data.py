@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from chart_data import HistogramAccumulator
+
+
+def test_appended_values_match_the_counts_and_range():
+    rng = np.random.default_rng(0)
+    values = rng.gamma(4, 30, 5000)
+    accumulator = HistogramAccumulator(values[:1000], bins=40)
+    for start in range(1000, 5000, 500):
+        accumulator.add(values[start:start + 500])
+    frame = accumulator.frame()
+    assert frame["Households"].sum() == 5000
+    assert len(frame) <= 80
+    assert frame["Bin_Start"].iloc[0] <= values.min() and values.max() <= frame["Bin_End"].iloc[-1]
+
+
+@pytest.mark.parametrize("outlier", [1e8, -1e8, 1e10, 1e300])
+def test_outlier_allocates_a_bounded_number_of_bins(outlier):
+    values = np.arange(1000, dtype=np.float64)
+    accumulator = HistogramAccumulator(values, bins=40)
+    before = accumulator.frame()
+    accumulator.add([outlier, 500.0])
+    frame = accumulator.frame()
+    assert len(frame) <= 81
+    assert frame["Households"].sum() == 1002
+    assert frame["Bin_Start"].iloc[0] <= min(outlier, 0) and max(outlier, 999) <= frame["Bin_End"].iloc[-1]
+    # The existing counts were merged whole into the wider bins
+    for start, end in [(0, 250), (250, 999)]:
+        inside = before[(before["Bin_Start"] >= start) & (before["Bin_End"] <= end)]
+        assert inside["Households"].sum() <= frame.loc[(frame["Bin_End"] > start) & (frame["Bin_Start"] < end),
+                                                         "Households"].sum()
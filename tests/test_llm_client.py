@@ -0,0 +1,193 @@
+import threading
+import time
+
+import pytest
+
+import jade_core
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailable, TokenBucket
+from single_flight import SingleFlight
+from tip_cache import TipCache, tip_key
+
+MESSAGES = [{"role": "user", "content": "Provide a water-saving tip for Shower."}]
+
+
+def served(server):
+    return server.RequestHandlerClass.requests_served
+
+
+def test_token_bucket_waits_for_refill_until_deadline():
+    bucket = TokenBucket(per_minute=600)  # 10 tokens per second
+    assert bucket.acquire(600, time.monotonic() + 0.01)
+    assert not bucket.acquire(1, time.monotonic() + 0.01)
+
+    start = time.monotonic()
+    assert bucket.acquire(3, start + 2)
+    assert 0.2 < time.monotonic() - start < 1.0
+
+
+def test_token_bucket_caps_requests_at_capacity():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.acquire(1000, time.monotonic() + 0.01)
+    assert bucket.tokens < 1
+
+
+def test_chat_and_stream_through_fake_server(fake_llm):
+    server = fake_llm(token_delay=0)
+    client = LLMClient(max_retries=0)
+    assert client.chat("gpt-4", MESSAGES).startswith("Fix dripping taps")
+    assert "".join(client.stream("gpt-4", MESSAGES)).strip().startswith("Fix dripping taps")
+    assert served(server) == 2
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_opens_after_repeated_failures_and_fails_fast(fake_llm):
+    server = fake_llm(fail_rate=1.0)
+    client = LLMClient(max_retries=0, breaker=CircuitBreaker(failures=2, reset_seconds=60))
+    for _ in range(2):
+        with pytest.raises(LLMUnavailable):
+            client.chat("gpt-4", MESSAGES)
+    assert client.breaker.state == "open"
+    assert not client.available
+
+    with pytest.raises(LLMUnavailable, match="circuit breaker is open"):
+        client.chat("gpt-4", MESSAGES)
+    assert served(server) == 2
+
+
+def test_half_open_trial_success_closes_breaker(fake_llm):
+    server = fake_llm(fail_rate=1.0)
+    client = LLMClient(max_retries=0, breaker=CircuitBreaker(failures=1, reset_seconds=0.2))
+    with pytest.raises(LLMUnavailable):
+        client.chat("gpt-4", MESSAGES)
+    assert client.breaker.state == "open"
+
+    time.sleep(0.25)
+    assert client.breaker.state == "half_open"
+    server.RequestHandlerClass.options.fail_rate = 0.0
+    assert client.chat("gpt-4", MESSAGES)
+    assert client.breaker.state == "closed"
+    assert client.breaker.consecutive_failures == 0
+
+
+def test_half_open_trial_failure_reopens_breaker(fake_llm):
+    server = fake_llm(fail_rate=1.0)
+    client = LLMClient(max_retries=0, breaker=CircuitBreaker(failures=1, reset_seconds=0.2))
+    with pytest.raises(LLMUnavailable):
+        client.chat("gpt-4", MESSAGES)
+
+    time.sleep(0.25)
+    with pytest.raises(LLMUnavailable):
+        client.chat("gpt-4", MESSAGES)
+    assert client.breaker.state == "open"
+    # Only the one trial call went upstream while half-open
+    assert served(server) == 2
+
+
+def test_rate_limited_calls_retry_then_succeed(fake_llm):
+    server = fake_llm(fail_rate=1.0, fail_status=429, retry_after=0.1)
+    client = LLMClient(max_retries=3, breaker=CircuitBreaker(failures=5))
+    timer = threading.Timer(0.15, lambda: setattr(server.RequestHandlerClass.options, "fail_rate", 0.0))
+    timer.start()
+    try:
+        assert client.chat("gpt-4", MESSAGES, timeout=10)
+    finally:
+        timer.cancel()
+    assert served(server) >= 2
+    assert client.breaker.state == "closed"
+
+
+def test_unavailable_llm_falls_back_to_uncached_static_tip(fake_llm, monkeypatch, tmp_path):
+    fake_llm(fail_rate=1.0)
+    client = LLMClient(max_retries=0)
+    monkeypatch.setattr(jade_core, "get_llm_client", lambda: client)
+    monkeypatch.setattr(jade_core, "TIP_FLIGHTS", SingleFlight())
+    tip_cache = TipCache(str(tmp_path))
+
+    tip = jade_core.get_openai_tip("Shower", 25, tip_cache, model="gpt-4")
+    assert tip in jade_core.recommendations["Shower"]
+    assert tip_cache.peek(tip_key("gpt-4", "Shower", 25)) is None
+
+
+def test_concurrent_identical_tip_requests_share_one_upstream_call(fake_llm, monkeypatch, tmp_path):
+    server = fake_llm(delay=0.3)
+    client = LLMClient(max_retries=0)
+    monkeypatch.setattr(jade_core, "get_llm_client", lambda: client)
+    flights = SingleFlight(str(tmp_path / "locks"))
+    monkeypatch.setattr(jade_core, "TIP_FLIGHTS", flights)
+    tip_cache = TipCache(str(tmp_path))
+
+    tips = []
+    threads = [threading.Thread(target=lambda: tips.append(jade_core.get_openai_tip("Shower", 25, tip_cache, "gpt-4")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert served(server) == 1
+    assert len(tips) == 8 and len(set(tips)) == 1
+    assert tip_cache.peek(tip_key("gpt-4", "Shower", 25)) == tips[0]
+    assert flights.stats()["leader"] == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", fetch))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flights.stats()["coalesced"] < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 6
+    assert flights.stats() == {"leader": 1, "coalesced": 5, "cross_process": 0}
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flights.do("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flights.stats()["coalesced"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 3 and len({id(e) for e in errors}) == 1
+    # A later call starts a new flight
+    assert flights.do("key", lambda: "ok") == "ok"
+
+
+def test_single_flight_uses_result_stored_by_another_process(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    assert flights.do("key", lambda: pytest.fail("should not be called"), lookup=lambda: "cached") == "cached"
+    assert flights.stats()["cross_process"] == 1
@@ -0,0 +1,124 @@
+import json
+import socket
+import time
+
+import pytest
+
+import meter_stream
+from meter_stream import RollingAggregates, start_udp_pipeline
+
+FIXTURES = ["Shower", "Toilet"]
+# Start of a week-aligned bucket, so every window's buckets line up with it
+START = 1_700_000_000 - 1_700_000_000 % 86400
+
+
+def test_window_totals_expire_per_window():
+    aggregates = RollingAggregates(FIXTURES)
+    aggregates.add(1, "Shower", START, 10)
+    aggregates.add(1, "Toilet", START + 30 * 60, 4)
+    assert aggregates.household_totals(1, "hour") == {"Shower": 10, "Toilet": 4}
+
+    # 61 minutes on, the first reading has left the hour but the second hasn't
+    aggregates.tick(START + 61 * 60)
+    assert aggregates.household_totals(1, "hour") == {"Shower": 0, "Toilet": 4}
+    assert aggregates.household_totals(1, "day") == {"Shower": 10, "Toilet": 4}
+
+    aggregates.tick(START + 2 * 3600)
+    assert aggregates.household_totals(1, "hour") == {"Shower": 0, "Toilet": 0}
+    aggregates.tick(START + 86400)
+    assert aggregates.household_totals(1, "day") == {"Shower": 0, "Toilet": 0}
+    assert aggregates.household_totals(1, "week") == {"Shower": 10, "Toilet": 4}
+    assert aggregates.fleet_totals("week") == {"Shower": 10, "Toilet": 4}
+
+    aggregates.tick(START + 7 * 86400)
+    assert aggregates.fleet_totals("week") == {"Shower": 0, "Toilet": 0}
+
+
+def test_readings_older_than_a_window_only_count_in_longer_windows():
+    aggregates = RollingAggregates(FIXTURES)
+    aggregates.add(1, "Shower", START + 3 * 3600, 1)
+    aggregates.add(1, "Shower", START, 5)
+    assert aggregates.household_totals(1, "hour")["Shower"] == 1
+    assert aggregates.household_totals(1, "day")["Shower"] == 6
+
+
+def test_arrays_grow_with_households_seen(monkeypatch):
+    monkeypatch.setattr(meter_stream, "MIN_CAPACITY", 4)
+    aggregates = RollingAggregates(FIXTURES, max_households=10)
+    assert aggregates._capacity == 0
+    aggregates.add_batch([1, 2, 3], ["Shower"] * 3, [START] * 3, [1, 2, 3])
+    assert aggregates._capacity == 4
+    aggregates.add_batch(list(range(4, 7)), ["Toilet"] * 3, [START] * 3, [4, 5, 6])
+    assert aggregates._capacity == 8
+    # Totals recorded before growing are kept
+    assert aggregates.household_totals(2, "hour") == {"Shower": 2, "Toilet": 0}
+    assert aggregates.fleet_totals("hour") == {"Shower": 6, "Toilet": 15}
+
+
+def test_readings_past_max_households_are_dropped():
+    aggregates = RollingAggregates(FIXTURES, max_households=2)
+    aggregates.add_batch([1, 2, 3, 1], ["Shower", "Shower", "Shower", "Bath"], [START] * 4, [1, 1, 1, 1])
+    assert aggregates._capacity == 2
+    assert aggregates.events == 2
+    assert aggregates.dropped == 2
+    assert aggregates.household_totals(3) == {"Shower": 0, "Toilet": 0}
+    assert aggregates.fleet_totals()["Shower"] == pytest.approx(2)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for_events(aggregates, count):
+    deadline = time.monotonic() + 5
+    while aggregates.events < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_udp_pipeline_ingests_readings_and_releases_its_port():
+    port = _free_port()
+    pipeline = start_udp_pipeline(FIXTURES, port)
+    lines = [json.dumps({"household": 7, "fixture": "Shower", "ts": time.time(), "gallons": 2.5}), "not json",
+             json.dumps({"household": 7, "fixture": "Toilet"})]
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        sender.sendto("\n".join(lines).encode(), ("127.0.0.1", port))
+    _wait_for_events(pipeline.aggregates, 1)
+    pipeline.stop()
+    assert pipeline.aggregates.household_totals(7) == {"Shower": 2.5, "Toilet": 0}
+
+    # The port is free again once the pipeline has stopped
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(("127.0.0.1", port))
+
+
+def test_udp_pipeline_skips_wrongly_typed_readings():
+    port = _free_port()
+    pipeline = start_udp_pipeline(FIXTURES, port)
+    now = time.time()
+    bad = [{"household": 1, "fixture": "Shower", "ts": "yesterday", "gallons": 1},
+           {"household": [1], "fixture": "Shower", "ts": now, "gallons": 1},
+           {"household": 1, "fixture": ["Shower"], "ts": now, "gallons": 1},
+           {"household": 1, "fixture": "Shower", "ts": now, "gallons": None},
+           {"household": 1, "fixture": "Shower", "ts": now, "gallons": float("nan")}]
+    good = {"household": 1, "fixture": "Toilet", "ts": now, "gallons": 3}
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        for event in bad:
+            sender.sendto(json.dumps(event).encode(), ("127.0.0.1", port))
+        sender.sendto(json.dumps(good).encode(), ("127.0.0.1", port))
+    _wait_for_events(pipeline.aggregates, 1)
+    assert pipeline.ingestor._thread.is_alive()
+    pipeline.stop()
+    assert pipeline.aggregates.events == 1
+    assert pipeline.aggregates.household_totals(1) == {"Shower": 0, "Toilet": 3}
+
+
+def test_ingestor_drops_a_bad_batch_and_keeps_running():
+    pipeline = meter_stream.MeterPipeline(RollingAggregates(FIXTURES))
+    pipeline.ingestor.events.put([(1, "Shower", "yesterday", 1)])
+    pipeline.ingestor.events.put([(1, "Shower", START, 2)])
+    _wait_for_events(pipeline.aggregates, 1)
+    assert pipeline.ingestor._thread.is_alive()
+    pipeline.stop()
+    assert pipeline.aggregates.household_totals(1)["Shower"] == 2
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import percentiles
+from percentiles import PercentileIndex
+
+
+def _households(count, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Zip_Code": rng.choice(["10001", "20002", "30003"], count),
+        "Household_Size": rng.integers(1, 5, count),
+        "Total": rng.gamma(4, 30, count).round(1),
+    })
+
+
+def _assert_same(index, rebuilt, data):
+    queries = [(None, None)] + [(zip_code, None) for zip_code in data["Zip_Code"].unique()] \
+        + [(None, int(size)) for size in data["Household_Size"].unique()] \
+        + [(zip_code, int(size)) for zip_code, size in data[["Zip_Code", "Household_Size"]].drop_duplicates().values]
+    for zip_code, size in queries:
+        assert index.count(zip_code, size) == rebuilt.count(zip_code, size)
+        for value in (0, 50, 100.5, 120, 1000, float(data["Total"].iloc[0])):
+            assert index.percentile(value, zip_code, size) == pytest.approx(rebuilt.percentile(value, zip_code, size))
+
+
+@pytest.mark.parametrize("merge_size", [1024, 8])
+def test_incremental_add_matches_a_rebuild(monkeypatch, merge_size):
+    # A small merge size exercises both the pending buffers and the merge into the sorted arrays
+    monkeypatch.setattr(percentiles, "MIN_MERGE_SIZE", merge_size)
+    data = _households(500, seed=1)
+    index = PercentileIndex(data, "Total")
+    for seed in range(2, 8):
+        batch = _households(37, seed)
+        index.add(batch)
+        data = pd.concat([data, batch], ignore_index=True)
+        _assert_same(index, PercentileIndex(data, "Total"), data)
+
+
+def test_new_groups_appear_after_add():
+    index = PercentileIndex(_households(50, seed=1), "Total")
+    assert index.percentile(100, zip_code="99999") is None
+    index.add(pd.DataFrame({"Zip_Code": ["99999", "99999"], "Household_Size": [2, 3], "Total": [80.0, 120.0]}))
+    assert index.count("99999") == 2
+    assert index.percentile(100, zip_code="99999") == 50
+    assert index.percentile(100, zip_code="99999", household_size=3) == 0
@@ -0,0 +1,36 @@
+import re
+import threading
+
+import telemetry
+
+
+def _observe_concurrently(fn, threads=8, per_thread=20_000):
+    workers = [threading.Thread(target=lambda: [fn(i % 7 * 0.003) for i in range(per_thread)]) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def test_concurrent_observations_are_not_lost():
+    histogram = telemetry.Histogram(telemetry.SECONDS_BUCKETS)
+    for worker in _observe_concurrently(histogram.observe):
+        worker.join()
+    counts, total, _ = histogram.snapshot()
+    assert total == 160_000
+    assert sum(counts) == total
+
+
+def test_scrapes_during_observations_stay_consistent():
+    name = "jade_test_concurrent_seconds"
+    workers = _observe_concurrently(lambda value: telemetry.observe(name, value))
+    while any(worker.is_alive() for worker in workers):
+        text = telemetry.prometheus_text()
+        buckets = [int(count) for count in re.findall(rf'^{name}_bucket{{le="[^"+]+"}} (\d+)$', text, re.M)]
+        infinite = re.search(rf'^{name}_bucket{{le="\+Inf"}} (\d+)$', text, re.M)
+        count = re.search(rf"^{name}_count (\d+)$", text, re.M)
+        if infinite:
+            assert buckets == sorted(buckets)
+            assert buckets[-1] <= int(infinite.group(1)) == int(count.group(1))
+    for worker in workers:
+        worker.join()
+    assert re.search(rf"^{name}_count 160000$", telemetry.prometheus_text(), re.M)
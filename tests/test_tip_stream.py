@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+import tip_stream
+from fake_llm_server import FAKE_TIP
+from llm_client import LLMClient
+from tip_cache import TipCache
+from tip_stream import TipStream, shared_tip_stream
+
+MESSAGES = [{"role": "user", "content": "Provide a water-saving tip for Shower."}]
+
+
+@pytest.fixture(autouse=True)
+def llm_client(monkeypatch):
+    # A fresh client per test, so a failing upstream can't open the shared breaker
+    client = LLMClient(max_retries=0)
+    monkeypatch.setattr(tip_stream, "get_llm_client", lambda: client)
+    return client
+
+
+def test_slow_upstream_returns_at_the_deadline_and_still_caches_the_tip(fake_llm, tmp_path):
+    fake_llm(delay=0.5, token_delay=0)
+    tip_cache = TipCache(str(tmp_path))
+    stream = TipStream("gpt-4", MESSAGES, on_complete=lambda tip: tip_cache.put("key", tip))
+
+    start = time.monotonic()
+    tokens = list(stream.iter_tokens(start + 0.1))
+    assert time.monotonic() - start < 0.4
+    assert tokens == []
+    assert not stream.succeeded
+    assert tip_cache.peek("key") is None
+
+    # The page has given up, but the stream finishes in the background and fills the cache
+    stream._thread.join(5)
+    assert stream.succeeded
+    assert tip_cache.peek("key") == FAKE_TIP
+
+
+def test_deadline_mid_stream_keeps_the_partial_text_unsucceeded(fake_llm):
+    fake_llm(token_delay=0.05)
+    stream = TipStream("gpt-4", MESSAGES)
+    tokens = list(stream.iter_tokens(time.monotonic() + 0.2))
+    assert 0 < len(tokens) < len(FAKE_TIP.split())
+    assert not stream.succeeded
+    stream._thread.join(5)
+    assert stream.text.strip() == FAKE_TIP
+
+
+def test_upstream_error_ends_the_stream_unsucceeded(fake_llm):
+    fake_llm(fail_rate=1.0)
+    completed = []
+    stream = TipStream("gpt-4", MESSAGES, on_complete=completed.append)
+
+    start = time.monotonic()
+    assert list(stream.iter_tokens(start + 5)) == []
+    assert time.monotonic() - start < 2
+    assert stream.finished and stream.error is not None
+    assert not stream.succeeded
+    assert completed == []
+
+
+def test_concurrent_callers_share_one_upstream_stream(fake_llm):
+    server = fake_llm(delay=0.3, token_delay=0)
+    completed = []
+    streams, texts = [], []
+    lock = threading.Lock()
+
+    def follow():
+        stream = shared_tip_stream("shared-key", "gpt-4", MESSAGES, on_complete=completed.append)
+        tokens = list(stream.iter_tokens(time.monotonic() + 5))
+        with lock:
+            streams.append(stream)
+            texts.append("".join(tokens))
+
+    threads = [threading.Thread(target=follow) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.RequestHandlerClass.requests_served == 1
+    assert len({id(stream) for stream in streams}) == 1
+    assert texts == [texts[0]] * 6 and texts[0].strip() == FAKE_TIP
+    assert completed == [FAKE_TIP]
+    # Once finished, the next request starts a new stream
+    again = shared_tip_stream("shared-key", "gpt-4", MESSAGES)
+    assert again is not streams[0]
+    again._thread.join(5)
@@ -0,0 +1,56 @@
+import pytest
+
+import jade_core
+from llm_client import LLMClient
+from single_flight import SingleFlight
+from tip_cache import TipCache, tip_key
+from tip_corpus import TIP_CORPUS
+
+# (usage, peer usage) for each usage level
+HIGH, TYPICAL, LOW = (60, 30), (30, 30), (20, 30)
+
+
+@pytest.fixture
+def llm_tips(fake_llm, monkeypatch, tmp_path):
+    server = fake_llm(token_delay=0)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    client = LLMClient(max_retries=0)
+    monkeypatch.setattr(jade_core, "get_llm_client", lambda: client)
+    monkeypatch.setattr(jade_core, "TIP_FLIGHTS", SingleFlight())
+    return server, TipCache(str(tmp_path))
+
+
+def test_local_first_keeps_a_tip_written_for_the_usage_level(llm_tips):
+    server, tip_cache = llm_tips
+    tip, source = jade_core.get_tip("Shower", HIGH[0], tip_cache, HIGH[1], 4, model="gpt-4", mode="local_first")
+    assert source == "local"
+    assert tip in [entry[3] for entry in TIP_CORPUS if entry[:2] == ("Shower", "high")]
+    assert server.RequestHandlerClass.requests_served == 0
+
+
+def test_local_first_asks_the_llm_when_no_tip_fits(llm_tips):
+    server, tip_cache = llm_tips
+    # Only one low-usage Car Wash tip exists; once it has been shown nothing else fits
+    best, score = jade_core.get_tip_engine().best("Car Wash", *LOW, 2)
+    assert score >= jade_core.LOCAL_TIP_MIN_SCORE
+    assert jade_core.get_local_tip("Car Wash", *LOW, 2, mode="local_first", exclude=[best]) is None
+    assert jade_core.get_local_tip("Car Wash", *LOW, 2, mode="local", exclude=[best]) is not None
+
+    # Toilet has one tip for typical usage; after it, the best match is written for another level
+    ranked = jade_core.get_tip_engine().rank("Toilet", *TYPICAL, 5, k=2)
+    assert ranked[1][1] < jade_core.LOCAL_TIP_MIN_SCORE
+    assert jade_core.get_local_tip("Toilet", *TYPICAL, 5, mode="local_first", exclude=[ranked[0][0]]) is None
+
+
+def test_local_first_falls_through_to_the_llm(llm_tips):
+    server, tip_cache = llm_tips
+    # Without peer usage only the household band is known, and Leaks has no tip for small households
+    assert jade_core.get_tip_engine().best("Leaks", 30, None, 2)[1] < jade_core.LOCAL_TIP_MIN_SCORE
+    tip, source = jade_core.get_tip("Leaks", 30, tip_cache, household_size=2, model="gpt-4", mode="local_first")
+    assert source == "llm"
+    assert server.RequestHandlerClass.requests_served == 1
+    assert tip_cache.peek(tip_key("gpt-4", "Leaks", 30)) == tip
+
+    tip, source = jade_core.get_tip("Leaks", 30, tip_cache, household_size=2, model="gpt-4", mode="local")
+    assert source == "local"
+    assert server.RequestHandlerClass.requests_served == 1
@@ -0,0 +1,139 @@
+import contextlib
+import os
+import sqlite3
+import time
+
+# Where the tip cache lives; shared by every Streamlit session and worker process
+CACHE_DIR = os.getenv("JADE_CACHE_DIR", ".jade_cache")
+TIP_TTL_SECONDS = int(os.getenv("JADE_TIP_TTL_SECONDS", 7 * 24 * 3600))
+TIP_CACHE_MAX_ENTRIES = int(os.getenv("JADE_TIP_CACHE_MAX_ENTRIES", 5000))
+USAGE_BUCKET_GALLONS = float(os.getenv("JADE_USAGE_BUCKET_GALLONS", 5))
+# Claims older than this are treated as abandoned (e.g. the process died mid-job)
+CLAIM_TTL_SECONDS = int(os.getenv("JADE_CLAIM_TTL_SECONDS", 600))
+
+
+# Round a usage value into a bucket so near-identical averages share a cache entry
+def usage_bucket(avg_usage, width=USAGE_BUCKET_GALLONS):
+    return int(round(avg_usage / width) * width)
+
+
+def tip_key(model, activity, avg_usage):
+    return f"{model}|{activity}|{usage_bucket(avg_usage)}"
+
+
+class TipCache:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TIP_TTL_SECONDS, max_entries=TIP_CACHE_MAX_ENTRIES,
+                 claim_ttl=CLAIM_TTL_SECONDS):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "tips.sqlite3")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.claim_ttl = claim_ttl
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tips ("
+                " key TEXT PRIMARY KEY, tip TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS tips_last_used ON tips (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS claims (name TEXT PRIMARY KEY, claimed_at REAL NOT NULL)")
+
+    # A short-lived connection per call keeps the cache safe to share across threads and processes
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _bump(self, conn, name):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT tip, created_at FROM tips WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    conn.execute("DELETE FROM tips WHERE key = ?", (key,))
+                self._bump(conn, "misses")
+                return None
+            conn.execute("UPDATE tips SET last_used = ? WHERE key = ?", (now, key))
+            self._bump(conn, "hits")
+            return row[0]
+
+    # Live tip for a key without touching the hit/miss counters or its LRU position
+    def peek(self, key):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT tip FROM tips WHERE key = ? AND created_at >= ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key, tip):
+        self.put_many([(key, tip)])
+
+    def put_many(self, items):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO tips (key, tip, created_at, last_used) VALUES (?, ?, ?, ?)",
+                [(key, tip, now, now) for key, tip in items],
+            )
+            # Evict expired entries, then the least recently used ones beyond the size limit
+            conn.execute("DELETE FROM tips WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM tips WHERE key IN ("
+                " SELECT key FROM tips ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    # Keys that have no live entry, checked without touching the hit/miss counters
+    def missing(self, keys):
+        if not keys:
+            return []
+        cutoff = time.time() - self.ttl
+        with self._connect() as conn:
+            present = {
+                row[0] for row in conn.execute(
+                    f"SELECT key FROM tips WHERE created_at >= ? AND key IN ({','.join('?' * len(keys))})",
+                    (cutoff, *keys),
+                )
+            }
+        return [key for key in keys if key not in present]
+
+    # Claim a one-off job (e.g. a warm-up run) across processes; True only for the first
+    # caller until the claim is released or older than claim_ttl
+    def claim(self, name):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM claims WHERE name = ? AND claimed_at < ?", (name, now - self.claim_ttl))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO claims (name, claimed_at) VALUES (?, ?)", (name, now)
+            )
+            return cursor.rowcount == 1
+
+    def release(self, name):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM claims WHERE name = ?", (name,))
+
+    def stats(self):
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM tips").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,81 @@
+# Curated water-saving tips for the local tip engine (tip_engine.py).
+#
+# Each entry is (activity, usage, household, tip):
+#   usage:     "high" (well above similar households), "typical", "low" or "any"
+#   household: "single", "small" (2-3 people), "large" (4+) or "any"
+# The static `recommendations` in jade_core are added to this corpus with "any" tags.
+TIP_CORPUS = [
+    # Shower
+    ("Shower", "high", "any", "Your showers use more than similar households: a 5-minute timer on the mirror can cut shower water by a third."),
+    ("Shower", "high", "any", "Swap to a 1.5 gpm WaterSense showerhead; at your usage it saves thousands of gallons a year."),
+    ("Shower", "high", "large", "With several people showering, stagger showers and keep each one under 5 minutes to avoid running the hot water long."),
+    ("Shower", "high", "large", "Put a bucket in the shower while the water warms up and use it for plants or flushing."),
+    ("Shower", "typical", "any", "Try a shower-stop valve to pause the flow while you soap up without losing the temperature setting."),
+    ("Shower", "typical", "small", "Skip the pre-shower warm-up: a thermostatic valve gets to temperature without running water down the drain."),
+    ("Shower", "low", "any", "Your shower use is already low; check the showerhead for mineral build-up, which can hide a leaking valve."),
+    ("Shower", "any", "single", "Living alone, a low-flow showerhead is usually the single biggest water saver you can install in an afternoon."),
+    ("Shower", "high", "single", "Long solo showers add up quickly; a waterproof shower timer or a 4-song playlist keeps them short."),
+    # Laundry
+    ("Laundry", "high", "any", "Your washer runs more than similar households: combine partial loads and pick the load-size setting that matches."),
+    ("Laundry", "high", "large", "For a big household, an ENERGY STAR front-loader uses about 14 gallons per load instead of 30 or more."),
+    ("Laundry", "high", "large", "Give each family member a set laundry day so the machine always runs full loads."),
+    ("Laundry", "typical", "any", "Skip the extra rinse cycle unless someone has sensitive skin; modern detergents rinse out in one."),
+    ("Laundry", "typical", "small", "Rewear jeans, towels and sweaters a few times before washing to cut the number of loads."),
+    ("Laundry", "low", "any", "Your laundry use is already efficient; check the supply hoses for bulges or drips once a year."),
+    ("Laundry", "any", "single", "Living alone, wait until you have a full load or use the smallest load setting on your machine."),
+    # Dishwashing
+    ("Dishwashing", "high", "any", "Your dishwashing use is above similar households: stop pre-rinsing, since modern dishwashers clean scraped plates fine."),
+    ("Dishwashing", "high", "any", "Handwashing with the tap running can use 20 gallons; an efficient dishwasher uses under 4 per load."),
+    ("Dishwashing", "high", "large", "For a large household, run the dishwasher once a day when full rather than hand-washing between meals."),
+    ("Dishwashing", "typical", "any", "When handwashing, fill one basin with soapy water and one with rinse water instead of letting the tap run."),
+    ("Dishwashing", "typical", "small", "Use the eco cycle; it runs longer but uses less water and energy."),
+    ("Dishwashing", "low", "any", "Your dishwashing use is already low; soak pots and pans instead of scrubbing them under running water."),
+    ("Dishwashing", "any", "single", "With few dishes, a small wash basin uses far less water than a half-empty dishwasher or a running tap."),
+    # Garden
+    ("Garden", "high", "any", "Your outdoor use is well above similar households: cut each irrigation cycle by a few minutes and check for runoff."),
+    ("Garden", "high", "any", "Fit a smart irrigation controller that skips watering after rain; it can cut outdoor water use by 20 to 40 percent."),
+    ("Garden", "high", "any", "Replace part of the lawn with drought-tolerant native plants that need little watering once established."),
+    ("Garden", "high", "large", "A larger yard benefits most from zoning: water shady beds and sunny lawn on separate schedules."),
+    ("Garden", "typical", "any", "Set the mower blade higher; taller grass shades the soil and needs less frequent watering."),
+    ("Garden", "typical", "any", "Install a rain barrel on a downspout and use the water for beds and pots."),
+    ("Garden", "low", "any", "Your garden use is already low; group plants with similar water needs so none are over-watered."),
+    ("Garden", "any", "single", "Water pots and small beds with a watering can instead of a hose to control exactly how much they get."),
+    # Car Wash
+    ("Car Wash", "high", "any", "You wash vehicles more than similar households: a hose can use 100 gallons, a bucket about 10."),
+    ("Car Wash", "high", "large", "With several cars, a commercial car wash that recycles water usually uses less per car than washing at home."),
+    ("Car Wash", "typical", "any", "Fit an automatic shut-off nozzle so the hose only runs while you are rinsing."),
+    ("Car Wash", "typical", "any", "Try a waterless car wash spray for light dust between full washes."),
+    ("Car Wash", "low", "any", "Your car washing is already light; wash on the lawn so the rinse water waters the grass."),
+    ("Car Wash", "any", "single", "For one car, a bucket and sponge with a quick nozzle rinse is all you need."),
+    # Toilet
+    ("Toilet", "high", "any", "Toilet use is above similar households: a dye tablet in the tank will show if the flapper is leaking into the bowl."),
+    ("Toilet", "high", "any", "Toilets made before 1994 can use 3.5 gallons or more per flush; a WaterSense model uses 1.28 or less."),
+    ("Toilet", "high", "large", "For a busy household, a dual-flush conversion kit saves water on every half flush."),
+    ("Toilet", "typical", "any", "Adjust the float so the tank fills to the marked water line and no higher."),
+    ("Toilet", "low", "any", "Your toilet use is already low; replace the flapper every few years before it starts to leak."),
+    ("Toilet", "any", "single", "A displacement bag or filled bottle in an older toilet tank saves water on every flush."),
+    # Faucets
+    ("Faucets", "high", "any", "Faucet use is above similar households: 1.0 gpm aerators on bathroom taps cut flow by more than half."),
+    ("Faucets", "high", "large", "With a full house, a motion-sensor or foot-pedal kitchen faucet stops water running between tasks."),
+    ("Faucets", "typical", "any", "Thaw food in the fridge overnight instead of under running water."),
+    ("Faucets", "typical", "any", "Wash fruit and vegetables in a bowl rather than under the tap."),
+    ("Faucets", "low", "any", "Your faucet use is already low; fix any drip right away since a slow drip wastes gallons every day."),
+    ("Faucets", "any", "single", "Keep a jug of cold water in the fridge so you never run the tap waiting for it to cool."),
+    # Leaks
+    ("Leaks", "high", "any", "Your household loses an unusual share of water to leaks: read the meter before and after two hours with no water use."),
+    ("Leaks", "high", "any", "Check for a running toilet, a dripping outdoor spigot and soggy patches in the yard that point to a broken irrigation line."),
+    ("Leaks", "high", "large", "In a larger home, check every bathroom: one silent toilet leak can waste 200 gallons a day."),
+    ("Leaks", "typical", "any", "Replace worn faucet washers and showerhead seals as soon as you notice a drip."),
+    ("Leaks", "low", "any", "Leak losses are low; keep it that way with a yearly check of hose bibs and the water heater relief valve."),
+    ("Leaks", "any", "any", "A smart water meter or leak sensor under sinks can alert you to leaks before they cause damage."),
+    # Other
+    ("Other", "high", "any", "Other indoor use is above similar households: look for a water softener regenerating too often or an evaporative cooler bleeding off water."),
+    ("Other", "high", "any", "Cover pools and hot tubs when not in use; evaporation can take an inch of water a week in summer."),
+    ("Other", "typical", "any", "Sweep patios and driveways instead of hosing them down."),
+    ("Other", "typical", "any", "Reuse pasta and vegetable cooking water, once cooled, for houseplants."),
+    ("Other", "low", "any", "Your other water use is already low; keep an eye on the meter so new leaks are caught early."),
+    ("Other", "any", "large", "Teach everyone in the household to turn taps off tightly and report drips right away."),
+]
+
+USAGE_LEVELS = ["low", "typical", "high"]
+HOUSEHOLD_BANDS = ["single", "small", "large"]
@@ -0,0 +1,153 @@
+# Offline tip engine: retrieval over the curated corpus in tip_corpus.py, no network.
+#
+# Every tip is embedded as a TF-IDF weighted bag of hashed word unigrams and bigrams of
+# its text, plus a separately normalized block of activity / usage / household tag
+# tokens, in one dense NumPy matrix. A request is turned into the same kind of vector
+# from its tags (and optional free text), and tips for the activity are ranked by
+# cosine similarity. Every candidate shares the activity tag, so the score reported with
+# a tip leaves that part out and measures only how well the tip's text, usage and
+# household tags fit the request: at least 0.32 for a tip written for the request's
+# usage level, at most about 0.25 for one written for another level, and in between for
+# generic tips (higher the less the request says). Tag-only requests only differ by
+# (activity, usage level, household band), so their rankings are memoized and repeated
+# lookups cost a dictionary read.
+import re
+import zlib
+
+import numpy as np
+
+from tip_corpus import TIP_CORPUS
+
+HASH_DIMS = 2 ** 12
+# Share of the similarity that comes from the tags versus the tip text (squares sum to 1)
+TAG_WEIGHT = 0.8
+TEXT_WEIGHT = 0.6
+# Usage relative to the peer average that counts as high / low
+HIGH_USAGE_RATIO = 1.2
+LOW_USAGE_RATIO = 0.9
+# The usage level outweighs the household band, so an over-user gets a "high" tip
+# rather than a "typical" one written for their household size
+USAGE_TAG_WEIGHT = 2.0
+
+
+# "high", "typical" or "low" relative to peers; None when either value is unknown
+def usage_level(usage, peer_usage):
+    if usage is None or not peer_usage:
+        return None
+    ratio = usage / peer_usage
+    if ratio >= HIGH_USAGE_RATIO:
+        return "high"
+    return "low" if ratio <= LOW_USAGE_RATIO else "typical"
+
+
+def household_band(household_size):
+    if household_size is None:
+        return None
+    if household_size <= 1:
+        return "single"
+    return "small" if household_size <= 3 else "large"
+
+
+def _term_index(term):
+    return zlib.crc32(term.encode()) % HASH_DIMS
+
+
+def _add_term(counts, term, weight):
+    index = _term_index(term)
+    counts[index] = counts.get(index, 0) + weight
+
+
+def _activity_tag(activity):
+    return f"activity_{activity.lower().replace(' ', '_')}"
+
+
+# Term frequencies of hashed word unigrams and bigrams: {feature index: weight}
+def _hashed_terms(text):
+    counts = {}
+    words = re.findall(r"[a-z0-9_]+", text.lower())
+    for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        _add_term(counts, term, 1.0)
+    return counts
+
+
+# Tag tokens ("activity_shower", "usage_high", "household_any", ...) added to `counts`
+def _add_tags(counts, activity, usage, household, weight):
+    _add_term(counts, _activity_tag(activity), weight)
+    _add_term(counts, f"usage_{usage}", USAGE_TAG_WEIGHT * weight)
+    _add_term(counts, f"household_{household}", weight)
+    return counts
+
+
+class TipEngine:
+    def __init__(self, corpus=TIP_CORPUS, extra_tips=None):
+        entries = list(corpus) + [(activity, "any", "any", tip)
+                                  for activity, tips in (extra_tips or {}).items() for tip in tips]
+        self.activities = [activity for activity, _, _, _ in entries]
+        self.tips = [tip for _, _, _, tip in entries]
+        texts = [_hashed_terms(tip) for _, _, _, tip in entries]
+        tags = [_add_tags({}, activity, usage, household, 1.0) for activity, usage, household, _ in entries]
+
+        document_frequency = np.zeros(HASH_DIMS)
+        for counts in texts + tags:
+            document_frequency[list(counts)] += 1
+        self.idf = np.log((1 + len(entries)) / (1 + document_frequency)) + 1
+
+        # Normalizing the blocks separately keeps short and long tips on equal footing
+        self.matrix = (TEXT_WEIGHT * self._vectors(texts, sublinear=True)
+                       + TAG_WEIGHT * self._vectors(tags)).astype(np.float32)
+
+        self._rows = {}
+        for row, activity in enumerate(self.activities):
+            self._rows.setdefault(activity, []).append(row)
+        self._rows = {activity: np.array(rows) for activity, rows in self._rows.items()}
+        self._ranked = {}
+
+    # TF-IDF rows, each L2-normalized
+    def _vectors(self, term_counts, sublinear=False):
+        vectors = np.zeros((len(term_counts), HASH_DIMS))
+        for row, counts in enumerate(term_counts):
+            indices = list(counts)
+            tf = np.array([counts[i] for i in indices])
+            vectors[row, indices] = (1 + np.log(tf) if sublinear else tf) * self.idf[indices]
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def _query(self, activity, level, band, text=None):
+        tags = _add_tags({}, activity, level or "any", band or "any", 1.0)
+        # Tips tagged "any" still match, just below ones written for this situation
+        if level:
+            _add_term(tags, "usage_any", 0.5)
+        if band:
+            _add_term(tags, "household_any", 0.5)
+        query = TAG_WEIGHT * self._vectors([tags])[0]
+        if text:
+            query += TEXT_WEIGHT * self._vectors([_hashed_terms(text)], sublinear=True)[0]
+        indices = np.flatnonzero(query)
+        return indices, query[indices]
+
+    # Best tips for an activity as (tip, score) pairs, most relevant first; the score leaves
+    # out the shared activity tag. `text` is an optional free-text query (e.g. "timer")
+    # matched against the tip wording.
+    def rank(self, activity, usage=None, peer_usage=None, household_size=None, k=3, text=None):
+        level, band = usage_level(usage, peer_usage), household_band(household_size)
+        key = (activity, level, band, k)
+        ranked = None if text else self._ranked.get(key)
+        if ranked is None:
+            rows = self._rows.get(activity)
+            if rows is None:
+                ranked = []
+            else:
+                indices, weights = self._query(activity, level, band, text)
+                block = self.matrix[np.ix_(rows, indices)]
+                scores = block @ weights
+                shared = indices == _term_index(_activity_tag(activity))
+                fit = scores - block[:, shared] @ weights[shared]
+                order = np.argsort(-scores, kind="stable")[:k]
+                ranked = [(self.tips[rows[i]], float(fit[i])) for i in order]
+            if not text:
+                self._ranked[key] = ranked
+        return ranked
+
+    # Best single tip and its score, or (None, 0.0) when the activity has no tips
+    def best(self, activity, usage=None, peer_usage=None, household_size=None):
+        ranked = self.rank(activity, usage, peer_usage, household_size, k=1)
+        return ranked[0] if ranked else (None, 0.0)
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+from llm_client import get_llm_client
+from single_flight import COUNTER
+from telemetry import increment
+
+# Hard limit on how long the Recommendations tab waits for the AI tip
+TIP_DEADLINE_SECONDS = float(os.getenv("JADE_TIP_DEADLINE_SECONDS", 8))
+
+
+# Streams a chat completion on a background thread so the page never blocks on OpenAI.
+# on_complete(text) runs on the background thread once the full tip has arrived,
+# even if the page has already given up waiting and shown a fallback.
+# Any number of readers can follow one stream; each iter_tokens() call replays the
+# tokens received so far and then waits for new ones.
+class TipStream:
+    def __init__(self, model, messages, on_complete=None, max_tokens=100, temperature=0.7):
+        self.tokens = []
+        self.error = None
+        self.finished = False
+        self._changed = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(model, messages, on_complete, max_tokens, temperature),
+            daemon=True,
+        )
+        self._thread.start()
+
+    @property
+    def text(self):
+        return "".join(self.tokens)
+
+    def _publish(self, token=None, error=None, finished=False):
+        with self._changed:
+            if token is not None:
+                self.tokens.append(token)
+            if error is not None:
+                self.error = error
+            self.finished = self.finished or finished
+            self._changed.notify_all()
+
+    def _run(self, model, messages, on_complete, max_tokens, temperature):
+        text = ""
+        try:
+            tokens = get_llm_client().stream(model, messages, max_tokens=max_tokens, temperature=temperature,
+                                             timeout=max(TIP_DEADLINE_SECONDS * 4, 30))
+            for token in tokens:
+                text += token
+                self._publish(token)
+            if on_complete is not None and text.strip():
+                on_complete(text.strip())
+        except Exception as e:
+            self._publish(error=e)
+        finally:
+            self._publish(finished=True)
+
+    # Yield tokens as they arrive until the stream ends or the deadline (time.monotonic()) passes
+    def iter_tokens(self, deadline):
+        position = 0
+        while True:
+            with self._changed:
+                while position == len(self.tokens) and not self.finished:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._changed.wait(remaining):
+                        return
+                new_tokens = self.tokens[position:]
+                finished = self.finished
+            position += len(new_tokens)
+            yield from new_tokens
+            if finished and position == len(self.tokens):
+                return
+
+    @property
+    def succeeded(self):
+        return self.finished and self.error is None and bool(self.text.strip())
+
+
+_streams_lock = threading.Lock()
+_streams = {}
+
+
+# The in-flight stream for a tip key, or a new one. Sessions asking for the same tip
+# while it is being generated follow one upstream request instead of starting their own.
+def shared_tip_stream(key, model, messages, on_complete=None):
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is not None and not stream.finished:
+            increment(COUNTER, (("flight", "tip_streams"), ("outcome", "coalesced")))
+            return stream
+
+        # Only in-flight streams are kept
+        for finished_key in [k for k, s in _streams.items() if s.finished]:
+            del _streams[finished_key]
+        stream = _streams[key] = TipStream(model, messages, on_complete=on_complete)
+        increment(COUNTER, (("flight", "tip_streams"), ("outcome", "leader")))
+    return stream
@@ -0,0 +1,92 @@
+import json
+import logging
+import threading
+
+from insights import lookup_insight
+from llm_client import get_llm_client
+from tip_cache import tip_key, usage_bucket
+
+logger = logging.getLogger(__name__)
+
+# Statistics whose usage buckets get a pre-generated tip for every fixture
+BAND_STATS = ["p25", "mean", "p75", "p90"]
+
+
+# Distinct usage buckets per fixture that users are likely to hit
+def usage_bands(index, fixtures):
+    bands = {}
+    for fixture in fixtures:
+        values = [lookup_insight(index, fixture, stat) for stat in BAND_STATS]
+        bands[fixture] = sorted({usage_bucket(value) for value in values if value is not None})
+    return bands
+
+
+def get_batch_messages(bands):
+    request = {fixture: [str(band) for band in fixture_bands] for fixture, fixture_bands in bands.items()}
+    prompt = (
+        "For each activity below, write one water-saving tip for every listed average daily water usage "
+        "(in gallons). Reply with only a JSON object mapping each activity to an object that maps each "
+        "usage value (as a string) to its tip.\n" + json.dumps(request)
+    )
+    return [
+        {"role": "system", "content": "You are an assistant that provides water conservation advice."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_batch_response(content):
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`")
+        content = content[content.index("{"):]
+    return json.loads(content[:content.rindex("}") + 1])
+
+
+# Fill the tip cache for every fixture and usage band with a single LLM request.
+# Returns the number of tips stored (0 when everything was already cached).
+def warm_tip_cache(index, tip_cache, model, fixtures):
+    bands = usage_bands(index, fixtures)
+    keys = {(fixture, band): tip_key(model, fixture, band) for fixture, fixture_bands in bands.items() for band in fixture_bands}
+    missing = set(tip_cache.missing(list(keys.values())))
+    if not missing:
+        return 0
+
+    needed = {}
+    for (fixture, band), key in keys.items():
+        if key in missing:
+            needed.setdefault(fixture, []).append(band)
+
+    content = get_llm_client().chat(model, get_batch_messages(needed), max_tokens=120 * len(missing), temperature=0.7)
+    tips = parse_batch_response(content)
+
+    items = []
+    for fixture, fixture_bands in needed.items():
+        fixture_tips = tips.get(fixture, {})
+        for band in fixture_bands:
+            tip = fixture_tips.get(str(band))
+            if isinstance(tip, str) and tip.strip():
+                items.append((keys[(fixture, band)], tip.strip()))
+    tip_cache.put_many(items)
+    return len(items)
+
+
+# Run the warm-up on a background thread, one run per dataset version at a time across all
+# processes. The claim expires after the tip cache's claim_ttl, so a warm-up cut short by
+# a crash, or tips that aged out of the cache, are warmed again by a later start; runs
+# with nothing missing return without an LLM request.
+def start_tip_warmup(index, tip_cache, model, fixtures):
+    claim = f"warmup|{model}|{index['version']}"
+    if not tip_cache.claim(claim):
+        return None
+
+    def run():
+        try:
+            warm_tip_cache(index, tip_cache, model, fixtures)
+        except Exception as e:
+            # Clicks fall back to per-activity requests; the next app start retries the warm-up
+            tip_cache.release(claim)
+            logger.warning("Tip warm-up failed: %s", e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
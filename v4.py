@@ -11,36 +11,35 @@ openai.api_key = os.getenv("OPENAI_API_KEY") # Replace with your actual API key
 
 # Load or generate synthetic data
 @st.cache_data
-def generate_synthetic_data():
-    num_households = 100
-    np.random.seed(42)
+def generate_synthetic_data(num_households=100):
+    rng = np.random.default_rng(42)
 
     # Generate household data
     household_ids = range(1, num_households + 1)
-    household_sizes = np.random.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
+    household_sizes = rng.normal(loc=2.6, scale=0.5, size=num_households).round().astype(int)
     household_sizes = np.clip(household_sizes, 1, None)
 
     # Generate daily water usage
-    daily_usage_per_person = np.random.normal(loc=90, scale=10, size=num_households).round().astype(int)
+    daily_usage_per_person = rng.normal(loc=90, scale=10, size=num_households).round().astype(int)
     total_daily_usage = household_sizes * daily_usage_per_person
 
     # Generate shower water usage
-    shower_usage_per_person = np.random.normal(loc=17.2, scale=2, size=num_households).round(1)
+    shower_usage_per_person = rng.normal(loc=17.2, scale=2, size=num_households).round(1)
     total_shower_usage = household_sizes * shower_usage_per_person
 
     # Generate laundry water usage
-    laundry_usage = np.random.normal(loc=30, scale=5, size=num_households).round(1)  # Gallons per load
-    avg_weekly_laundry = np.random.randint(3, 7, size=num_households)  # Loads per week
+    laundry_usage = rng.normal(loc=30, scale=5, size=num_households).round(1)  # Gallons per load
+    avg_weekly_laundry = rng.integers(3, 7, size=num_households)  # Loads per week
     total_laundry_usage = (laundry_usage * avg_weekly_laundry / 7).round(1)  # Daily average
 
     # Generate dishwashing water usage
-    dishwashing_usage = np.random.normal(loc=6, scale=1, size=num_households).round(1)  # Gallons per load
-    avg_daily_dishwashing = np.random.randint(1, 3, size=num_households)  # Loads per day
+    dishwashing_usage = rng.normal(loc=6, scale=1, size=num_households).round(1)  # Gallons per load
+    avg_daily_dishwashing = rng.integers(1, 3, size=num_households)  # Loads per day
     total_dishwashing_usage = (dishwashing_usage * avg_daily_dishwashing).round(1)
 
     # Generate car wash water usage
-    car_wash_usage_per_wash = np.random.uniform(40, 70, size=num_households)  # Gallons per wash
-    car_washes_per_month = np.random.randint(1, 5, size=num_households)  # 1-4 washes per month
+    car_wash_usage_per_wash = rng.uniform(40, 70, size=num_households)  # Gallons per wash
+    car_washes_per_month = rng.integers(1, 5, size=num_households)  # 1-4 washes per month
     total_car_wash_usage_monthly = car_wash_usage_per_wash * car_washes_per_month  # Total gallons per month
     avg_daily_car_wash_usage = (total_car_wash_usage_monthly / 30).round(1)  # Convert to daily average
 